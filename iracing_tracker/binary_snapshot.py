@@ -0,0 +1,341 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/binary_snapshot.py                                                                 #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Format binaire compact de l'instantané des meilleurs tours (best_laps.bin) : tables de         #
+#               joueurs et de combos, temps en millisecondes, dates en secondes, statistiques par tour en      #
+#               colonnes typées (une par feuille, par forme de statistiques), en-tête versionné + CRC32.       #
+################################################################################################################
+
+import gc
+import json
+import zlib
+import struct
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+
+
+# En-tête : signature, version, réservé, nb joueurs, nb combos, nb records, taille et CRC32 des données
+MAGIC = b"IRTB"
+VERSION = 2
+READABLE_VERSIONS = (1, 2)   # Version 1 : statistiques par tour en un bloc JSON
+HEADER = struct.Struct("<4sHHIIIII")
+
+# Date absente ou illisible
+NO_DATE = np.iinfo(np.int64).min
+
+# Colonnes des records (dans l'ordre du fichier)
+RECORD_COLUMNS = (
+    ("combo", "<u4"),     # Index dans la table des combos
+    ("player", "<u4"),    # Index dans la table des joueurs
+    ("time", "<u4"),      # Temps en millisecondes (tronqué, comme l'affichage)
+    ("date", "<i8"),      # Date locale en secondes (heure locale lue comme UTC ; NO_DATE si absente)
+)
+
+# Forme des statistiques de chaque record (index dans le descripteur ; NO_STATS si le record n'en a pas)
+STATS_SHAPE_COLUMN = "<i4"
+NO_STATS = -1
+
+# Colonnes de feuilles typées (les autres feuilles : listes, textes, types mêlés, en une liste JSON)
+LEAF_DTYPES = {"f8": "<f8", "i8": "<i8", "b1": "<u1"}
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Instantané binaire illisible (signature, version, taille ou somme de contrôle invalide).                     #
+#--------------------------------------------------------------------------------------------------------------#
+class SnapshotError(ValueError):
+    pass
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Date ISO locale (naïve) → secondes, en lisant l'heure locale comme UTC : le décodage retrouve la même chaîne #
+# sans dépendre du fuseau ni de l'heure d'été.                                                                 #
+#--------------------------------------------------------------------------------------------------------------#
+def _date_seconds(date) -> int:
+    try:
+        dt = datetime.fromisoformat(str(date))
+    except (TypeError, ValueError):
+        return NO_DATE
+    if dt.tzinfo is not None:
+        dt = dt.astimezone().replace(tzinfo=None)
+    return int(dt.replace(tzinfo=timezone.utc).timestamp())
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Table de noms → un bloc UTF-8 (noms séparés par \0).                                                         #
+#--------------------------------------------------------------------------------------------------------------#
+def _pack_names(names: list) -> bytes:
+    blob = "\0".join(names).encode("utf-8")
+    return struct.pack("<I", len(blob)) + blob
+
+
+def _unpack_names(buf: memoryview, offset: int, count: int) -> tuple[list, int]:
+    (size,) = struct.unpack_from("<I", buf, offset)
+    offset += 4
+    names = bytes(buf[offset:offset + size]).decode("utf-8").split("\0") if count else []
+    if len(names) != count:
+        raise SnapshotError("table de noms incohérente")
+    return names, offset + size
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Suspend le ramasse-miettes cyclique pendant l'encodage ou le décodage d'un instantané : des centaines de     #
+# milliers de petits dicts et listes, sans cycle, qui déclencheraient sinon des collectes à répétition.        #
+#--------------------------------------------------------------------------------------------------------------#
+@contextmanager
+def _gc_paused():
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Aplatit une valeur de statistiques : ajoute ses feuilles à `leaves` (parcours en profondeur) et retourne sa  #
+# forme (None pour une feuille, sinon ((clé, forme), ...) dans l'ordre du dict).                               #
+#--------------------------------------------------------------------------------------------------------------#
+def _flatten_stats(value, leaves: list):
+    if not isinstance(value, dict):
+        leaves.append(value)
+        return None
+    shape = []
+    for key, sub in value.items():
+        if isinstance(sub, dict):
+            shape.append((str(key), _flatten_stats(sub, leaves)))
+        else:
+            leaves.append(sub)
+            shape.append((str(key), None))
+    return tuple(shape)
+
+
+def _shape_to_json(shape):
+    return None if shape is None else [[key, _shape_to_json(sub)] for key, sub in shape]
+
+
+def _shape_from_json(data):
+    return None if data is None else tuple((str(key), _shape_from_json(sub)) for key, sub in data)
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Type de colonne d'une feuille : "f8" / "i8" / "b1" si toutes ses valeurs (None mises à part) sont de ce      #
+# type Python, sinon "json".                                                                                   #
+#--------------------------------------------------------------------------------------------------------------#
+def _leaf_kind(values) -> str:
+    types = {type(v) for v in values if v is not None}
+    if types <= {float}:
+        return "f8"
+    if types == {int} and all(-2 ** 63 <= v < 2 ** 63 for v in values if v is not None):
+        return "i8"
+    if types == {bool}:
+        return "b1"
+    return "json"
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Encode une colonne de feuille : (descripteur [type, masque des None], blocs binaires).                       #
+#--------------------------------------------------------------------------------------------------------------#
+def _pack_leaf(values: tuple) -> tuple[list, list]:
+    kind = _leaf_kind(values)
+    if kind == "json":
+        blob = json.dumps(list(values), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return [kind, False], [struct.pack("<I", len(blob)), blob]
+    nulls = [v is None for v in values]
+    masked = any(nulls)
+    column = np.array([0 if v is None else v for v in values], dtype=LEAF_DTYPES[kind])
+    blocks = [np.array(nulls, dtype="<u1").tobytes()] if masked else []
+    return [kind, masked], blocks + [column.tobytes()]
+
+
+def _unpack_leaf(buf: memoryview, offset: int, count: int, kind: str, masked: bool) -> tuple[list, int]:
+    if kind == "json":
+        (size,) = struct.unpack_from("<I", buf, offset)
+        offset += 4
+        values = json.loads(bytes(buf[offset:offset + size]).decode("utf-8"))
+        if len(values) != count:
+            raise SnapshotError("colonne de statistiques incohérente")
+        return values, offset + size
+    if kind not in LEAF_DTYPES:
+        raise SnapshotError(f"type de colonne inconnu : {kind!r}")
+    nulls = None
+    if masked:
+        nulls = np.frombuffer(buf[offset:offset + count], dtype="<u1")
+        offset += count
+    dtype = np.dtype(LEAF_DTYPES[kind])
+    column = np.frombuffer(buf[offset:offset + dtype.itemsize * count], dtype=dtype)
+    offset += dtype.itemsize * count
+    values = (column.astype(bool) if kind == "b1" else column).tolist()
+    if nulls is not None:
+        for i in np.flatnonzero(nulls).tolist():
+            values[i] = None
+    return values, offset
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Reconstruit les statistiques de `count` records d'une même forme depuis leurs colonnes de feuilles (dans     #
+# l'ordre de parcours de la forme) : un dict(zip()) par niveau plutôt qu'un décodage JSON par record.          #
+#--------------------------------------------------------------------------------------------------------------#
+def _build_stats(shape, leaves, count: int) -> list:
+    if shape is None:
+        return next(leaves)
+    if not shape:
+        return [{} for _ in range(count)]
+    keys = [key for key, _ in shape]
+    children = [_build_stats(sub, leaves, count) for _, sub in shape]
+    return [dict(zip(keys, row)) for row in zip(*children)]
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Encode les statistiques par tour : records regroupés par forme, une colonne typée par feuille de chaque      #
+# forme. Bloc : descripteur JSON (formes, nombre de records, types des colonnes), forme de chaque record, puis #
+# les colonnes.                                                                                                #
+#--------------------------------------------------------------------------------------------------------------#
+def _pack_stats(stats: list) -> bytes:
+    shape_ids = np.full(len(stats), NO_STATS, dtype=STATS_SHAPE_COLUMN)
+    group_ids: dict = {}
+    groups: list[tuple] = []
+    for i, value in enumerate(stats):
+        if value is None:
+            continue
+        leaves: list = []
+        shape = _flatten_stats(value, leaves)
+        group_id = group_ids.get(shape)
+        if group_id is None:
+            group_id = group_ids[shape] = len(groups)
+            groups.append((shape, []))
+        shape_ids[i] = group_id
+        groups[group_id][1].append(leaves)
+
+    descriptor = []
+    blocks = []
+    for shape, rows in groups:
+        leaf_descriptors = []
+        for values in zip(*rows):
+            leaf_descriptor, leaf_blocks = _pack_leaf(values)
+            leaf_descriptors.append(leaf_descriptor)
+            blocks.extend(leaf_blocks)
+        descriptor.append({"shape": _shape_to_json(shape), "count": len(rows), "leaves": leaf_descriptors})
+    header = json.dumps(descriptor, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return b"".join([struct.pack("<I", len(header)), header, shape_ids.tobytes(), *blocks])
+
+
+def _unpack_stats(buf: memoryview, offset: int, n_records: int) -> list:
+    (size,) = struct.unpack_from("<I", buf, offset)
+    offset += 4
+    descriptor = json.loads(bytes(buf[offset:offset + size]).decode("utf-8"))
+    offset += size
+    width = np.dtype(STATS_SHAPE_COLUMN).itemsize * n_records
+    shape_ids = np.frombuffer(buf[offset:offset + width], dtype=STATS_SHAPE_COLUMN)
+    offset += width
+
+    stats: list = [None] * n_records
+    for group_id, group in enumerate(descriptor):
+        shape, count = _shape_from_json(group["shape"]), int(group["count"])
+        columns = []
+        for kind, masked in group["leaves"]:
+            values, offset = _unpack_leaf(buf, offset, count, kind, masked)
+            columns.append(values)
+        indexes = np.flatnonzero(shape_ids == group_id).tolist()
+        if len(indexes) != count:
+            raise SnapshotError("formes de statistiques incohérentes")
+        for i, value in zip(indexes, _build_stats(shape, iter(columns), count)):
+            stats[i] = value
+    return stats
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Encode un dict au format de best_laps.json ({"track|car": {joueur: {"time", "date"[, "stats"]}}}). Les       #
+# entrées sans temps positif sont écartées ; les statistiques par tour suivent en colonnes (_pack_stats).      #
+#--------------------------------------------------------------------------------------------------------------#
+@_gc_paused()
+def encode_best_laps(best_laps: dict) -> bytes:
+    combos: list[str] = []
+    players: list[str] = []
+    player_ids: dict[str, int] = {}
+    rows = []
+    stats = []
+    for combo_key, players_map in best_laps.items():
+        if not isinstance(players_map, dict):
+            continue
+        combo_index = len(combos)
+        combos.append(str(combo_key))
+        for player, entry in players_map.items():
+            lap_time = entry.get("time") if isinstance(entry, dict) else None
+            if not isinstance(lap_time, (int, float)) or lap_time <= 0:
+                continue
+            player = str(player)
+            pid = player_ids.get(player)
+            if pid is None:
+                pid = player_ids[player] = len(players)
+                players.append(player)
+            rows.append((combo_index, pid, int(lap_time * 1000.0 + 1e-6), _date_seconds(entry.get("date"))))
+            stats.append(entry.get("stats") or None)
+
+    columns = np.array(rows, dtype=list(RECORD_COLUMNS)) if rows else np.zeros(0, dtype=list(RECORD_COLUMNS))
+    payload = b"".join([
+        _pack_names(players),
+        _pack_names(combos),
+        *(np.ascontiguousarray(columns[name]).tobytes() for name, _ in RECORD_COLUMNS),
+        _pack_stats(stats),
+    ])
+    header = HEADER.pack(MAGIC, VERSION, 0, len(players), len(combos), len(rows), len(payload),
+                         zlib.crc32(payload))
+    return header + payload
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Décode un instantané binaire en dict au format de best_laps.json (SnapshotError si illisible ; versions      #
+# READABLE_VERSIONS). Sans `with_stats`, le bloc des statistiques par tour (l'essentiel du fichier) n'est pas  #
+# décodé.                                                                                                      #
+#--------------------------------------------------------------------------------------------------------------#
+@_gc_paused()
+def decode_best_laps(data: bytes, with_stats: bool = True) -> dict:
+    if len(data) < HEADER.size:
+        raise SnapshotError("fichier tronqué")
+    magic, version, _, n_players, n_combos, n_records, size, crc = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise SnapshotError("signature inconnue")
+    if version not in READABLE_VERSIONS:
+        raise SnapshotError(f"version {version} non prise en charge")
+    buf = memoryview(data)[HEADER.size:]
+    if len(buf) != size or zlib.crc32(buf) != crc:
+        raise SnapshotError("somme de contrôle invalide")
+
+    players, offset = _unpack_names(buf, 0, n_players)
+    combos, offset = _unpack_names(buf, offset, n_combos)
+    cols = {}
+    for name, dtype in RECORD_COLUMNS:
+        width = np.dtype(dtype).itemsize * n_records
+        cols[name] = np.frombuffer(buf[offset:offset + width], dtype=dtype)
+        offset += width
+    stats = None
+    if with_stats:
+        try:
+            if version == 1:
+                stats = json.loads(bytes(buf[offset:]).decode("utf-8"))
+            else:
+                stats = _unpack_stats(buf, offset, n_records)
+        except SnapshotError:
+            raise
+        except (ValueError, KeyError, TypeError, struct.error) as e:
+            raise SnapshotError(f"statistiques illisibles : {e}") from e
+
+    # Conversions vectorisées : millisecondes → secondes, secondes → date ISO
+    times = (cols["time"] / 1000.0).tolist()
+    has_date = cols["date"] != NO_DATE
+    dates = np.where(has_date, cols["date"], 0).astype("datetime64[s]").astype(str).tolist()
+    has_date = has_date.tolist()
+
+    best_laps: dict = {key: {} for key in combos}
+    combo_maps = [best_laps[key] for key in combos]
+    for i, (c, p) in enumerate(zip(cols["combo"].tolist(), cols["player"].tolist())):
+        entry = {"time": times[i], "date": dates[i] if has_date[i] else None}
+        if stats and stats[i]:
+            entry["stats"] = stats[i]
+        combo_maps[c][players[p]] = entry
+    return best_laps
@@ -1,17 +1,24 @@
 ################################################################################################################
 # Projet : iRacing Tracker                                                                                     #
 # Fichier : iracing_tracker/data_store.py                                                                      #
-# Date de modification : 16.06.2026                                                                            #
+# Date de modification : 18.10.2026                                                                            #
 # Auteur : Nicolas Schneeberger                                                                                #
-# Description : Gère la persistance locale (JSON atomique) des joueurs et des meilleurs tours.                 #
+# Description : Gère la persistance locale (JSON atomique) des joueurs, des meilleurs tours (instantané JSON   #
+#               ou binaire + journal en ajout seul, compacté en arrière-plan), de l'index des zones            #
+#               d'incidents par circuit, des résumés de relais et des courbes des records.                     #
 ################################################################################################################
 
 import os
 import sys
+import glob
 import json
 import tempfile
+import threading
+from collections import deque
 from datetime import datetime
 
+from iracing_tracker.binary_snapshot import encode_best_laps, decode_best_laps, SnapshotError
+
 
 #--------------------------------------------------------------------------------------------------------------#
 # Détermine le répertoire de stockage des données utilisateur (surchargé par IRTRACKER_DATA_DIR).              #
@@ -35,6 +42,40 @@ os.makedirs(DATA_DIR, exist_ok=True)
 
 PLAYERS_PATH   = os.path.join(DATA_DIR, "players.json")
 BEST_LAPS_PATH = os.path.join(DATA_DIR, "best_laps.json")
+BEST_LAPS_BIN_PATH = os.path.join(DATA_DIR, "best_laps.bin")
+BEST_LAPS_JOURNAL_PATH = os.path.join(DATA_DIR, "best_laps.journal.jsonl")
+BEST_LAPS_COMPACTING_PATH = BEST_LAPS_JOURNAL_PATH + ".compacting"
+INCIDENT_HEAT_PATH = os.path.join(DATA_DIR, "incident_heat.json")
+STINTS_PATH = os.path.join(DATA_DIR, "stints.json")
+LAP_RULES_PATH = os.path.join(DATA_DIR, "lap_rules.json")
+REFERENCE_LAPS_DIR = os.path.join(DATA_DIR, "reference_laps")
+RECORDS_DB_PATH = os.path.join(DATA_DIR, "records.db")
+LAP_HISTORY_DIR = os.path.join(DATA_DIR, "lap_history")
+NAME_CATALOG_PATH = os.path.join(DATA_DIR, "name_catalog.json")
+LAP_STATS_PATH = os.path.join(DATA_DIR, "lap_stats.json")
+LAP_STATS_JOURNAL_PATH = os.path.join(DATA_DIR, "lap_stats.journal.jsonl")
+
+# Formats de l'instantané des meilleurs tours
+SNAPSHOT_JSON = "json"
+SNAPSHOT_BINARY = "binary"
+
+# Taille d'un journal (meilleurs tours, statistiques agrégées ; octets) au-delà de laquelle il est compacté dans
+# son instantané (best_laps.json, lap_stats.json)
+JOURNAL_COMPACT_BYTES = 256 * 1024
+
+# Verrous du journal : ajout / rotation (court) et écriture de l'instantané (compaction, réécriture complète)
+_journal_lock = threading.Lock()
+_snapshot_lock = threading.Lock()
+_compaction_thread = None
+
+# Étapes des compactions faites par ce processus, de la plus ancienne à la plus récente : (signature avant,
+# signature après) de la rotation du journal (4 fichiers), puis de la réécriture de l'instantané (instantanés et
+# journal compacté seuls). Une compaction ne change pas le contenu : un lecteur qui avait vu l'état d'avant peut
+# adopter l'état d'après sans recharger (voir _follow_compactions).
+_compactions = deque(maxlen=32)
+
+# Verrou des statistiques agrégées (instantané lap_stats.json et son journal)
+_lap_stats_lock = threading.Lock()
 
 
 #--------------------------------------------------------------------------------------------------------------#
@@ -68,6 +109,48 @@ def _atomic_write_json(path: str, data) -> None:
             raise
 
 
+#--------------------------------------------------------------------------------------------------------------#
+# Écrit un fichier binaire de façon atomique (fichier temporaire + fsync + os.replace).                        #
+#--------------------------------------------------------------------------------------------------------------#
+def _atomic_write_bytes(path: str, data: bytes) -> None:
+    _ensure_parent_dir(path)
+    dirpath  = os.path.dirname(os.path.abspath(path))
+    prefix   = os.path.basename(path) + "."
+    fd, tmp  = tempfile.mkstemp(dir=dirpath, prefix=prefix, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        finally:
+            raise
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Ajoute une ligne à un fichier en une écriture O_APPEND + fsync ; retourne la taille du fichier. Une          #
+# dernière ligne tronquée (arrêt brutal) est d'abord terminée, pour ne pas corrompre la ligne ajoutée.         #
+#--------------------------------------------------------------------------------------------------------------#
+def _append_line(path: str, line: str) -> int:
+    _ensure_parent_dir(path)
+    fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+    try:
+        size = os.fstat(fd).st_size
+        if size:
+            os.lseek(fd, size - 1, os.SEEK_SET)
+            if os.read(fd, 1) != b"\n":
+                line = "\n" + line
+        os.write(fd, line.encode("utf-8"))
+        os.fsync(fd)
+        return os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+
+
 #--------------------------------------------------------------------------------------------------------------#
 # Charge un JSON ; en cas de fichier illisible, garde une copie « .corrupt » et renvoie le défaut.             #
 #--------------------------------------------------------------------------------------------------------------#
@@ -93,6 +176,199 @@ def _safe_load_json(path: str, default):
         raise
 
 
+#--------------------------------------------------------------------------------------------------------------#
+# Normalise un dictionnaire de meilleurs tours (clés en str, joueurs vides écartés).                           #
+#--------------------------------------------------------------------------------------------------------------#
+def _normalize_best_laps(best_laps_dict: dict) -> dict:
+    normalized = {}
+    for k, v in best_laps_dict.items():
+        k_str = str(k) if k is not None else "None"
+        if isinstance(v, dict):
+            inner = {}
+            for p, pv in v.items():
+                if p is None or p == "---":
+                    continue
+                inner[str(p)] = pv
+            normalized[k_str] = inner
+        else:
+            normalized[k_str] = v
+    return normalized
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Format configuré de l'instantané : IRTRACKER_SNAPSHOT_FORMAT (« json » / « binary »), sinon binaire si       #
+# best_laps.bin existe.                                                                                        #
+#--------------------------------------------------------------------------------------------------------------#
+def configured_snapshot_format() -> str:
+    fmt = (os.getenv("IRTRACKER_SNAPSHOT_FORMAT") or "").strip().lower()
+    if fmt in (SNAPSHOT_JSON, SNAPSHOT_BINARY):
+        return fmt
+    return SNAPSHOT_BINARY if os.path.exists(BEST_LAPS_BIN_PATH) else SNAPSHOT_JSON
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Lit l'instantané des meilleurs tours dans le format configuré. Un best_laps.bin illisible est gardé en       #
+# « .corrupt » et best_laps.json (dernier export) prend le relais. Sans `with_stats`, un instantané binaire    #
+# est lu sans les statistiques par tour.                                                                       #
+#--------------------------------------------------------------------------------------------------------------#
+def _load_snapshot(with_stats: bool = True) -> dict:
+    if configured_snapshot_format() == SNAPSHOT_BINARY:
+        try:
+            with open(BEST_LAPS_BIN_PATH, "rb") as f:
+                return decode_best_laps(f.read(), with_stats=with_stats)
+        except FileNotFoundError:
+            pass
+        except SnapshotError:
+            ts = datetime.now().strftime("%Y%m%d-%H%M%S")
+            try:
+                os.replace(BEST_LAPS_BIN_PATH, f"{BEST_LAPS_BIN_PATH}.corrupt-{ts}")
+            except OSError:
+                pass
+    data = _safe_load_json(BEST_LAPS_PATH, default={})
+    return data if isinstance(data, dict) else {}
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Réécrit atomiquement l'instantané des meilleurs tours dans le format configuré.                              #
+#--------------------------------------------------------------------------------------------------------------#
+def _write_snapshot(best_laps: dict):
+    if configured_snapshot_format() == SNAPSHOT_BINARY:
+        _atomic_write_bytes(BEST_LAPS_BIN_PATH, encode_best_laps(best_laps))
+    else:
+        _atomic_write_json(BEST_LAPS_PATH, best_laps)
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Rejoue un journal de meilleurs tours ({"k": combo, "p": joueur, "e": entrée} par ligne) sur `best_laps` ;    #
+# "e": null supprime l'entrée. Une ligne illisible (fin tronquée par un arrêt brutal) est ignorée.             #
+#--------------------------------------------------------------------------------------------------------------#
+def _replay_journal(path: str, best_laps: dict) -> int:
+    applied = 0
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                    combo, player, entry = str(rec["k"]), str(rec["p"]), rec["e"]
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    continue
+                players_map = best_laps.setdefault(combo, {})
+                if not isinstance(players_map, dict):
+                    continue
+                if entry is None:
+                    players_map.pop(player, None)
+                else:
+                    players_map[player] = entry
+                applied += 1
+    except FileNotFoundError:
+        pass
+    return applied
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Compacte le journal dans l'instantané : rotation du journal (les ajouts suivants repartent dans un journal   #
+# neuf), réécriture atomique de best_laps.json, puis suppression du journal compacté. Un arrêt à n'importe     #
+# quelle étape est rattrapé au chargement (journal compacté rejoué à nouveau, sans effet de bord).             #
+#--------------------------------------------------------------------------------------------------------------#
+def _compact_best_laps():
+    with _snapshot_lock:
+        with _journal_lock:
+            if not os.path.exists(BEST_LAPS_COMPACTING_PATH) and os.path.exists(BEST_LAPS_JOURNAL_PATH):
+                before = DataStore.best_laps_signature()
+                os.replace(BEST_LAPS_JOURNAL_PATH, BEST_LAPS_COMPACTING_PATH)
+                _compactions.append((before, DataStore.best_laps_signature()))
+        if not os.path.exists(BEST_LAPS_COMPACTING_PATH):
+            return
+        before = DataStore.best_laps_signature()
+        data = _load_snapshot()
+        _replay_journal(BEST_LAPS_COMPACTING_PATH, data)
+        _write_snapshot(_normalize_best_laps(data))
+        os.remove(BEST_LAPS_COMPACTING_PATH)
+        _compactions.append((before[:3], DataStore.best_laps_signature()[:3]))
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Signature qu'aurait `signature` après les étapes de compaction faites depuis par ce processus (rotation du   #
+# journal, puis réécriture de l'instantané ; le journal ouvert après la rotation est conservé). Égale à la     #
+# signature actuelle si rien d'autre n'a changé : une compaction n'est pas une modification à recharger.       #
+#--------------------------------------------------------------------------------------------------------------#
+def _follow_compactions(signature):
+    for before, after in list(_compactions):
+        if signature is None:
+            break
+        if len(before) == 4:
+            if signature == before:
+                signature = after
+        elif signature[2] == before[2] and tuple(signature[:2]) in (before[:2], after[:2]):
+            # Vue avant la réécriture, ou pendant (instantané réécrit, journal compacté pas encore supprimé)
+            signature = (*after, signature[3])
+    return signature
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Rejoue le journal des statistiques agrégées ({"t": table, "k": clé, "a": état} par ligne) sur `stats`        #
+# (format de LapStats.to_dict) : "a": null retire la série. Tables : "total" (sans clé), "combos"              #
+# ("trackID|carID"), "players" (joueur), "player_combos" (["trackID|carID", joueur]). Une ligne illisible est  #
+# ignorée.                                                                                                     #
+#--------------------------------------------------------------------------------------------------------------#
+def _replay_lap_stats_journal(path: str, stats: dict) -> int:
+    applied = 0
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                    table, key, state = str(rec["t"]), rec["k"], rec["a"]
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    continue
+                if table == "total":
+                    stats["total"] = state
+                elif table in ("combos", "players") and isinstance(key, str):
+                    series = stats.setdefault(table, {})
+                    if not isinstance(series, dict):
+                        continue
+                    if state is None:
+                        series.pop(key, None)
+                    else:
+                        series[key] = state
+                elif table == "player_combos" and isinstance(key, list) and len(key) == 2:
+                    players_map = stats.setdefault(table, {}).setdefault(str(key[0]), {})
+                    if not isinstance(players_map, dict):
+                        continue
+                    if state is None:
+                        players_map.pop(str(key[1]), None)
+                    else:
+                        players_map[str(key[1])] = state
+                else:
+                    continue
+                applied += 1
+    except FileNotFoundError:
+        pass
+    return applied
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Intègre le journal des statistiques agrégées à lap_stats.json (réécriture atomique), puis le supprime ; un   #
+# arrêt entre les deux rejoue le journal au chargement, sans effet de bord. Appelé sous _lap_stats_lock.       #
+#--------------------------------------------------------------------------------------------------------------#
+def _compact_lap_stats():
+    if not os.path.exists(LAP_STATS_JOURNAL_PATH):
+        return
+    data = _safe_load_json(LAP_STATS_PATH, default={})
+    data = data if isinstance(data, dict) else {}
+    _replay_lap_stats_journal(LAP_STATS_JOURNAL_PATH, data)
+    _atomic_write_json(LAP_STATS_PATH, data)
+    os.remove(LAP_STATS_JOURNAL_PATH)
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Fichier des courbes de référence d'un combo « trackID|carID » (reference_laps/<trackID>_<carID>.json).       #
+#--------------------------------------------------------------------------------------------------------------#
+def _reference_path(combo_key: str) -> str:
+    name = "".join(ch if ch.isalnum() or ch == "-" else "_" for ch in str(combo_key))
+    return os.path.join(REFERENCE_LAPS_DIR, f"{name}.json")
+
+
 #--------------------------------------------------------------------------------------------------------------#
 # Centralise la lecture et l'écriture des données persistantes (joueurs et meilleurs tours).                   #
 #--------------------------------------------------------------------------------------------------------------#
@@ -131,44 +407,298 @@ class DataStore:
         _atomic_write_json(PLAYERS_PATH, normalized)
 
     #--------------------------------------------------------------------------------------------------------------#
-    # Récupère le dictionnaire des meilleurs tours.                                                                #
+    # Récupère le dictionnaire des meilleurs tours : instantané, puis journal en cours de compaction et journal.   #
+    # Lu sous le verrou de l'instantané : une compaction qui se terminerait entre ces lectures ferait disparaître  #
+    # les records du journal compacté (ni dans l'instantané lu, ni dans un journal encore présent). Sans           #
+    # `with_stats`, les statistiques par tour d'un instantané binaire ne sont pas lues.                            #
     #--------------------------------------------------------------------------------------------------------------#
     @staticmethod
-    def load_best_laps():
-        data = _safe_load_json(BEST_LAPS_PATH, default={})
-        if not isinstance(data, dict):
-            return {}
+    def load_best_laps(with_stats: bool = True):
+        with _snapshot_lock:
+            data = _load_snapshot(with_stats)
+            _replay_journal(BEST_LAPS_COMPACTING_PATH, data)
+            _replay_journal(BEST_LAPS_JOURNAL_PATH, data)
         return data
 
     #--------------------------------------------------------------------------------------------------------------#
-    # Normalise (clés en str, joueurs vides écartés) et sauvegarde les meilleurs tours.                            #
+    # Signature disque des meilleurs tours : (inode, taille, mtime en ns) de l'instantané et des journaux, None    #
+    # pour un fichier absent. Toute écriture (ajout, compaction, réécriture, suppression) la change.               #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def best_laps_signature() -> tuple:
+        signature = []
+        for path in (BEST_LAPS_PATH, BEST_LAPS_BIN_PATH, BEST_LAPS_COMPACTING_PATH, BEST_LAPS_JOURNAL_PATH):
+            try:
+                st = os.stat(path)
+                signature.append((st.st_ino, st.st_size, st.st_mtime_ns))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Compare `signature` (relevée par un lecteur) à la signature actuelle, en suivant les compactions faites      #
+    # depuis par ce processus : retourne (changé, signature actuelle). `changé` vaut None si ce processus écrit    #
+    # l'instantané en ce moment (compaction, réécriture) : l'état sera revérifié au prochain contrôle.             #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def best_laps_changed_since(signature) -> tuple:
+        current = DataStore.best_laps_signature()
+        if current == signature:
+            return False, current
+        if not _snapshot_lock.acquire(blocking=False):
+            return None, current
+        try:
+            current = DataStore.best_laps_signature()
+            return current != _follow_compactions(signature), current
+        finally:
+            _snapshot_lock.release()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Normalise et réécrit tous les meilleurs tours dans l'instantané (le journal, intégré, est vidé).             #
     #--------------------------------------------------------------------------------------------------------------#
     @staticmethod
     def save_best_laps(best_laps_dict):
         if not isinstance(best_laps_dict, dict):
             raise TypeError("best_laps_dict must be a dict")
-        normalized = {}
-        for k, v in best_laps_dict.items():
-            k_str = str(k) if k is not None else "None"
-            if isinstance(v, dict):
-                inner = {}
-                for p, pv in v.items():
-                    if p is None or p == "---":
-                        continue
-                    inner[str(p)] = pv
-                normalized[k_str] = inner
-            else:
-                normalized[k_str] = v
-        _atomic_write_json(BEST_LAPS_PATH, normalized)
+        with _snapshot_lock:
+            _write_snapshot(_normalize_best_laps(best_laps_dict))
+            with _journal_lock:
+                for path in (BEST_LAPS_COMPACTING_PATH, BEST_LAPS_JOURNAL_PATH):
+                    if os.path.exists(path):
+                        os.remove(path)
 
     #--------------------------------------------------------------------------------------------------------------#
-    # Supprime un joueur et purge toutes ses entrées dans les meilleurs tours (insensible à la casse).             #
+    # Exporte tous les meilleurs tours (instantané + journaux, statistiques comprises) en JSON ; retourne le       #
+    # nombre de records exportés.                                                                                  #
     #--------------------------------------------------------------------------------------------------------------#
     @staticmethod
-    def delete_player(name: str):
+    def export_best_laps_json(path: str = BEST_LAPS_PATH) -> int:
+        data = _normalize_best_laps(DataStore.load_best_laps())
+        _atomic_write_json(path, data)
+        return sum(len(v) for v in data.values() if isinstance(v, dict))
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ajoute le record d'un joueur au journal (une écriture O_APPEND + fsync, coût indépendant de l'historique) ;  #
+    # lance la compaction en arrière-plan quand le journal dépasse JOURNAL_COMPACT_BYTES.                          #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def append_best_lap(combo_key: str, player: str, entry: dict):
+        DataStore.append_best_laps([(combo_key, player, entry)])
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ajoute plusieurs records [(combo, joueur, entrée)] au journal en une seule écriture (un seul fsync) ; une    #
+    # entrée None supprime le record du joueur sur ce combo. Retourne la signature juste après l'ajout (relevée    #
+    # avant qu'une compaction déclenchée par cet ajout ne fasse tourner le journal).                               #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def append_best_laps(records: list) -> tuple:
+        line = "".join(
+            json.dumps({"k": str(combo_key), "p": str(player), "e": entry}, ensure_ascii=False,
+                       separators=(",", ":")) + "\n"
+            for combo_key, player, entry in records if player and player != "---"
+        )
+        if not line:
+            return DataStore.best_laps_signature()
+        with _journal_lock:
+            size = _append_line(BEST_LAPS_JOURNAL_PATH, line)
+            signature = DataStore.best_laps_signature()
+        if size > JOURNAL_COMPACT_BYTES:
+            DataStore.compact_best_laps(background=True)
+        return signature
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Compacte le journal des meilleurs tours dans best_laps.json (dans un thread daemon si `background`, une      #
+    # seule compaction à la fois).                                                                                 #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def compact_best_laps(background: bool = False):
+        global _compaction_thread
+        if not background:
+            _compact_best_laps()
+            return
+        if _compaction_thread is not None and _compaction_thread.is_alive():
+            return
+        _compaction_thread = threading.Thread(target=_compact_best_laps, name="best-laps-compaction", daemon=True)
+        _compaction_thread.start()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Récupère l'index des zones d'incidents ({track_id: [points par tranche de LapDistPct]}).                     #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def load_incident_heat():
+        data = _safe_load_json(INCIDENT_HEAT_PATH, default={})
+        if not isinstance(data, dict):
+            return {}
+        return {str(k): v for k, v in data.items() if isinstance(v, list)}
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Sauvegarde l'index des zones d'incidents.                                                                    #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def save_incident_heat(heat_dict):
+        if not isinstance(heat_dict, dict):
+            raise TypeError("heat_dict must be a dict")
+        _atomic_write_json(INCIDENT_HEAT_PATH, {str(k): list(v) for k, v in heat_dict.items()})
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Récupère les résumés de relais ({"track|car": [résumé, ...]}, du plus ancien au plus récent).                #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def load_stints():
+        data = _safe_load_json(STINTS_PATH, default={})
+        if not isinstance(data, dict):
+            return {}
+        return {str(k): v for k, v in data.items() if isinstance(v, list)}
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ajoute le résumé d'un relais terminé au combo track|car.                                                     #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def append_stint(combo_key: str, summary: dict):
+        if not isinstance(summary, dict):
+            raise TypeError("summary must be a dict")
+        stints = DataStore.load_stints()
+        stints.setdefault(str(combo_key), []).append(summary)
+        _atomic_write_json(STINTS_PATH, stints)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Récupère la configuration des règles de validité (liste de {"rule": ...}), ou None si absente (défauts).     #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def load_lap_rules():
+        data = _safe_load_json(LAP_RULES_PATH, default=None)
+        if not isinstance(data, list):
+            return None
+        return [r for r in data if isinstance(r, dict)]
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Récupère les courbes des records d'un combo track|car ({joueur: {"time", "curve"}}) : un seul petit fichier  #
+    # lu, quel que soit le nombre de combos.                                                                       #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def load_reference_laps(combo_key: str) -> dict:
+        data = _safe_load_json(_reference_path(combo_key), default={})
+        if not isinstance(data, dict):
+            return {}
+        return {str(k): v for k, v in data.items() if isinstance(v, dict)}
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Réécrit les courbes des records d'un combo (fichier supprimé s'il n'en reste aucune).                        #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def save_reference_laps(combo_key: str, references: dict):
+        if not isinstance(references, dict):
+            raise TypeError("references must be a dict")
+        path = _reference_path(combo_key)
+        if references:
+            _atomic_write_json(path, references)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Récupère la courbe du record d'un joueur pour un combo track|car, ou None.                                   #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def load_reference_lap(combo_key: str, player: str):
+        entry = DataStore.load_reference_laps(combo_key).get(player)
+        return entry if isinstance(entry, dict) else None
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Sauvegarde la courbe du record d'un joueur ({"time", "curve"}) pour un combo track|car.                      #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def save_reference_lap(combo_key: str, player: str, reference: dict):
+        if not isinstance(reference, dict):
+            raise TypeError("reference must be a dict")
+        if not player or player == "---":
+            return
+        refs = DataStore.load_reference_laps(combo_key)
+        refs[str(player)] = reference
+        DataStore.save_reference_laps(combo_key, refs)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Retire les courbes de référence données [(combo, joueur exact)] ; réécrit seulement les combos concernés.    #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def delete_reference_laps(pairs: list):
+        by_combo: dict[str, list] = {}
+        for combo_key, player in pairs or ():
+            by_combo.setdefault(str(combo_key), []).append(str(player))
+        for combo_key, players in by_combo.items():
+            refs = DataStore.load_reference_laps(combo_key)
+            if any([refs.pop(p, None) is not None for p in players]):
+                DataStore.save_reference_laps(combo_key, refs)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Récupère les statistiques agrégées des tours (format de LapStats.to_dict) : instantané puis journal, ou {}   #
+    # si absentes.                                                                                                 #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def load_lap_stats():
+        with _lap_stats_lock:
+            data = _safe_load_json(LAP_STATS_PATH, default={})
+            data = data if isinstance(data, dict) else {}
+            _replay_lap_stats_journal(LAP_STATS_JOURNAL_PATH, data)
+        return data
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Réécrit toutes les statistiques agrégées des tours (le journal, intégré, est supprimé).                      #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def save_lap_stats(stats: dict):
+        if not isinstance(stats, dict):
+            raise TypeError("stats must be a dict")
+        with _lap_stats_lock:
+            _atomic_write_json(LAP_STATS_PATH, stats)
+            if os.path.exists(LAP_STATS_JOURNAL_PATH):
+                os.remove(LAP_STATS_JOURNAL_PATH)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ajoute les séries modifiées [(table, clé, état ou None)] (LapStats.changes) au journal des statistiques en   #
+    # une écriture ; au-delà de JOURNAL_COMPACT_BYTES, le journal est intégré à lap_stats.json.                    #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def append_lap_stats(records: list):
+        line = "".join(
+            json.dumps({"t": table, "k": key, "a": state}, ensure_ascii=False, separators=(",", ":")) + "\n"
+            for table, key, state in records
+        )
+        if not line:
+            return
+        with _lap_stats_lock:
+            if _append_line(LAP_STATS_JOURNAL_PATH, line) > JOURNAL_COMPACT_BYTES:
+                _compact_lap_stats()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Récupère le catalogue des noms ({"tracks": {trackID: nom}, "cars": {carID: nom}}, IDs en texte).             #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def load_name_catalog():
+        data = _safe_load_json(NAME_CATALOG_PATH, default={})
+        if not isinstance(data, dict):
+            data = {}
+        catalog = {}
+        for kind in ("tracks", "cars"):
+            names = data.get(kind)
+            catalog[kind] = {str(k): str(v) for k, v in names.items()} if isinstance(names, dict) else {}
+        return catalog
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Sauvegarde le catalogue des noms de circuits et de voitures.                                                 #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def save_name_catalog(catalog: dict):
+        if not isinstance(catalog, dict):
+            raise TypeError("catalog must be a dict")
+        _atomic_write_json(NAME_CATALOG_PATH, catalog)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Retire un joueur de players.json (insensible à la casse), sans toucher à ses records.                        #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def remove_player(name: str):
         if not name:
             return
-        # Retrait de players.json
         current = DataStore.load_players()
         target = str(name).strip().lower()
         kept = []
@@ -177,6 +707,18 @@ class DataStore:
                 kept.append(p)
         if len(kept) != len(current):
             _atomic_write_json(PLAYERS_PATH, kept)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Supprime un joueur et purge toutes ses entrées dans les meilleurs tours (insensible à la casse), hors        #
+    # application : en cours de session, RecordManager.delete_player ne touche que les combos du joueur.           #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def delete_player(name: str):
+        if not name:
+            return
+        # Retrait de players.json
+        DataStore.remove_player(name)
+        target = str(name).strip().lower()
         # Purge de best_laps.json pour ce joueur
         bl = DataStore.load_best_laps()
         changed = False
@@ -188,3 +730,22 @@ class DataStore:
                     changed = True
         if changed:
             DataStore.save_best_laps(bl)
+        # Purge des courbes des records (un fichier par combo)
+        for path in glob.glob(os.path.join(REFERENCE_LAPS_DIR, "*.json")):
+            refs = _safe_load_json(path, default={})
+            if not isinstance(refs, dict):
+                continue
+            new_map = {k: v for k, v in refs.items() if str(k).strip().lower() != target}
+            if len(new_map) != len(refs):
+                if new_map:
+                    _atomic_write_json(path, new_map)
+                else:
+                    os.remove(path)
+        # Purge de records.db (moteur SQLite), si la base existe
+        if os.path.exists(RECORDS_DB_PATH):
+            from iracing_tracker.sqlite_store import SqliteRecordStore
+            store = SqliteRecordStore()
+            try:
+                store.delete_player(name)
+            finally:
+                store.close()
@@ -0,0 +1,140 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/discontinuity_detector.py                                                          #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Détecte en flux les discontinuités de LapDistPct / SessionTime (remorquage, reset vers les     #
+#               stands, téléportation, saut de replay) sur un anneau des derniers échantillons, en O(1).       #
+################################################################################################################
+
+from typing import Optional
+
+
+# Types de discontinuité
+KIND_TOW = "tow"                # Réapparition ailleurs après un passage hors du monde (surface -1)
+KIND_RESET = "reset"            # Saut de position vers la voie des stands / le stand
+KIND_TELEPORT = "teleport"      # Saut de position en piste
+KIND_TIME_JUMP = "time_jump"    # SessionTime recule ou avance plus vite que l'horloge (replay)
+
+# Taille de l'anneau d'échantillons (estimation de la vitesse de progression en tour/s)
+RING_SIZE = 8
+
+# Écart toléré entre la progression observée et la progression attendue sur une frame (fraction de tour)
+JUMP_PCT = 0.02
+
+# Avance de SessionTime au-delà de l'horloge murale considérée comme un saut (s)
+TIME_JUMP_SECONDS = 2.0
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Détecteur de discontinuités : position déroulée (LapDistPct sans retour à 0 à la ligne) et SessionTime       #
+# comparés à la frame précédente et à la vitesse de progression estimée sur l'anneau.                          #
+#--------------------------------------------------------------------------------------------------------------#
+class DiscontinuityDetector:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Initialise un anneau vide.                                                                                   #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self, ring_size: int = RING_SIZE, jump_pct: float = JUMP_PCT,
+                 time_jump_seconds: float = TIME_JUMP_SECONDS):
+        self.ring_size = ring_size
+        self.jump_pct = jump_pct
+        self.time_jump_seconds = time_jump_seconds
+        self._ring_t = [0.0] * ring_size
+        self._ring_u = [0.0] * ring_size
+        self.reset()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Oublie l'historique (le prochain échantillon sert de référence).                                             #
+    #--------------------------------------------------------------------------------------------------------------#
+    def reset(self):
+        self._count = 0
+        self._head = 0
+        self._pct: Optional[float] = None
+        self._unwrapped = 0.0
+        self._session_time: Optional[float] = None
+        self._wall: Optional[float] = None
+        self._left_world = False
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Repart d'un échantillon donné (après une discontinuité ou au premier échantillon).                           #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _restart(self, pct: float, session_time: float):
+        self._count = 0
+        self._head = 0
+        self._pct = pct
+        self._unwrapped = pct
+        self._push(session_time, pct)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ajoute un échantillon (SessionTime, position déroulée) dans l'anneau.                                        #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _push(self, session_time: float, unwrapped: float):
+        self._ring_t[self._head] = session_time
+        self._ring_u[self._head] = unwrapped
+        self._head = (self._head + 1) % self.ring_size
+        if self._count < self.ring_size:
+            self._count += 1
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Analyse une frame ; retourne le type de discontinuité détectée (KIND_*) ou None.                             #
+    # `now` : horloge murale (s) ; les frames sans LapDistPct/SessionTime sont ignorées.                           #
+    #--------------------------------------------------------------------------------------------------------------#
+    def update(self, pct, session_time, surface: int, now: float) -> Optional[str]:
+        if session_time is None or pct is None:
+            return None
+        session_time = float(session_time)
+        pct = float(pct)
+
+        # Saut de temps (replay) : SessionTime recule, ou avance nettement plus vite que l'horloge
+        kind = None
+        if self._session_time is not None and self._wall is not None:
+            d_session = session_time - self._session_time
+            if d_session < -0.05 or d_session - (now - self._wall) > self.time_jump_seconds:
+                kind = KIND_TIME_JUMP
+        self._session_time = session_time
+        self._wall = now
+
+        # Hors du monde : LapDistPct n'a pas de sens (-1), on retient juste qu'on en est sorti
+        if surface == -1 or pct < 0:
+            self._left_world = self._pct is not None
+            return kind
+
+        if kind is not None or self._pct is None:
+            self._left_world = False
+            self._restart(pct, session_time)
+            return kind
+
+        # Progression depuis la frame précédente, corrigée du passage de ligne (0.99 → 0.01)
+        delta = pct - self._pct
+        if delta < -0.5:
+            delta += 1.0
+        elif delta > 0.5:
+            delta -= 1.0
+
+        # Progression attendue : vitesse moyenne (tour/s) sur l'anneau × durée de la frame
+        expected = 0.0
+        if self._count >= 2:
+            oldest = (self._head - self._count) % self.ring_size
+            newest = (self._head - 1) % self.ring_size
+            span = self._ring_t[newest] - self._ring_t[oldest]
+            if span > 0:
+                rate = (self._ring_u[newest] - self._ring_u[oldest]) / span
+                expected = rate * max(0.0, session_time - self._ring_t[newest])
+
+        if abs(delta - expected) > self.jump_pct:
+            if self._left_world:
+                kind = KIND_TOW
+            elif surface in (1, 2):
+                kind = KIND_RESET
+            else:
+                kind = KIND_TELEPORT
+            self._left_world = False
+            self._restart(pct, session_time)
+            return kind
+
+        self._left_world = False
+        self._pct = pct
+        self._unwrapped += delta
+        self._push(session_time, self._unwrapped)
+        return None
@@ -0,0 +1,158 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/field_lap_detector.py                                                              #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Détecte les tours terminés de toutes les voitures (tableaux CarIdx) avec NumPy.                #
+################################################################################################################
+
+import time
+from typing import Optional
+
+import numpy as np
+
+
+# Nombre d'emplacements des tableaux CarIdx* exposés par iRSDK
+CAR_SLOTS = 64
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Détecte les fins de tour de tout le plateau (IA et humains) en une passe vectorisée sur les 64 slots et les  #
+# reporte dans le tableau des tours de la session ; seules les voitures qui viennent de finir un tour donnent  #
+# lieu à un événement.                                                                                         #
+# Même logique que LapDetector : armement sur CarIdxLapCompleted, confirmation sur CarIdxLastLapTime.          #
+#--------------------------------------------------------------------------------------------------------------#
+class FieldLapDetector:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Alloue les tableaux d'état (un élément par slot) et les tampons d'entrée réutilisés à chaque frame.          #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self, pending_max_wait: float = 1.5, slots: int = CAR_SLOTS):
+        self.slots = int(slots)
+        self.pending_max_wait = pending_max_wait
+
+        # Tampons d'entrée (évite une allocation par variable et par frame)
+        self._in_lap_completed = np.empty(self.slots, dtype=np.int32)
+        self._in_lap_time = np.empty(self.slots, dtype=np.float64)
+        self._in_surface = np.empty(self.slots, dtype=np.int8)
+        self._in_on_pit_road = np.empty(self.slots, dtype=np.bool_)
+
+        self.reset()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Réinitialise l'état de tous les slots (changement de session).                                               #
+    #--------------------------------------------------------------------------------------------------------------#
+    def reset(self):
+        n = self.slots
+
+        # Détection (-1 = slot jamais vu)
+        self.last_completed = np.full(n, -1, dtype=np.int32)
+        self._pending = np.zeros(n, dtype=np.bool_)
+        self._pending_since = np.zeros(n, dtype=np.float64)
+        self._pending_lap = np.zeros(n, dtype=np.int32)
+        self._prev_lap_time = np.zeros(n, dtype=np.float64)
+        self._seen_lap_time = np.zeros(n, dtype=np.float64)   # CarIdxLastLapTime de la frame précédente
+
+        # Passage par les stands pendant le tour en cours / le tour en attente
+        self._in_pits_this_lap = np.zeros(n, dtype=np.bool_)
+        self._pending_out_lap = np.zeros(n, dtype=np.bool_)
+
+        # Tableau des tours de la session (alimenté par les mêmes masques, sans coût par voiture)
+        self.lap_count = np.zeros(n, dtype=np.int32)
+        self.last_lap_time = np.zeros(n, dtype=np.float64)
+        self.best_lap_time = np.full(n, np.inf, dtype=np.float64)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Copie une variable CarIdx* (liste iRSDK ou None) dans son tampon, complétée par la valeur par défaut.        #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _load(self, buf: np.ndarray, values, fill) -> np.ndarray:
+        buf.fill(fill)
+        if values is not None:
+            try:
+                arr = np.asarray(values, dtype=buf.dtype)[:self.slots]
+                buf[:arr.size] = arr
+            except (TypeError, ValueError):
+                pass
+        return buf
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Traite une frame CarIdx* ; retourne la liste des tours terminés (dicts) confirmés ou expirés sur cette frame #
+    # (vide : le tableau des tours n'a pas changé).                                                                #
+    #--------------------------------------------------------------------------------------------------------------#
+    def detect(self, state: dict, now: Optional[float] = None) -> list[dict]:
+        if now is None:
+            now = time.time()
+
+        lap_completed = self._load(self._in_lap_completed, state.get("CarIdxLapCompleted"), -1)
+        lap_time = self._load(self._in_lap_time, state.get("CarIdxLastLapTime"), 0.0)
+        surface = self._load(self._in_surface, state.get("CarIdxTrackSurface"), -1)
+        on_pit_road = self._load(self._in_on_pit_road, state.get("CarIdxOnPitRoad"), False)
+
+        # Passage par les stands (pit stall / approche / pit road)
+        self._in_pits_this_lap |= on_pit_road | (surface == 1) | (surface == 2)
+
+        # Session relancée ou slot réattribué (le compteur recule) : oublier l'état de ces slots
+        rewound = lap_completed < self.last_completed
+        if rewound.any():
+            self._pending[rewound] = False
+            self._in_pits_this_lap[rewound] = False
+            self.last_completed[rewound] = lap_completed[rewound]
+
+        # 1) Nouveau tour terminé : armer l'attente de la MAJ de CarIdxLastLapTime, par rapport au temps de la frame
+        #    précédente (un temps posé sur la frame de la ligne compte déjà comme nouveau)
+        first_seen = (self.last_completed < 0) & (lap_completed >= 0)
+        new_lap = (lap_completed > self.last_completed) & ~first_seen & ~self._pending
+        if new_lap.any():
+            self._pending |= new_lap
+            self._pending_since[new_lap] = now
+            self._pending_lap[new_lap] = lap_completed[new_lap]
+            self._prev_lap_time[new_lap] = self._seen_lap_time[new_lap]
+            self._pending_out_lap[new_lap] = self._in_pits_this_lap[new_lap]
+            self._in_pits_this_lap[new_lap] = on_pit_road[new_lap]
+        advance = first_seen | new_lap
+        self.last_completed[advance] = lap_completed[advance]
+        np.copyto(self._seen_lap_time, lap_time)
+
+        # 2) Tours en attente : MAJ du temps reçue, ou timeout
+        waiting = self._pending & ~new_lap
+        confirmed = waiting & (lap_time != self._prev_lap_time)
+        timed_out = waiting & ~confirmed & ((now - self._pending_since) >= self.pending_max_wait)
+        done = confirmed | timed_out
+        if not done.any():
+            return []
+        self._pending &= ~done
+
+        # Tableau de session : seuls les temps confirmés et positifs comptent
+        timed = confirmed & (lap_time > 0)
+        self.lap_count += done
+        self.last_lap_time[timed] = lap_time[timed]
+        clean = timed & ~self._pending_out_lap
+        np.minimum(self.best_lap_time, np.where(clean, lap_time, np.inf), out=self.best_lap_time)
+
+        # Événements : boucle Python uniquement sur les voitures qui viennent de finir un tour
+        events = []
+        for idx in np.flatnonzero(done):
+            events.append({
+                "car_idx": int(idx),
+                "lap_number": int(self._pending_lap[idx]),
+                "lap_time": float(lap_time[idx]),
+                "prev_lap_time": float(self._prev_lap_time[idx]),
+                "timed_out": bool(timed_out[idx]),
+                "out_lap": bool(self._pending_out_lap[idx]),
+            })
+        return events
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Retourne le tableau des tours de la session (une ligne par voiture ayant bouclé au moins un tour).           #
+    #--------------------------------------------------------------------------------------------------------------#
+    def lap_table(self) -> list[dict]:
+        rows = []
+        for idx in np.flatnonzero(self.lap_count > 0):
+            best = float(self.best_lap_time[idx])
+            rows.append({
+                "car_idx": int(idx),
+                "laps": int(self.lap_count[idx]),
+                "last": float(self.last_lap_time[idx]),
+                "best": best if np.isfinite(best) else None,
+            })
+        return rows
@@ -0,0 +1,90 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/incident_heat.py                                                                   #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Index des zones d'incidents par circuit (points cumulés par tranche de LapDistPct),            #
+#               alimenté par la chronologie d'incidents de chaque tour.                                        #
+################################################################################################################
+
+from typing import Optional
+
+from iracing_tracker.data_store import DataStore
+
+
+# Nombre de tranches de LapDistPct par circuit (1 % du tour chacune)
+HEAT_BINS = 100
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Index des zones d'incidents : un histogramme de HEAT_BINS tranches par circuit, gardé en mémoire.            #
+#--------------------------------------------------------------------------------------------------------------#
+class IncidentHeatIndex:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Charge l'index depuis le disque.                                                                             #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self):
+        self._heat: dict[str, list[int]] = {}
+        self.reload()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Recharge l'index depuis le disque (les circuits au nombre de tranches différent sont ignorés).               #
+    #--------------------------------------------------------------------------------------------------------------#
+    def reload(self):
+        self._heat = {k: v for k, v in DataStore.load_incident_heat().items() if len(v) == HEAT_BINS}
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ajoute la chronologie d'incidents d'un tour ([pct, session_time, surface, +x] ...) ; sauvegarde et retourne  #
+    # True si l'index a changé.                                                                                    #
+    #--------------------------------------------------------------------------------------------------------------#
+    def add_events(self, track_id: Optional[int], events: list) -> bool:
+        if track_id is None or not events:
+            return False
+        bins = None
+        for event in events:
+            pct, count = event[0], event[3]
+            if pct is None or count <= 0:
+                continue
+            if bins is None:
+                bins = self._heat.setdefault(str(track_id), [0] * HEAT_BINS)
+            bins[min(int(float(pct) % 1.0 * HEAT_BINS), HEAT_BINS - 1)] += int(count)
+        if bins is None:
+            return False
+        DataStore.save_incident_heat(self._heat)
+        return True
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Points d'incidents par tranche de LapDistPct pour un circuit (copie ; zéros si aucun incident connu).        #
+    #--------------------------------------------------------------------------------------------------------------#
+    def heat(self, track_id: Optional[int]) -> list[int]:
+        return list(self._heat.get(str(track_id)) or [0] * HEAT_BINS)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Zones les plus chargées d'un circuit : [{"start", "end", "points", "share"}], points décroissants.           #
+    #--------------------------------------------------------------------------------------------------------------#
+    def hotspots(self, track_id: Optional[int], limit: int = 3) -> list[dict]:
+        bins = self._heat.get(str(track_id))
+        if not bins:
+            return []
+        total = sum(bins)
+        if total <= 0:
+            return []
+        ranked = sorted((i for i, n in enumerate(bins) if n > 0), key=lambda i: (-bins[i], i))[:limit]
+        return [{
+            "start": i / HEAT_BINS,
+            "end": (i + 1) / HEAT_BINS,
+            "points": bins[i],
+            "share": bins[i] / total,
+        } for i in ranked]
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Met en forme les positions d'une chronologie d'incidents pour les logs (« 2x à 34 %, 4x à 78 % »).           #
+#--------------------------------------------------------------------------------------------------------------#
+def format_incident_events(events: list) -> str:
+    parts = []
+    for event in events or []:
+        pct, count = event[0], event[3]
+        parts.append(f"{count}x à {pct * 100:.0f} %" if pct is not None else f"{count}x")
+    return ", ".join(parts)
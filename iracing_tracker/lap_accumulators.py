@@ -0,0 +1,373 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/lap_accumulators.py                                                                #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Accumulateurs par tour (mémoire constante) mis à jour à chaque frame et remis à zéro à la      #
+#               ligne par le LapDetector : vitesse, temps hors piste, incidents, temps aux stands, drapeaux,   #
+#               temps hors du monde, discontinuités.                                                           #
+################################################################################################################
+
+import copy
+from typing import Optional
+
+from iracing_tracker.discontinuity_detector import DiscontinuityDetector
+
+
+# Écart maximal pris en compte entre deux frames (s) : une pause ou un gel de télémétrie ne gonfle pas les durées
+MAX_FRAME_DT = 0.5
+
+# Nombre maximal d'incréments d'incidents gardés dans la chronologie d'un tour
+MAX_INCIDENT_EVENTS = 32
+
+# Colonnes d'un événement de la chronologie des incidents
+INCIDENT_EVENT_FIELDS = ("pct", "session_time", "surface", "count")
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Accumulateur de base : `update` reçoit la frame et la durée écoulée, `result` retourne un dict sérialisable. #
+#--------------------------------------------------------------------------------------------------------------#
+class LapAccumulator:
+
+    # Clé du résultat dans les statistiques du tour
+    name = ""
+
+    # Variables iRSDK lues par l'accumulateur
+    vars: tuple = ()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Initialise l'accumulateur à vide.                                                                            #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self):
+        self.reset()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Repart de zéro (début de tour).                                                                              #
+    #--------------------------------------------------------------------------------------------------------------#
+    def reset(self):
+        pass
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Intègre une frame ; `dt` est la durée (s) écoulée depuis la frame précédente (bornée), `now` l'horodatage.   #
+    #--------------------------------------------------------------------------------------------------------------#
+    def update(self, state: dict, dt: float, now: float):
+        pass
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Résultat du tour en cours (dict sérialisable en JSON).                                                       #
+    #--------------------------------------------------------------------------------------------------------------#
+    def result(self) -> dict:
+        return {}
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # État interne sérialisable (copie des attributs), pour reprendre le tour en cours ailleurs (rejeu).           #
+    #--------------------------------------------------------------------------------------------------------------#
+    def snapshot(self) -> dict:
+        return copy.deepcopy(vars(self))
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Reprend un état produit par `snapshot` (attributs inconnus ignorés).                                         #
+    #--------------------------------------------------------------------------------------------------------------#
+    def restore(self, data: dict):
+        for key, value in data.items():
+            if key in vars(self):
+                setattr(self, key, copy.deepcopy(value))
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Vitesse (m/s) : min, max et moyenne pondérée par le temps.                                                   #
+#--------------------------------------------------------------------------------------------------------------#
+class SpeedAccumulator(LapAccumulator):
+
+    name = "speed"
+    vars = ("Speed",)
+
+    def reset(self):
+        self.min = None
+        self.max = None
+        self._weighted = 0.0
+        self._duration = 0.0
+
+    def update(self, state: dict, dt: float, now: float):
+        speed = state.get("Speed")
+        if speed is None:
+            return
+        speed = float(speed)
+        if self.min is None or speed < self.min:
+            self.min = speed
+        if self.max is None or speed > self.max:
+            self.max = speed
+        self._weighted += speed * dt
+        self._duration += dt
+
+    def result(self) -> dict:
+        if self.min is None:
+            return {}
+        avg = self._weighted / self._duration if self._duration > 0 else self.min
+        return {"min": round(self.min, 2), "max": round(self.max, 2), "avg": round(avg, 2)}
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Temps passé hors piste (PlayerTrackSurface == 0) et nombre de sorties.                                       #
+#--------------------------------------------------------------------------------------------------------------#
+class OffTrackAccumulator(LapAccumulator):
+
+    name = "off_track"
+    vars = ("PlayerTrackSurface",)
+
+    def reset(self):
+        self.time = 0.0
+        self.count = 0
+        self._off = False
+
+    def update(self, state: dict, dt: float, now: float):
+        off = int(state.get("PlayerTrackSurface", 3) or 0) == 0
+        if off:
+            self.time += dt
+            if not self._off:
+                self.count += 1
+        self._off = off
+
+    def result(self) -> dict:
+        return {"time": round(self.time, 3), "count": self.count}
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Incidents du tour : total, position (LapDistPct) du premier et du dernier incrément, et chronologie compacte #
+# [LapDistPct, SessionTime, surface, +x] de chaque incrément (bornée à MAX_INCIDENT_EVENTS). Le compteur       #
+# précédent survit au reset : seuls les incréments survenus depuis la frame précédente sont comptés.           #
+#--------------------------------------------------------------------------------------------------------------#
+class IncidentAccumulator(LapAccumulator):
+
+    name = "incidents"
+    vars = ("PlayerCarMyIncidentCount", "LapDistPct", "SessionTime", "PlayerTrackSurface")
+
+    def __init__(self):
+        self._last_count: Optional[int] = None
+        super().__init__()
+
+    def reset(self):
+        self.delta = 0
+        self.first_pct = None
+        self.last_pct = None
+        self.events: list[list] = []
+
+    def update(self, state: dict, dt: float, now: float):
+        count = state.get("PlayerCarMyIncidentCount")
+        if count is None:
+            return
+        count = int(count)
+        if self._last_count is not None and count > self._last_count:
+            pct = state.get("LapDistPct")
+            pct = round(float(pct), 4) if pct is not None else None
+            step = count - self._last_count
+            self.delta += step
+            if self.first_pct is None:
+                self.first_pct = pct
+            self.last_pct = pct
+            if len(self.events) < MAX_INCIDENT_EVENTS:
+                session_time = state.get("SessionTime")
+                self.events.append([
+                    pct,
+                    round(float(session_time), 3) if session_time is not None else None,
+                    int(state.get("PlayerTrackSurface", 3) or 0),
+                    step,
+                ])
+        self._last_count = count
+
+    def result(self) -> dict:
+        return {"delta": self.delta, "first_pct": self.first_pct, "last_pct": self.last_pct,
+                "events": list(self.events)}
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Temps passé dans la voie des stands (OnPitRoad, ou surface stand / approche à défaut).                       #
+#--------------------------------------------------------------------------------------------------------------#
+class PitLaneAccumulator(LapAccumulator):
+
+    name = "pit_lane"
+    vars = ("OnPitRoad", "PlayerTrackSurface")
+
+    def reset(self):
+        self.time = 0.0
+
+    def update(self, state: dict, dt: float, now: float):
+        on_pit_road = state.get("OnPitRoad")
+        if on_pit_road is None:
+            on_pit_road = int(state.get("PlayerTrackSurface", 3) or 0) in (1, 2)
+        if on_pit_road:
+            self.time += dt
+
+    def result(self) -> dict:
+        return {"time": round(self.time, 3)}
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Drapeaux de session vus pendant le tour (OU binaire de SessionFlags : drapeau noir, disqualification…).      #
+#--------------------------------------------------------------------------------------------------------------#
+class FlagsAccumulator(LapAccumulator):
+
+    name = "flags"
+    vars = ("SessionFlags",)
+
+    def reset(self):
+        self.mask = 0
+
+    def update(self, state: dict, dt: float, now: float):
+        flags = state.get("SessionFlags")
+        if flags is not None:
+            self.mask |= int(flags)
+
+    def result(self) -> dict:
+        return {"mask": self.mask}
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Temps passé hors du monde (PlayerTrackSurface == -1 : remorquage, reset vers les stands) et occurrences.     #
+#--------------------------------------------------------------------------------------------------------------#
+class NotInWorldAccumulator(LapAccumulator):
+
+    name = "not_in_world"
+    vars = ("PlayerTrackSurface",)
+
+    def reset(self):
+        self.time = 0.0
+        self.count = 0
+        self._out = False
+
+    def update(self, state: dict, dt: float, now: float):
+        out = int(state.get("PlayerTrackSurface", 3) or 0) == -1
+        if out:
+            self.time += dt
+            if not self._out:
+                self.count += 1
+        self._out = out
+
+    def result(self) -> dict:
+        return {"time": round(self.time, 3), "count": self.count}
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Discontinuités de LapDistPct / SessionTime du tour (remorquage, reset, téléportation, saut de replay).       #
+# `frame_kind` expose celle de la dernière frame ; une discontinuité détectée sur la frame d'un reset est      #
+# reportée sur le tour qui commence (le saut a eu lieu à cet instant).                                         #
+#--------------------------------------------------------------------------------------------------------------#
+class DiscontinuityAccumulator(LapAccumulator):
+
+    name = "discontinuities"
+    vars = ("LapDistPct", "SessionTime", "PlayerTrackSurface")
+
+    def __init__(self):
+        self.detector = DiscontinuityDetector()
+        self.frame_kind: Optional[str] = None
+        super().__init__()
+
+    def reset(self):
+        self.kinds: list[str] = [self.frame_kind] if self.frame_kind else []
+
+    def update(self, state: dict, dt: float, now: float):
+        self.frame_kind = self.detector.update(
+            state.get("LapDistPct"),
+            state.get("SessionTime"),
+            int(state.get("PlayerTrackSurface", 3) or 0),
+            now,
+        )
+        if self.frame_kind and len(self.kinds) < MAX_INCIDENT_EVENTS:
+            self.kinds.append(self.frame_kind)
+
+    def result(self) -> dict:
+        return {"count": len(self.kinds), "kinds": list(self.kinds)}
+
+    def snapshot(self) -> dict:
+        data = copy.deepcopy({k: v for k, v in vars(self).items() if k != "detector"})
+        data["detector"] = copy.deepcopy(vars(self.detector))
+        return data
+
+    def restore(self, data: dict):
+        data = dict(data)
+        detector = data.pop("detector", None)
+        super().restore(data)
+        if isinstance(detector, dict):
+            for key, value in detector.items():
+                if key in vars(self.detector):
+                    setattr(self.detector, key, copy.deepcopy(value))
+
+
+DEFAULT_ACCUMULATORS = (SpeedAccumulator, OffTrackAccumulator, IncidentAccumulator, PitLaneAccumulator,
+                        FlagsAccumulator, NotInWorldAccumulator, DiscontinuityAccumulator)
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Ensemble d'accumulateurs d'un tour : un seul appel par frame, un instantané des résultats à chaque ligne.    #
+#--------------------------------------------------------------------------------------------------------------#
+class LapAccumulators:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Instancie les accumulateurs demandés (classes de LapAccumulator, défaut : DEFAULT_ACCUMULATORS).             #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self, classes=DEFAULT_ACCUMULATORS):
+        self.accumulators = [cls() for cls in classes]
+        self._last_ts: Optional[float] = None
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Variables iRSDK nécessaires à l'ensemble des accumulateurs (ordre stable, sans doublon).                     #
+    #--------------------------------------------------------------------------------------------------------------#
+    @property
+    def vars(self) -> list[str]:
+        names = []
+        for acc in self.accumulators:
+            for v in acc.vars:
+                if v not in names:
+                    names.append(v)
+        return names
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Retourne l'accumulateur portant ce nom (None s'il n'est pas dans l'ensemble).                                #
+    #--------------------------------------------------------------------------------------------------------------#
+    def get(self, name: str) -> Optional[LapAccumulator]:
+        for acc in self.accumulators:
+            if acc.name == name:
+                return acc
+        return None
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Met à jour chaque accumulateur avec la frame (durée depuis la frame précédente, bornée à MAX_FRAME_DT).      #
+    #--------------------------------------------------------------------------------------------------------------#
+    def update(self, state: dict, now: float):
+        dt = 0.0
+        if self._last_ts is not None and now > self._last_ts:
+            dt = min(now - self._last_ts, MAX_FRAME_DT)
+        self._last_ts = now
+        for acc in self.accumulators:
+            acc.update(state, dt, now)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Retourne les résultats du tour écoulé ({nom: dict}) et repart de zéro pour le suivant.                       #
+    #--------------------------------------------------------------------------------------------------------------#
+    def roll(self) -> dict:
+        results = {acc.name: acc.result() for acc in self.accumulators}
+        self.reset()
+        return results
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # État de l'ensemble ({"last_ts", "accumulators": {nom: état}}), sérialisable en JSON.                         #
+    #--------------------------------------------------------------------------------------------------------------#
+    def snapshot(self) -> dict:
+        return {"last_ts": self._last_ts, "accumulators": {acc.name: acc.snapshot() for acc in self.accumulators}}
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Reprend un état produit par `snapshot` (accumulateurs absents de l'état laissés tels quels).                 #
+    #--------------------------------------------------------------------------------------------------------------#
+    def restore(self, data: dict):
+        self._last_ts = data.get("last_ts")
+        states = data.get("accumulators") or {}
+        for acc in self.accumulators:
+            if isinstance(states.get(acc.name), dict):
+                acc.restore(states[acc.name])
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Remet les accumulateurs à zéro (ligne franchie, retour au garage, session relancée).                         #
+    #--------------------------------------------------------------------------------------------------------------#
+    def reset(self):
+        for acc in self.accumulators:
+            acc.reset()
@@ -0,0 +1,288 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/lap_history.py                                                                     #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Historique de tous les tours (valides et invalides) en colonnes : un tableau typé par champ,   #
+#               découpé en blocs sur disque ; les statistiques globales sont des parcours vectorisés (NumPy).  #
+################################################################################################################
+
+import os
+import array
+import tempfile
+from typing import Optional
+
+import numpy as np
+
+from iracing_tracker.data_store import LAP_HISTORY_DIR, _atomic_write_json, _safe_load_json
+from iracing_tracker.record_manager import format_lap_time
+
+
+# Nombre de tours par bloc : un bloc plein est figé en colonnes (.npz), le bloc courant est en ajout seul (.bin)
+CHUNK_ROWS = 65536
+
+# Nombre maximal de tours écrits en une fois par un ajout groupé (`extend`)
+EXTEND_BATCH = 4096
+
+# Colonnes de l'historique (nom, type NumPy, type array.array) : 44 octets par tour
+COLUMNS = (
+    ("ts", "<f8", "d"),          # Horodatage de fin du tour (epoch, s)
+    ("session", "<i8", "q"),     # Début de la session (epoch, s) : identifie la session
+    ("track", "<i4", "i"),       # TrackID
+    ("car", "<i4", "i"),         # CarID
+    ("player", "<i4", "i"),      # Index dans la table des joueurs
+    ("lap", "<i4", "i"),         # LapCompleted à la fin du tour
+    ("time", "<f8", "d"),        # Temps officiel (s ; -1 si non posé)
+    ("valid", "<i1", "b"),       # 1 = valide, 0 = invalide
+    ("reason", "<i1", "b"),      # Index dans la table des raisons (-1 = aucune)
+    ("incidents", "<i2", "h"),   # Incidents du tour
+)
+
+# Une ligne du bloc courant sur disque (champs dans l'ordre de COLUMNS, sans alignement)
+ROW_DTYPE = np.dtype([(name, dtype) for name, dtype, _ in COLUMNS])
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Historique en colonnes : blocs figés (tableaux NumPy) + bloc courant (array.array, ajout en O(1)), avec les  #
+# tables de joueurs et de raisons d'invalidité (catalog.json). Chaque tour est ajouté au fichier du bloc       #
+# courant (une écriture O_APPEND) ; un bloc plein est réécrit en colonnes, une seule fois.                     #
+#--------------------------------------------------------------------------------------------------------------#
+class LapHistory:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Charge l'historique du dossier `directory` (blocs figés, bloc courant et tables).                            #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self, directory: str = LAP_HISTORY_DIR, chunk_rows: int = CHUNK_ROWS):
+        self.directory = directory
+        self.chunk_rows = int(chunk_rows)
+        self._catalog_path = os.path.join(directory, "catalog.json")
+        self._sealed: list[dict] = []
+        self._active: dict[str, array.array] = {}
+        self._cache: Optional[dict] = None
+        self._summaries: dict = {}
+        self.players: list[str] = []
+        self.reasons: list[str] = []
+        self._player_ids: dict[str, int] = {}
+        self._reason_ids: dict[str, int] = {}
+        self._catalog_dirty = False
+        self._load()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Chemins d'un bloc : colonnes figées (.npz) et lignes en ajout seul (.bin).                                   #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _chunk_path(self, index: int, ext: str) -> str:
+        return os.path.join(self.directory, f"chunk_{index:05d}.{ext}")
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Lit les tables, les blocs figés dans l'ordre, puis le bloc courant (une ligne tronquée par un arrêt brutal   #
+    # est coupée). Un bloc à la fois figé et en lignes (arrêt pendant le figement) est lu depuis sa forme figée.   #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _load(self):
+        catalog = _safe_load_json(self._catalog_path, default={})
+        if not isinstance(catalog, dict):
+            catalog = {}
+        self.players = [str(p) for p in catalog.get("players") or []]
+        self.reasons = [str(r) for r in catalog.get("reasons") or []]
+        self._player_ids = {p: i for i, p in enumerate(self.players)}
+        self._reason_ids = {r: i for i, r in enumerate(self.reasons)}
+
+        index = 0
+        while os.path.exists(self._chunk_path(index, "npz")):
+            with np.load(self._chunk_path(index, "npz")) as data:
+                self._sealed.append({name: data[name] for name, _, _ in COLUMNS})
+            stale = self._chunk_path(index, "bin")
+            if os.path.exists(stale):
+                os.remove(stale)
+            index += 1
+
+        self._active = {name: array.array(code) for name, _, code in COLUMNS}
+        path = self._chunk_path(index, "bin")
+        if os.path.exists(path):
+            size = os.path.getsize(path)
+            whole = size - size % ROW_DTYPE.itemsize
+            if whole != size:
+                os.truncate(path, whole)
+            rows = np.fromfile(path, dtype=ROW_DTYPE)
+            for name, _, _ in COLUMNS:
+                self._active[name].frombytes(np.ascontiguousarray(rows[name]).tobytes())
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Nombre de tours de l'historique.                                                                             #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __len__(self) -> int:
+        return sum(len(chunk["ts"]) for chunk in self._sealed) + len(self._active["ts"])
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Index d'un nom dans une table (ajouté s'il est nouveau ; tables réécrites avant les tours qui l'utilisent).  #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _intern(self, table: list, ids: dict, name: str) -> int:
+        index = ids.get(name)
+        if index is None:
+            index = ids[name] = len(table)
+            table.append(name)
+            self._catalog_dirty = True
+        return index
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ajoute un tour terminé (valide ou non, raison = code de LapReason) à l'historique et au disque.              #
+    #--------------------------------------------------------------------------------------------------------------#
+    def append(self, ts: float, session: int, track_id: int, car_id: int, player: str, lap: int,
+               lap_time: Optional[float], valid: bool, reason: Optional[str] = None, incidents: int = 0):
+        self._write_rows([self._row(ts, session, track_id, car_id, player, lap, lap_time, valid, reason, incidents)])
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ajoute des tours en masse (tuples dans l'ordre des arguments de `append`) : une écriture par lot de          #
+    # EXTEND_BATCH tours au plus, sans dépasser la fin du bloc courant. Retourne le nombre de tours ajoutés.       #
+    #--------------------------------------------------------------------------------------------------------------#
+    def extend(self, laps) -> int:
+        rows = []
+        added = 0
+        for lap in laps:
+            rows.append(self._row(*lap))
+            if len(rows) >= EXTEND_BATCH or len(self._active["ts"]) + len(rows) >= self.chunk_rows:
+                self._write_rows(rows)
+                added += len(rows)
+                rows = []
+        if rows:
+            self._write_rows(rows)
+            added += len(rows)
+        return added
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ligne d'un tour dans l'ordre de COLUMNS (noms internés dans les tables).                                     #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _row(self, ts: float, session: int, track_id: int, car_id: int, player: str, lap: int,
+             lap_time: Optional[float], valid: bool, reason: Optional[str] = None, incidents: int = 0) -> tuple:
+        return (
+            float(ts),
+            int(session),
+            int(track_id),
+            int(car_id),
+            self._intern(self.players, self._player_ids, str(player)),
+            int(lap),
+            float(lap_time) if lap_time and lap_time > 0 else -1.0,
+            1 if valid else 0,
+            self._intern(self.reasons, self._reason_ids, str(reason)) if reason else -1,
+            max(-32768, min(32767, int(incidents or 0))),
+        )
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Écrit des lignes à la suite du bloc courant (une écriture O_APPEND), après les tables si elles ont changé ;  #
+    # le bloc est figé s'il est plein. Les lignes ne doivent pas dépasser la fin du bloc.                          #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _write_rows(self, rows: list):
+        os.makedirs(self.directory, exist_ok=True)
+        if self._catalog_dirty:
+            _atomic_write_json(self._catalog_path, {"players": self.players, "reasons": self.reasons})
+            self._catalog_dirty = False
+        index = len(self._sealed)
+        path = self._chunk_path(index, "bin")
+        # Écriture non synchronisée (pas de fsync) : l'historique tolère la perte du dernier tour sur coupure
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        try:
+            os.write(fd, np.array(rows, dtype=ROW_DTYPE).tobytes())
+        finally:
+            os.close(fd)
+
+        for (name, _, _), values in zip(COLUMNS, zip(*rows)):
+            self._active[name].extend(values)
+        self._cache = None
+        self._summaries.clear()
+        if len(self._active["ts"]) >= self.chunk_rows:
+            self._seal(index)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Fige le bloc courant : colonnes écrites dans un .npz (temporaire + os.replace), puis .bin supprimé.          #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _seal(self, index: int):
+        columns = {name: np.frombuffer(self._active[name], dtype=dtype).copy() for name, dtype, _ in COLUMNS}
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=f"chunk_{index:05d}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **columns)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self._chunk_path(index, "npz"))
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        os.remove(self._chunk_path(index, "bin"))
+        self._sealed.append(columns)
+        self._active = {name: array.array(code) for name, _, code in COLUMNS}
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Parcourt les tours bloc par bloc, du plus ancien au plus récent : (ts, session, track_id, car_id, joueur,    #
+    # tour, temps ou None, valide, raison ou None, incidents), dans l'ordre des arguments de `append`.             #
+    #--------------------------------------------------------------------------------------------------------------#
+    def iter_rows(self):
+        active = {name: np.frombuffer(self._active[name], dtype=dtype) for name, dtype, _ in COLUMNS}
+        for chunk in self._sealed + [active]:
+            cols = [chunk[name].tolist() for name, _, _ in COLUMNS]
+            for ts, session, track, car, player, lap, lap_time, valid, reason, incidents in zip(*cols):
+                yield (ts, session, track, car, self.players[player], lap, lap_time if lap_time > 0 else None,
+                       bool(valid), self.reasons[reason] if reason >= 0 else None, incidents)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Toutes les colonnes ({nom: tableau NumPy}), blocs concaténés (mis en cache jusqu'au prochain ajout).         #
+    #--------------------------------------------------------------------------------------------------------------#
+    def columns(self) -> dict:
+        if self._cache is None:
+            self._cache = {
+                name: np.concatenate([chunk[name] for chunk in self._sealed]
+                                     + [np.frombuffer(self._active[name], dtype=dtype)])
+                for name, dtype, _ in COLUMNS
+            }
+        return self._cache
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Statistiques globales, filtrées par circuit / voiture / joueur (None = tous) : nombre de tours, tours        #
+    # valides, moyenne / écart-type / meilleur des temps valides, sessions, tours invalides par raison.            #
+    #--------------------------------------------------------------------------------------------------------------#
+    def summary(self, track_id: Optional[int] = None, car_id: Optional[int] = None,
+                player: Optional[str] = None) -> dict:
+        key = (track_id, car_id, player)
+        cached = self._summaries.get(key)
+        if cached is not None:
+            return cached
+
+        cols = self.columns()
+        mask = np.ones(len(cols["ts"]), dtype=bool)
+        if track_id is not None:
+            mask &= cols["track"] == int(track_id)
+        if car_id is not None:
+            mask &= cols["car"] == int(car_id)
+        if player is not None:
+            pid = self._player_ids.get(str(player))
+            mask &= cols["player"] == (pid if pid is not None else -1)
+
+        valid = mask & (cols["valid"] == 1) & (cols["time"] > 0)
+        times = cols["time"][valid]
+        reasons = np.bincount(cols["reason"][mask & (cols["valid"] == 0) & (cols["reason"] >= 0)],
+                              minlength=len(self.reasons))
+        summary = {
+            "laps": int(mask.sum()),
+            "valid": int(times.size),
+            "mean": float(times.mean()) if times.size else None,
+            "stdev": float(times.std(ddof=1)) if times.size > 1 else 0.0,
+            "best": float(times.min()) if times.size else None,
+            "sessions": int(np.unique(cols["session"][mask]).size),
+            "reasons": {self.reasons[i]: int(n) for i, n in enumerate(reasons) if n},
+        }
+        self._summaries[key] = summary
+        return summary
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Met en forme des statistiques globales pour la zone debug.                                                   #
+#--------------------------------------------------------------------------------------------------------------#
+def format_history_summary(summary: dict) -> str:
+    if not summary["laps"]:
+        return "aucun tour"
+    text = f"{summary['laps']} tours, {summary['valid']} valides, {summary['sessions']} sessions"
+    if summary["mean"] is not None:
+        text += (f"  moy {format_lap_time(summary['mean'])} (σ {summary['stdev']:.2f})"
+                 f"  meilleur {format_lap_time(summary['best'])}")
+    if summary["reasons"]:
+        text += "  invalides : " + ", ".join(f"{k} {n}" for k, n in sorted(summary["reasons"].items()))
+    return text
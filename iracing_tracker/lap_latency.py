@@ -0,0 +1,102 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/lap_latency.py                                                                     #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Histogrammes de latence d'un tour (ligne franchie → validé → enregistré → affiché).            #
+################################################################################################################
+
+from bisect import bisect_left
+from typing import Optional
+
+
+# Bornes supérieures des buckets (ms) ; le dernier bucket est ouvert
+LATENCY_BUCKETS_MS = (5, 10, 20, 50, 100, 200, 500, 1000, 2000)
+
+# Étapes mesurées : (libellé, horodatage de départ, horodatage d'arrivée)
+LATENCY_STAGES = (
+    ("ligne→validé", "crossed", "validated"),
+    ("validé→enregistré", "validated", "persisted"),
+    ("validé→affiché", "validated", "displayed"),
+    ("total", "crossed", "displayed"),
+)
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Histogramme à buckets fixes (mémoire constante) : nombre, moyenne, max et quantiles approchés.               #
+#--------------------------------------------------------------------------------------------------------------#
+class LatencyHistogram:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Initialise les compteurs (un par bucket + un bucket ouvert).                                                 #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self, bounds_ms: tuple = LATENCY_BUCKETS_MS):
+        self.bounds_ms = bounds_ms
+        self.counts = [0] * (len(bounds_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ajoute une mesure (ms).                                                                                      #
+    #--------------------------------------------------------------------------------------------------------------#
+    def add(self, value_ms: float):
+        value_ms = max(0.0, float(value_ms))
+        self.counts[bisect_left(self.bounds_ms, value_ms)] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Borne supérieure du bucket contenant le quantile q (0..1) ; None si vide, inf si bucket ouvert.              #
+    #--------------------------------------------------------------------------------------------------------------#
+    def quantile_ms(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return float(self.bounds_ms[i]) if i < len(self.bounds_ms) else float("inf")
+        return float("inf")
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Résumé sur une ligne (nombre, moyenne, p50/p95 en borne de bucket, max).                                     #
+    #--------------------------------------------------------------------------------------------------------------#
+    def summary(self) -> str:
+        if not self.count:
+            return "---"
+
+        def _fmt(v):
+            return f"≤{v:.0f}ms" if v != float("inf") else f">{self.bounds_ms[-1]}ms"
+
+        return (f"n={self.count}  moy {self.total_ms / self.count:.0f}ms  p50 {_fmt(self.quantile_ms(0.5))}  "
+                f"p95 {_fmt(self.quantile_ms(0.95))}  max {self.max_ms:.0f}ms")
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Agrège les horodatages de chaque tour en un histogramme par étape.                                           #
+#--------------------------------------------------------------------------------------------------------------#
+class LapLatencyStats:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Crée un histogramme par étape mesurée.                                                                       #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self):
+        self.histograms = {label: LatencyHistogram() for label, _, _ in LATENCY_STAGES}
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ajoute les horodatages d'un tour (secondes epoch ; étapes absentes ignorées, ex. tour non enregistré).       #
+    #--------------------------------------------------------------------------------------------------------------#
+    def add(self, stamps: dict):
+        for label, start, end in LATENCY_STAGES:
+            t0, t1 = stamps.get(start), stamps.get(end)
+            if t0 is not None and t1 is not None:
+                self.histograms[label].add((t1 - t0) * 1000.0)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Texte multi-ligne pour la zone debug (une ligne par étape).                                                  #
+    #--------------------------------------------------------------------------------------------------------------#
+    def format(self) -> str:
+        return "\n" + "\n".join(f"{label} : {h.summary()}" for label, h in self.histograms.items())
@@ -0,0 +1,259 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/lap_projection.py                                                                  #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Temps au tour projeté, recalculé à chaque frame en O(1) : temps écoulé + reste du tour de      #
+#               référence (record personnel ou meilleur tour de la session) à partir du LapDistPct courant.    #
+################################################################################################################
+
+from typing import Optional
+
+from iracing_tracker.data_store import DataStore
+from iracing_tracker.record_manager import format_lap_time
+
+
+# Nombre de points de la courbe temps / LapDistPct d'un tour (0,5 % du tour chacun)
+PROJECTION_BINS = 200
+
+# Références possibles
+REFERENCE_PB = "pb"
+REFERENCE_SESSION = "session"
+
+# Saut de LapDistPct (fraction de tour) au-delà duquel la courbe du tour en cours est abandonnée
+MAX_PCT_STEP = 0.1
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Courbe de référence : temps écoulé au passage de chaque point (i / bins du tour) et temps officiel du tour.  #
+#--------------------------------------------------------------------------------------------------------------#
+class ReferenceLap:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Crée une référence à partir d'une courbe (liste de `bins` temps croissants, curve[0] = 0) et d'un temps.     #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self, curve: list, lap_time: float):
+        self.curve = [float(t) for t in curve]
+        self.lap_time = float(lap_time)
+        self.bins = len(self.curve)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Temps de référence au LapDistPct donné (interpolation linéaire entre deux points, O(1)).                     #
+    #--------------------------------------------------------------------------------------------------------------#
+    def time_at(self, pct: float) -> float:
+        x = pct * self.bins
+        i = int(x)
+        if i >= self.bins:
+            return self.lap_time
+        t0 = self.curve[i]
+        t1 = self.curve[i + 1] if i + 1 < self.bins else self.lap_time
+        return t0 + (t1 - t0) * (x - i)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Dict sérialisable ({"time", "curve"}), arrondi à la milliseconde.                                            #
+    #--------------------------------------------------------------------------------------------------------------#
+    def to_dict(self) -> dict:
+        return {"time": self.lap_time, "curve": [round(t, 3) for t in self.curve]}
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Reconstruit une référence depuis son dict (None si absent ou mal formé).                                     #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def from_dict(data) -> Optional["ReferenceLap"]:
+        if not isinstance(data, dict):
+            return None
+        curve, lap_time = data.get("curve"), data.get("time")
+        if not isinstance(curve, list) or len(curve) < 2 or not lap_time or lap_time <= 0:
+            return None
+        try:
+            return ReferenceLap(curve, lap_time)
+        except (TypeError, ValueError):
+            return None
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Courbes des records tenues en mémoire par combo : chaque combo est lu une fois (son propre petit fichier),   #
+# un changement de joueur ou un retour sur le combo ne relit rien ; un record ne réécrit que son combo.        #
+#--------------------------------------------------------------------------------------------------------------#
+class ReferenceLapStore:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Crée un cache vide.                                                                                          #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self):
+        self._combos: dict[str, dict] = {}
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Courbes d'un combo ({joueur: dict}), lues du disque au premier accès.                                        #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _combo(self, combo_key: str) -> dict:
+        refs = self._combos.get(combo_key)
+        if refs is None:
+            refs = self._combos[combo_key] = DataStore.load_reference_laps(combo_key)
+        return refs
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Courbe du record d'un joueur sur un combo, ou None.                                                          #
+    #--------------------------------------------------------------------------------------------------------------#
+    def get(self, track_id: int, car_id: int, player: str) -> Optional[ReferenceLap]:
+        return ReferenceLap.from_dict(self._combo(f"{track_id}|{car_id}").get(player))
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Enregistre la courbe d'un nouveau record (mémoire, puis fichier du combo).                                   #
+    #--------------------------------------------------------------------------------------------------------------#
+    def save(self, track_id: int, car_id: int, player: str, reference: ReferenceLap):
+        if not player or player == "---":
+            return
+        combo_key = f"{track_id}|{car_id}"
+        refs = self._combo(combo_key)
+        refs[player] = reference.to_dict()
+        DataStore.save_reference_laps(combo_key, refs)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Retire les courbes données [(combo « track|car », joueur exact)], en mémoire et sur disque.                  #
+    #--------------------------------------------------------------------------------------------------------------#
+    def delete(self, pairs: list):
+        for combo_key, player in pairs:
+            refs = self._combos.get(str(combo_key))
+            if refs is not None:
+                refs.pop(str(player), None)
+        DataStore.delete_reference_laps(pairs)
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Projette le temps du tour en cours. La courbe du tour est relevée au fil des frames (points franchis         #
+# interpolés entre deux frames) ; elle devient candidate à la ligne, puis référence de session si le tour est  #
+# validé et plus rapide. La référence PB est fournie par l'appelant (chargée du disque).                       #
+#--------------------------------------------------------------------------------------------------------------#
+class LapProjector:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Initialise le projecteur (aucune référence, aucun tour en cours).                                            #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self, bins: int = PROJECTION_BINS, mode: str = REFERENCE_PB):
+        self.bins = bins
+        self.mode = mode
+        self.personal: Optional[ReferenceLap] = None
+        self.session_best: Optional[ReferenceLap] = None
+        self._curve = [0.0] * bins
+        self.reset()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Oublie le tour en cours et la référence de session (changement de session ou de combo).                      #
+    #--------------------------------------------------------------------------------------------------------------#
+    def reset(self):
+        self.session_best = None
+        self._candidate: Optional[tuple] = None
+        self._lap: Optional[int] = None
+        self._restart(None)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Démarre un nouveau tour à `session_time` (None : début inconnu, pas de projection jusqu'à la ligne).         #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _restart(self, session_time: Optional[float]):
+        self._start = session_time
+        self._filled = 0
+        self._prev_pct = 0.0
+        self._prev_elapsed = 0.0
+        self._broken = session_time is None
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Référence sélectionnée : celle du mode choisi, sinon l'autre (None si aucune).                               #
+    #--------------------------------------------------------------------------------------------------------------#
+    def reference(self) -> Optional[ReferenceLap]:
+        if self.mode == REFERENCE_SESSION:
+            return self.session_best or self.personal
+        return self.personal or self.session_best
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Intègre une frame ; retourne le temps projeté du tour (s), ou None (pas de référence, début du tour          #
+    # inconnu, tour interrompu par un saut de position ou un passage hors du monde).                               #
+    #--------------------------------------------------------------------------------------------------------------#
+    def update(self, lap_completed, pct, session_time, surface: int) -> Optional[float]:
+        if lap_completed is None or pct is None or session_time is None:
+            return None
+        lap_completed = int(lap_completed)
+        session_time = float(session_time)
+        pct = float(pct)
+
+        # Ligne franchie : la courbe du tour écoulé devient candidate ; recul de LapCompleted : début inconnu
+        if self._lap is None or lap_completed < self._lap:
+            self._restart(None)
+        elif lap_completed > self._lap:
+            self._finish(lap_completed, session_time)
+            self._restart(session_time)
+        self._lap = lap_completed
+
+        if self._broken:
+            return None
+        elapsed = session_time - self._start
+        if surface == -1 or pct < 0 or elapsed < self._prev_elapsed:
+            self._broken = True
+            return None
+
+        # Juste après la ligne, LapDistPct peut encore valoir 0,99… : pas encore dans le nouveau tour
+        if self._filled == 0 and pct > 0.5:
+            return None
+        if pct - self._prev_pct > MAX_PCT_STEP or pct < self._prev_pct - MAX_PCT_STEP:
+            self._broken = True
+            return None
+        self._record(pct, elapsed)
+
+        ref = self.reference()
+        if ref is None:
+            return None
+        return elapsed + ref.lap_time - ref.time_at(pct)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Relève les points franchis entre la frame précédente et celle-ci (temps interpolé linéairement).             #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _record(self, pct: float, elapsed: float):
+        p0, e0 = self._prev_pct, self._prev_elapsed
+        target = min(int(pct * self.bins), self.bins - 1)
+        while self._filled <= target:
+            boundary = self._filled / self.bins
+            span = pct - p0
+            self._curve[self._filled] = e0 + (elapsed - e0) * ((boundary - p0) / span) if span > 0 else elapsed
+            self._filled += 1
+        if pct >= self._prev_pct:
+            self._prev_pct = pct
+        self._prev_elapsed = elapsed
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Fin de tour à la ligne : garde la courbe complète comme candidate (points restants = temps à la ligne).      #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _finish(self, lap_completed: int, session_time: float):
+        self._candidate = None
+        if self._broken or self._filled < self.bins * (1.0 - MAX_PCT_STEP):
+            return
+        elapsed = session_time - self._start
+        curve = list(self._curve)
+        for i in range(self._filled, self.bins):
+            curve[i] = elapsed
+        curve[0] = 0.0
+        self._candidate = (lap_completed, curve)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Résultat du tour `lap_no` (statut du validateur, temps officiel) : un tour valide plus rapide devient la     #
+    # référence de session. Retourne la référence construite pour ce tour (None si pas de courbe complète).        #
+    #--------------------------------------------------------------------------------------------------------------#
+    def lap_result(self, lap_no: int, status: str, lap_time: float) -> Optional[ReferenceLap]:
+        candidate, self._candidate = self._candidate, None
+        if status != "valid" or not lap_time or lap_time <= 0 or candidate is None or candidate[0] != lap_no:
+            return None
+        ref = ReferenceLap(candidate[1], lap_time)
+        if self.session_best is None or ref.lap_time < self.session_best.lap_time:
+            self.session_best = ref
+        return ref
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Met en forme une projection pour l'affichage (« 1:24.5  (+0.32) »), écart par rapport à la référence.        #
+#--------------------------------------------------------------------------------------------------------------#
+def format_projection(projected: Optional[float], reference_time: Optional[float]) -> str:
+    if projected is None or projected <= 0:
+        return "-:--.-"
+    text = format_lap_time(projected)[:-2]
+    if reference_time:
+        text += f"  ({round(projected - reference_time, 2) + 0.0:+.2f})"
+    return text
@@ -0,0 +1,202 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/lap_rules.py                                                                       #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Règles de validité d'un tour déclarées en configuration, compilées une fois en une table de    #
+#               prédicats évaluée en une seule passe à la fin de chaque tour ; retourne une raison structurée. #
+################################################################################################################
+
+from typing import Callable, Optional
+
+
+# Bits iRSDK de SessionFlags (irsdk_Flags) considérés comme un drapeau noir pour le joueur
+FLAG_BLACK = 0x00010000
+FLAG_DISQUALIFY = 0x00020000
+
+# Règles par défaut, évaluées dans l'ordre (la première qui invalide le tour donne la raison)
+DEFAULT_RULES = (
+    {"rule": "out_lap"},                                  # Tour passé par les stands
+    {"rule": "black_flag", "mask": FLAG_BLACK | FLAG_DISQUALIFY},
+    {"rule": "tow"},                                      # Voiture sortie du monde pendant le tour
+    {"rule": "discontinuity"},                            # Saut de LapDistPct / SessionTime (téléportation, replay)
+    {"rule": "incomplete"},                               # Temps non posé (drapeau, timeout)
+    {"rule": "incidents", "max": 0},                      # Plus de `max` incidents
+    {"rule": "off_track", "max_seconds": None},           # Temps hors piste (None = règle désactivée)
+)
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Raison structurée d'invalidité : code de règle + valeur mesurée. str() redonne l'ancien format texte         #
+# (« out_lap », « incidents:2 », « flag_and_incidents:2 »…), utilisé dans les enregistrements de session.      #
+#--------------------------------------------------------------------------------------------------------------#
+class LapReason:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Crée une raison : `code` (nom de la règle), `incidents` du tour, `value` (mesure propre à la règle).         #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self, code: str, incidents: int = 0, value=None):
+        self.code = code
+        self.incidents = incidents
+        self.value = value
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Format texte historique (compatible avec les enregistrements et le rejeu).                                   #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __str__(self) -> str:
+        if self.code in ("incidents", "flag_and_incidents"):
+            return f"{self.code}:{self.incidents}"
+        return self.code
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Représentation et comparaisons (une raison est égale à une autre raison identique ou à son format texte).    #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __repr__(self) -> str:
+        return f"LapReason({self.code!r}, incidents={self.incidents}, value={self.value!r})"
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, LapReason):
+            return (self.code, self.incidents, self.value) == (other.code, other.incidents, other.value)
+        if isinstance(other, str):
+            return str(self) == other
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((self.code, self.incidents, self.value))
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Dict sérialisable (code, incidents, valeur).                                                                 #
+    #--------------------------------------------------------------------------------------------------------------#
+    def to_dict(self) -> dict:
+        return {"code": self.code, "incidents": self.incidents, "value": self.value}
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Fabriques de règles : reçoivent leur configuration et retournent un prédicat faits → LapReason | None.       #
+# Faits d'un tour : out_lap, lap_time, timed_out, incidents, off_track_time, flags, not_in_world_time,         #
+# discontinuities (types détectés, dans l'ordre).                                                              #
+#--------------------------------------------------------------------------------------------------------------#
+def _rule_out_lap(cfg):
+    def check(f):
+        return LapReason("out_lap", f["incidents"]) if f["out_lap"] else None
+    return check
+
+def _rule_black_flag(cfg):
+    mask = int(cfg.get("mask", FLAG_BLACK | FLAG_DISQUALIFY))
+    def check(f):
+        return LapReason("black_flag", f["incidents"], f["flags"] & mask) if f["flags"] & mask else None
+    return check
+
+def _rule_tow(cfg):
+    min_seconds = float(cfg.get("min_seconds", 0.0))
+    def check(f):
+        t = f["not_in_world_time"]
+        return LapReason("tow", f["incidents"], t) if t > min_seconds else None
+    return check
+
+def _rule_discontinuity(cfg):
+    kinds = cfg.get("kinds")
+    kinds = None if kinds is None else frozenset(kinds)
+    def check(f):
+        seen = f["discontinuities"] if kinds is None else [k for k in f["discontinuities"] if k in kinds]
+        return LapReason("discontinuity", f["incidents"], seen[0]) if seen else None
+    return check
+
+def _rule_incomplete(cfg):
+    def check(f):
+        if f["lap_time"] > 0 and not f["timed_out"]:
+            return None
+        n = f["incidents"]
+        return LapReason("flag_and_incidents", n) if n > 0 else LapReason("incomplete")
+    return check
+
+def _rule_incidents(cfg):
+    max_incidents = int(cfg.get("max", 0))
+    def check(f):
+        return LapReason("incidents", f["incidents"]) if f["incidents"] > max_incidents else None
+    return check
+
+def _rule_off_track(cfg):
+    max_seconds = cfg.get("max_seconds")
+    if max_seconds is None:
+        return None
+    max_seconds = float(max_seconds)
+    def check(f):
+        t = f["off_track_time"]
+        return LapReason("off_track", f["incidents"], t) if t > max_seconds else None
+    return check
+
+
+# Règle structurelle : un tour sans nouveau temps (timeout) porte le temps du tour précédent, il ne doit jamais
+# être validé ; toujours évaluée (en dernier si la configuration ne la place pas), jamais désactivable
+RULE_INCOMPLETE = "incomplete"
+
+RULE_FACTORIES: dict[str, Callable] = {
+    "out_lap": _rule_out_lap,
+    "black_flag": _rule_black_flag,
+    "tow": _rule_tow,
+    "discontinuity": _rule_discontinuity,
+    "incomplete": _rule_incomplete,
+    "incidents": _rule_incidents,
+    "off_track": _rule_off_track,
+}
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Compile une configuration de règles (liste de dicts {"rule": nom, ...}) en une évaluation en une passe.      #
+# Règles inconnues → ValueError ; {"enabled": false} ou une fabrique qui retourne None désactive la règle.     #
+# « incomplete » est structurelle : ajoutée en dernier si absente, ValueError si désactivée.                   #
+#--------------------------------------------------------------------------------------------------------------#
+class CompiledRules:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Construit la table des prédicats (une seule fois, à l'initialisation du validateur).                         #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self, config=DEFAULT_RULES):
+        checks = []
+        names = []
+        for entry in config:
+            name = entry.get("rule")
+            factory = RULE_FACTORIES.get(name)
+            if factory is None:
+                raise ValueError(f"Règle de validité inconnue : {name!r}")
+            if not entry.get("enabled", True):
+                if name == RULE_INCOMPLETE:
+                    raise ValueError(f"La règle {RULE_INCOMPLETE!r} ne peut pas être désactivée")
+                continue
+            check = factory(entry)
+            if check is not None:
+                checks.append(check)
+                names.append(name)
+        if RULE_INCOMPLETE not in names:
+            checks.append(_rule_incomplete({}))
+            names.append(RULE_INCOMPLETE)
+        self._checks = tuple(checks)
+        self.names = tuple(names)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Évalue les faits d'un tour : première raison d'invalidité rencontrée, ou None si le tour est valide.         #
+    #--------------------------------------------------------------------------------------------------------------#
+    def evaluate(self, facts: dict) -> Optional[LapReason]:
+        for check in self._checks:
+            reason = check(facts)
+            if reason is not None:
+                return reason
+        return None
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Construit les faits d'un tour à partir de l'état du validateur et des statistiques des accumulateurs.        #
+#--------------------------------------------------------------------------------------------------------------#
+def lap_facts(lap_info: dict, out_lap: bool, incidents: int) -> dict:
+    stats = lap_info.get("stats") or {}
+    return {
+        "out_lap": out_lap,
+        "lap_time": lap_info["lap_time"],
+        "timed_out": lap_info.get("timed_out", False),
+        "incidents": incidents,
+        "off_track_time": (stats.get("off_track") or {}).get("time", 0.0),
+        "flags": (stats.get("flags") or {}).get("mask", 0),
+        "not_in_world_time": (stats.get("not_in_world") or {}).get("time", 0.0),
+        "discontinuities": (stats.get("discontinuities") or {}).get("kinds") or [],
+    }
@@ -0,0 +1,140 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/lap_sketch.py                                                                      #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Distribution des temps au tour en histogramme logarithmique creux (précision relative fixe) :  #
+#               ajout en O(1), fusion par addition des compteurs, quantiles et rang d'un temps par bisect.     #
+################################################################################################################
+
+import math
+import bisect
+from typing import Optional
+
+
+# Précision relative des quantiles (0,1 % : ± 0,09 s sur un tour de 90 s)
+RELATIVE_ACCURACY = 0.001
+_GAMMA = (1.0 + RELATIVE_ACCURACY) / (1.0 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Histogramme des temps : le casier i couvre ]γ^(i-1), γ^i] ; seuls les casiers non vides sont gardés          #
+# (quelques centaines pour des milliers de tours). Clés triées et cumuls recalculés à la première requête      #
+# qui suit un ajout.                                                                                           #
+#--------------------------------------------------------------------------------------------------------------#
+class LapTimeSketch:
+
+    __slots__ = ("count", "_bins", "_keys", "_cumul")
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Crée un histogramme vide.                                                                                    #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self):
+        self.count = 0
+        self._bins: dict[int, int] = {}
+        self._keys: Optional[list[int]] = None
+        self._cumul: list[int] = []
+
+    def __len__(self) -> int:
+        return self.count
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Casier d'un temps (> 0).                                                                                     #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def _index(lap_time: float) -> int:
+        return math.ceil(math.log(lap_time) / _LOG_GAMMA)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Valeur représentative d'un casier (erreur relative ≤ RELATIVE_ACCURACY sur tout le casier).                  #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def _value(index: int) -> float:
+        return 2.0 * _GAMMA ** index / (_GAMMA + 1.0)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ajoute un temps (ignoré s'il n'est pas positif).                                                             #
+    #--------------------------------------------------------------------------------------------------------------#
+    def add(self, lap_time: float, count: int = 1):
+        if not lap_time or lap_time <= 0 or count <= 0:
+            return
+        i = self._index(lap_time)
+        self._bins[i] = self._bins.get(i, 0) + count
+        self.count += count
+        self._keys = None
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ajoute les compteurs d'un autre histogramme (même précision : fusion exacte).                                #
+    #--------------------------------------------------------------------------------------------------------------#
+    def merge(self, other: "LapTimeSketch"):
+        for i, n in other._bins.items():
+            self._bins[i] = self._bins.get(i, 0) + n
+        self.count += other.count
+        self._keys = None
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Clés triées et cumuls (nombre de temps jusqu'au casier inclus), recalculés après un ajout.                   #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _prepare(self) -> list[int]:
+        if self._keys is None:
+            self._keys = sorted(self._bins)
+            total = 0
+            self._cumul = []
+            for i in self._keys:
+                total += self._bins[i]
+                self._cumul.append(total)
+        return self._keys
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Temps au quantile q (0 = meilleur, 0.5 = médiane, 1 = pire), ou None si vide.                                #
+    #--------------------------------------------------------------------------------------------------------------#
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        keys = self._prepare()
+        rank = min(max(float(q), 0.0), 1.0) * (self.count - 1)
+        pos = bisect.bisect_right(self._cumul, rank)
+        return self._value(keys[min(pos, len(keys) - 1)])
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Part des temps plus rapides que `lap_time` (0 à 1 ; les temps du même casier comptent pour moitié), ou None. #
+    #--------------------------------------------------------------------------------------------------------------#
+    def fraction_faster(self, lap_time: float) -> Optional[float]:
+        if not self.count or not lap_time or lap_time <= 0:
+            return None
+        keys = self._prepare()
+        i = self._index(lap_time)
+        pos = bisect.bisect_left(keys, i)
+        below = self._cumul[pos - 1] if pos else 0
+        same = self._bins[i] if pos < len(keys) and keys[pos] == i else 0
+        return (below + same / 2.0) / self.count
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Forme compacte sérialisable : casiers triés en écarts successifs et compteurs ({"i": [...], "n": [...]}).    #
+    #--------------------------------------------------------------------------------------------------------------#
+    def to_dict(self) -> dict:
+        keys = self._prepare()
+        return {
+            "i": [k - p for k, p in zip(keys, [0] + keys[:-1])],
+            "n": [self._bins[k] for k in keys],
+        }
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Recrée un histogramme depuis `to_dict` (forme illisible : histogramme vide).                                 #
+    #--------------------------------------------------------------------------------------------------------------#
+    @classmethod
+    def from_dict(cls, data) -> "LapTimeSketch":
+        sketch = cls()
+        if not isinstance(data, dict):
+            return sketch
+        try:
+            index = 0
+            for delta, n in zip(data.get("i") or [], data.get("n") or []):
+                index += int(delta)
+                if int(n) > 0:
+                    sketch._bins[index] = sketch._bins.get(index, 0) + int(n)
+                    sketch.count += int(n)
+        except (TypeError, ValueError):
+            return cls()
+        return sketch
@@ -0,0 +1,291 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/lap_stats.py                                                                       #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Statistiques agrégées des tours, tenues à jour en O(1) à chaque tour : par joueur et combo,    #
+#               par joueur, par combo et globales (tours valides, invalides par raison, temps de roulage,      #
+#               moyenne / écart-type des tours valides, tendance ; distribution des temps par combo).          #
+#               Persistées dans lap_stats.json et son journal (séries modifiées seulement).                    #
+################################################################################################################
+
+import math
+from typing import Optional
+
+from iracing_tracker.lap_sketch import LapTimeSketch
+from iracing_tracker.sqlite_store import split_combo_key
+
+
+# Lissages exponentiels de la tendance : moyenne rapide (derniers tours) et lente (niveau habituel)
+TREND_FAST = 0.2
+TREND_SLOW = 0.02
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Valeur si c'est un dict, sinon dict vide (fichier édité à la main ou tronqué).                               #
+#--------------------------------------------------------------------------------------------------------------#
+def _as_dict(value) -> dict:
+    return value if isinstance(value, dict) else {}
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Compteurs d'une série de tours : valides / invalides (par raison), temps de roulage, moyenne et variance des #
+# tours valides (Welford), meilleur temps, moyennes exponentielles rapide et lente pour la tendance et, sur un #
+# même combo, distribution des temps valides (LapTimeSketch).                                                  #
+#--------------------------------------------------------------------------------------------------------------#
+class LapAggregate:
+
+    __slots__ = ("valid", "invalid", "reasons", "driving_time", "mean", "_m2", "best", "_fast", "_slow", "sketch")
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Initialise une série vide (avec sa distribution des temps si `sketch`).                                      #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self, sketch: bool = False):
+        self.valid = 0
+        self.invalid = 0
+        self.reasons: dict[str, int] = {}
+        self.driving_time = 0.0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.best: Optional[float] = None
+        self._fast = 0.0
+        self._slow = 0.0
+        self.sketch: Optional[LapTimeSketch] = LapTimeSketch() if sketch else None
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ajoute un tour terminé (temps officiel ou None, validité, code de la raison d'invalidité).                   #
+    #--------------------------------------------------------------------------------------------------------------#
+    def add(self, lap_time: Optional[float], valid: bool, reason: Optional[str] = None):
+        has_time = bool(lap_time) and lap_time > 0
+        if has_time:
+            self.driving_time += lap_time
+        if not valid:
+            self.invalid += 1
+            if reason:
+                self.reasons[reason] = self.reasons.get(reason, 0) + 1
+            return
+        if not has_time:
+            return
+
+        self.valid += 1
+        delta = lap_time - self.mean
+        self.mean += delta / self.valid
+        self._m2 += delta * (lap_time - self.mean)
+        if self.best is None or lap_time < self.best:
+            self.best = lap_time
+        if self.valid == 1:
+            self._fast = self._slow = lap_time
+        else:
+            self._fast += TREND_FAST * (lap_time - self._fast)
+            self._slow += TREND_SLOW * (lap_time - self._slow)
+        if self.sketch is not None:
+            self.sketch.add(lap_time)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Écart-type d'échantillon des tours valides (0 en dessous de deux tours).                                     #
+    #--------------------------------------------------------------------------------------------------------------#
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self._m2 / (self.valid - 1)) if self.valid > 1 else 0.0
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Tendance (s) : moyenne rapide − moyenne lente des tours valides ; négative = en progrès (None sous 2 tours). #
+    #--------------------------------------------------------------------------------------------------------------#
+    @property
+    def trend(self) -> Optional[float]:
+        return self._fast - self._slow if self.valid > 1 else None
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Résumé pour l'affichage ({"laps", "valid", "invalid", "reasons", "driving_time", "mean", "stdev", "best",    #
+    # "trend", "median"} ; médiane None sans distribution).                                                        #
+    #--------------------------------------------------------------------------------------------------------------#
+    def summary(self) -> dict:
+        return {
+            "laps": self.valid + self.invalid,
+            "valid": self.valid,
+            "invalid": self.invalid,
+            "reasons": dict(self.reasons),
+            "driving_time": self.driving_time,
+            "mean": self.mean if self.valid else None,
+            "stdev": self.stdev,
+            "best": self.best,
+            "trend": self.trend,
+            "median": self.sketch.quantile(0.5) if self.sketch is not None else None,
+        }
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # État complet sérialisable (reprise exacte au chargement).                                                    #
+    #--------------------------------------------------------------------------------------------------------------#
+    def to_dict(self) -> dict:
+        data = {
+            "valid": self.valid,
+            "invalid": self.invalid,
+            "reasons": dict(self.reasons),
+            "driving_time": self.driving_time,
+            "mean": self.mean,
+            "m2": self._m2,
+            "best": self.best,
+            "fast": self._fast,
+            "slow": self._slow,
+        }
+        if self.sketch is not None:
+            data["sketch"] = self.sketch.to_dict()
+        return data
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Recrée une série depuis `to_dict` (valeurs manquantes ou illisibles : série vide).                           #
+    #--------------------------------------------------------------------------------------------------------------#
+    @classmethod
+    def from_dict(cls, data, sketch: bool = False) -> "LapAggregate":
+        agg = cls(sketch)
+        if not isinstance(data, dict):
+            return agg
+        try:
+            agg.valid = int(data.get("valid") or 0)
+            agg.invalid = int(data.get("invalid") or 0)
+            reasons = data.get("reasons")
+            agg.reasons = {str(k): int(v) for k, v in reasons.items()} if isinstance(reasons, dict) else {}
+            agg.driving_time = float(data.get("driving_time") or 0.0)
+            agg.mean = float(data.get("mean") or 0.0)
+            agg._m2 = float(data.get("m2") or 0.0)
+            agg.best = float(data["best"]) if data.get("best") else None
+            agg._fast = float(data.get("fast") or 0.0)
+            agg._slow = float(data.get("slow") or 0.0)
+        except (TypeError, ValueError):
+            return cls(sketch)
+        if sketch:
+            agg.sketch = LapTimeSketch.from_dict(data.get("sketch"))
+        return agg
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Toutes les séries : globale, par combo (trackID, carID), par joueur et par (joueur, combo). Chaque tour met  #
+# à jour ses quatre séries ; une vue de statistiques n'a qu'une lecture de dict à faire. Les séries d'un combo #
+# (tous joueurs, ou un joueur) portent la distribution des temps. Les séries modifiées sont notées, pour       #
+# n'écrire qu'elles dans le journal (changes).                                                                 #
+#--------------------------------------------------------------------------------------------------------------#
+class LapStats:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Crée des statistiques vides.                                                                                 #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self):
+        self.total = LapAggregate()
+        self.combos: dict[tuple[int, int], LapAggregate] = {}
+        self.players: dict[str, LapAggregate] = {}
+        self.player_combos: dict[tuple[str, int, int], LapAggregate] = {}
+        # Séries modifiées depuis le dernier `changes()` : (table, clé interne)
+        self._changed: set[tuple] = set()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ajoute un tour terminé d'un joueur sur un combo aux quatre séries concernées.                                #
+    #--------------------------------------------------------------------------------------------------------------#
+    def add(self, player: str, track_id: int, car_id: int, lap_time: Optional[float], valid: bool,
+            reason: Optional[str] = None):
+        self.total.add(lap_time, valid, reason)
+        self._changed.add(("total", None))
+        for name, key, sketch in (("combos", (track_id, car_id), True), ("players", player, False),
+                                  ("player_combos", (player, track_id, car_id), True)):
+            table = getattr(self, name)
+            agg = table.get(key)
+            if agg is None:
+                agg = table[key] = LapAggregate(sketch)
+            agg.add(lap_time, valid, reason)
+            self._changed.add((name, key))
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Série demandée : globale (rien), d'un combo, d'un joueur, ou d'un joueur sur un combo (None si aucun tour).  #
+    #--------------------------------------------------------------------------------------------------------------#
+    def get(self, player: Optional[str] = None, track_id: Optional[int] = None,
+            car_id: Optional[int] = None) -> Optional[LapAggregate]:
+        has_combo = track_id is not None and car_id is not None
+        if player and has_combo:
+            return self.player_combos.get((player, track_id, car_id))
+        if player:
+            return self.players.get(player)
+        if has_combo:
+            return self.combos.get((track_id, car_id))
+        return self.total
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Retire les séries d'un joueur (insensible à la casse) ; les séries globale et par combo restent.             #
+    # Retourne True si quelque chose a été retiré.                                                                 #
+    #--------------------------------------------------------------------------------------------------------------#
+    def remove_player(self, name: str) -> bool:
+        target = str(name).strip().lower()
+        players = [p for p in self.players if p.strip().lower() == target]
+        keys = [k for k in self.player_combos if k[0].strip().lower() == target]
+        for p in players:
+            del self.players[p]
+            self._changed.add(("players", p))
+        for k in keys:
+            del self.player_combos[k]
+            self._changed.add(("player_combos", k))
+        return bool(players or keys)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # True si des séries ont changé depuis le dernier `changes()`.                                                 #
+    #--------------------------------------------------------------------------------------------------------------#
+    @property
+    def changed(self) -> bool:
+        return bool(self._changed)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Séries modifiées depuis l'appel précédent, au format du journal des statistiques : [(table, clé, état)],     #
+    # clé « trackID|carID », joueur ou [« trackID|carID », joueur], état None pour une série retirée. États        #
+    # copiés : la liste peut être écrite depuis un autre thread.                                                   #
+    #--------------------------------------------------------------------------------------------------------------#
+    def changes(self) -> list[tuple]:
+        records = []
+        for name, key in self._changed:
+            if name == "total":
+                records.append((name, None, self.total.to_dict()))
+                continue
+            agg = getattr(self, name).get(key)
+            if name == "combos":
+                journal_key = f"{key[0]}|{key[1]}"
+            elif name == "player_combos":
+                journal_key = [f"{key[1]}|{key[2]}", key[0]]
+            else:
+                journal_key = key
+            records.append((name, journal_key, agg.to_dict() if agg is not None else None))
+        self._changed.clear()
+        return records
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Format de lap_stats.json ({"total", "combos": {"track|car"}, "players", "player_combos": {"track|car":       #
+    # {joueur}}}).                                                                                                 #
+    #--------------------------------------------------------------------------------------------------------------#
+    def to_dict(self) -> dict:
+        player_combos: dict = {}
+        for (player, track_id, car_id), agg in self.player_combos.items():
+            player_combos.setdefault(f"{track_id}|{car_id}", {})[player] = agg.to_dict()
+        return {
+            "total": self.total.to_dict(),
+            "combos": {f"{t}|{c}": agg.to_dict() for (t, c), agg in self.combos.items()},
+            "players": {p: agg.to_dict() for p, agg in self.players.items()},
+            "player_combos": player_combos,
+        }
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Recrée les statistiques depuis `to_dict` (clés de combo non numériques ignorées).                            #
+    #--------------------------------------------------------------------------------------------------------------#
+    @classmethod
+    def from_dict(cls, data) -> "LapStats":
+        stats = cls()
+        if not isinstance(data, dict):
+            return stats
+        stats.total = LapAggregate.from_dict(data.get("total"))
+        for combo_key, agg in _as_dict(data.get("combos")).items():
+            combo = split_combo_key(combo_key)
+            if combo is not None:
+                stats.combos[combo] = LapAggregate.from_dict(agg, sketch=True)
+        for player, agg in _as_dict(data.get("players")).items():
+            stats.players[str(player)] = LapAggregate.from_dict(agg)
+        for combo_key, players_map in _as_dict(data.get("player_combos")).items():
+            combo = split_combo_key(combo_key)
+            if combo is None:
+                continue
+            for player, agg in _as_dict(players_map).items():
+                stats.player_combos[(str(player), *combo)] = LapAggregate.from_dict(agg, sketch=True)
+        return stats
@@ -1,119 +1,290 @@
 ################################################################################################################
 # Projet : iRacing Tracker                                                                                     #
 # Fichier : iracing_tracker/lap_validator.py                                                                   #
-# Date de modification : 16.06.2026                                                                            #
+# Date de modification : 18.10.2026                                                                            #
 # Auteur : Nicolas Schneeberger                                                                                #
 # Description : Détecte et valide les tours en suivant les incidents et les horodatages iRacing.               #
 ################################################################################################################
 
+import copy
 import time
 from typing import Optional
 
+from iracing_tracker.lap_accumulators import LapAccumulators
+from iracing_tracker.lap_rules import CompiledRules, DEFAULT_RULES, LapReason, lap_facts
+from iracing_tracker.discontinuity_detector import KIND_TIME_JUMP
+
+
+# États du cycle de vie d'un tour
+STATE_GARAGE = "garage"      # Pas encore roulé depuis le démarrage / le dernier reset
+STATE_RUNNING = "running"    # En piste, tour en cours
+STATE_PENDING = "pending"    # Ligne franchie, en attente de la MAJ de LapLastLapTime
+
+# Budget de coût par frame (µs) de LapValidator.update, vérifié par « python -m iracing_tracker.tools.bench fsm »
+FRAME_BUDGET_US = 25.0
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Conditions de transition : évaluées sur la frame courante (détecteur, LapCompleted, LapLastLapTime,          #
+# PlayerTrackSurface, horodatage). Surfaces iRSDK : -1 hors monde, 0 hors piste, 1 stand, 2 approche, 3 piste. #
+#--------------------------------------------------------------------------------------------------------------#
+def _rewind(d, lap_completed, lap_time, surface, now):
+    return lap_completed < d.last_completed_lap
+
+def _garage_return(d, lap_completed, lap_time, surface, now):
+    return surface == 1
+
+def _on_track(d, lap_completed, lap_time, surface, now):
+    return surface == 3
+
+def _new_lap(d, lap_completed, lap_time, surface, now):
+    return lap_completed > d.last_completed_lap
+
+def _time_updated(d, lap_completed, lap_time, surface, now):
+    if lap_time != d._pending_info.get("prev_lap_time", 0.0):
+        return True
+    # Second signal : CarIdxLastLapTime[PlayerCarIdx], parfois posé avant LapLastLapTime
+    car_lap_time = d._car_lap_time
+    return car_lap_time is not None and car_lap_time > 0 and car_lap_time != d._pending_info.get("prev_car_lap_time")
+
+def _timeout(d, lap_completed, lap_time, surface, now):
+    return (now - d._pending_since) >= d.pending_max_wait
+
 
 #--------------------------------------------------------------------------------------------------------------#
 # Détecte la fin d'un tour via LapCompleted et LapLastLapTime (qui se met à jour avec un léger délai).         #
+# Le cycle de vie est une table de transitions explicite ; chaque transition et le temps passé dans chaque     #
+# état sont comptés.                                                                                           #
 #--------------------------------------------------------------------------------------------------------------#
 class LapDetector:
 
+    # Par état, transitions évaluées dans l'ordre : (condition, état cible, action, enchaîner).
+    # La première condition vraie s'applique ; « enchaîner » réévalue la table depuis l'état cible
+    # dans la même frame (arrivée en piste et ligne franchie simultanément).
+    TRANSITIONS = {
+        STATE_GARAGE: (
+            (_rewind,        STATE_GARAGE,  "_on_reset",    False),
+            (_on_track,      STATE_RUNNING, None,           True),
+            (_new_lap,       STATE_GARAGE,  "_on_sync_lap", False),   # Ignoré tant qu'on n'a pas roulé
+        ),
+        STATE_RUNNING: (
+            (_garage_return, STATE_GARAGE,  "_on_reset",    False),
+            (_rewind,        STATE_GARAGE,  "_on_reset",    False),   # Session relancée (le compteur recule)
+            (_new_lap,       STATE_PENDING, "_on_arm",      False),
+        ),
+        STATE_PENDING: (
+            (_garage_return, STATE_GARAGE,  "_on_reset",    False),
+            (_rewind,        STATE_GARAGE,  "_on_reset",    False),
+            (_time_updated,  STATE_RUNNING, "_on_confirm",  False),
+            (_timeout,       STATE_RUNNING, "_on_timeout",  False),   # iRacing n'a pas posé de nouveau temps
+        ),
+    }
+
     #--------------------------------------------------------------------------------------------------------------#
-    # Initialise le détecteur : aucun tour terminé, aucun tour en attente.                                         #
+    # Initialise le détecteur : aucun tour terminé, aucun tour en attente, compteurs à zéro.                       #
+    # `accumulators` : statistiques par tour, remises à zéro à chaque ligne franchie (défaut : LapAccumulators).   #
     #--------------------------------------------------------------------------------------------------------------#
-    def __init__(self, pending_max_wait: float = 1.5):
-        self.last_completed_lap = 0
+    def __init__(self, pending_max_wait: float = 1.5, accumulators: Optional[LapAccumulators] = None):
         self.pending_max_wait = pending_max_wait
+        self.state = STATE_GARAGE
+        self.last_completed_lap = 0
+        self.accumulators = accumulators if accumulators is not None else LapAccumulators()
 
-        # État d'un tour en attente de la MAJ de LapLastLapTime
-        self._pending = False
+        # Tour en attente de la MAJ de LapLastLapTime
         self._pending_info = {}
         self._pending_since = 0.0
+        self._car_lap_time: Optional[float] = None
 
-        # Évite un reset prématuré au démarrage de session (tant qu'on n'a pas roulé)
-        self.has_left_pits = False
+        # Temps vus sur la frame précédente : référence de l'attente (iRacing peut poser le nouveau temps sur la
+        # frame même où LapCompleted s'incrémente, il ne « change » alors plus par rapport à cette frame)
+        self._seen = False
+        self._seen_lap_time = 0.0
+        self._seen_car_lap_time: Optional[float] = None
+
+        # Condition ayant déclenché la dernière transition (None si aucune sur la frame)
+        self.last_event: Optional[str] = None
+        self.reset_stats()
 
     #--------------------------------------------------------------------------------------------------------------#
-    # Réinitialise le détecteur (retour au garage après avoir été sur piste).                                      #
+    # Remet à zéro les compteurs de transitions et le temps passé par état.                                        #
+    #--------------------------------------------------------------------------------------------------------------#
+    def reset_stats(self):
+        self.transition_counts: dict[tuple[str, str, str], int] = {}
+        self.time_in_state: dict[str, float] = {STATE_GARAGE: 0.0, STATE_RUNNING: 0.0, STATE_PENDING: 0.0}
+        self._last_frame_ts: Optional[float] = None
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Indique si l'on a roulé depuis le dernier reset (évite un reset prématuré au démarrage de session).          #
+    #--------------------------------------------------------------------------------------------------------------#
+    @property
+    def has_left_pits(self) -> bool:
+        return self.state != STATE_GARAGE
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Réinitialise le détecteur (retour au garage après avoir été sur piste) ; les compteurs sont conservés.       #
     #--------------------------------------------------------------------------------------------------------------#
     def reset(self):
+        self.state = STATE_GARAGE
         self.last_completed_lap = 0
-        self._pending = False
         self._pending_info = {}
         self._pending_since = 0.0
-        self.has_left_pits = False
+        self.accumulators.reset()
 
     #--------------------------------------------------------------------------------------------------------------#
     # Détecte si un tour vient de se terminer ; retourne ses infos (dict) ou None si rien/en attente.              #
+    # `now` permet de rejouer une télémétrie enregistrée avec ses horodatages d'origine ; `car_lap_time`           #
+    # (CarIdxLastLapTime du joueur) confirme le tour dès que l'un des deux temps change ; `frame` (état complet)   #
+    # alimente les accumulateurs du tour en cours.                                                                 #
+    #--------------------------------------------------------------------------------------------------------------#
+    def detect(self, lap_completed: int, lap_time: float, surface: int, now: Optional[float] = None,
+               car_lap_time: Optional[float] = None, frame: Optional[dict] = None) -> Optional[dict]:
+        if now is None:
+            now = time.time()
+        self._car_lap_time = car_lap_time
+
+        # Temps passé dans l'état courant depuis la frame précédente
+        if self._last_frame_ts is not None and now > self._last_frame_ts:
+            self.time_in_state[self.state] += now - self._last_frame_ts
+        self._last_frame_ts = now
+
+        # Accumulateurs avant les transitions : la frame de la ligne clôt le tour terminé (comme les incidents)
+        if frame is not None:
+            self.accumulators.update(frame, now)
+
+        self.last_event = None
+        result = None
+        rows = self.TRANSITIONS[self.state]
+        i = 0
+        while i < len(rows):
+            condition, target, action, chain = rows[i]
+            i += 1
+            if not condition(self, lap_completed, lap_time, surface, now):
+                continue
+            key = (self.state, condition.__name__[1:], target)
+            self.transition_counts[key] = self.transition_counts.get(key, 0) + 1
+            self.last_event = key[1]
+            self.state = target
+            if action is not None:
+                result = getattr(self, action)(lap_completed, lap_time, now)
+            if not chain:
+                break
+            rows, i = self.TRANSITIONS[target], 0
+
+        self._seen = True
+        self._seen_lap_time = lap_time
+        self._seen_car_lap_time = car_lap_time
+        return result
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Coupe le tour en cours (discontinuité) : rien n'est émis, LapCompleted actuel devient la référence et le     #
+    # suivi reprend en piste sans repasser par le garage.                                                          #
+    #--------------------------------------------------------------------------------------------------------------#
+    def split(self, lap_completed: int):
+        running = self.state != STATE_GARAGE
+        self.reset()
+        self.last_completed_lap = lap_completed
+        if running:
+            self.state = STATE_RUNNING
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # État du cycle de vie (état, référence LapCompleted, tour en attente, accumulateurs), sérialisable en JSON ;  #
+    # les compteurs de transitions n'en font pas partie.                                                           #
+    #--------------------------------------------------------------------------------------------------------------#
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "last_completed_lap": self.last_completed_lap,
+            "pending_info": copy.deepcopy(self._pending_info),
+            "pending_since": self._pending_since,
+            "car_lap_time": self._car_lap_time,
+            "seen": [self._seen_lap_time, self._seen_car_lap_time] if self._seen else None,
+            "accumulators": self.accumulators.snapshot(),
+        }
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Reprend un état produit par `snapshot`.                                                                      #
+    #--------------------------------------------------------------------------------------------------------------#
+    def restore(self, data: dict):
+        if data.get("state") not in self.TRANSITIONS:
+            raise ValueError(f"État du détecteur inconnu : {data.get('state')!r}")
+        self.state = data["state"]
+        self.last_completed_lap = int(data.get("last_completed_lap") or 0)
+        self._pending_info = copy.deepcopy(data.get("pending_info") or {})
+        self._pending_since = float(data.get("pending_since") or 0.0)
+        self._car_lap_time = data.get("car_lap_time")
+        seen = data.get("seen")
+        self._seen = isinstance(seen, list) and len(seen) == 2
+        if self._seen:
+            self._seen_lap_time, self._seen_car_lap_time = float(seen[0] or 0.0), seen[1]
+        self.accumulators.restore(data.get("accumulators") or {})
+
+    # ---- Actions de transition ----
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Action : retour au garage / session relancée ; LapCompleted actuel devient la référence (sinon la sortie     #
+    # des stands suivante armerait un faux tour).                                                                  #
     #--------------------------------------------------------------------------------------------------------------#
-    def detect(self, lap_completed: int, lap_time: float, surface: int) -> Optional[dict]:
-        now = time.time()
-
-        # Mémoriser qu'on a quitté les stands (pour éviter un reset prématuré)
-        if surface == 3:  # Sur la piste
-            self.has_left_pits = True
-
-        # Reset uniquement si on retourne au garage APRÈS avoir été sur piste
-        if surface == 1 and self.has_left_pits:
-            self.reset()
-            return None
-
-        # Session relancée (le compteur recule)
-        if lap_completed < self.last_completed_lap:
-            self.reset()
-            return None
-
-        # 1) Détection d'un nouveau tour terminé
-        if lap_completed > self.last_completed_lap and not self._pending:
-            # Ignorer tout changement de LapCompleted avant d'avoir été sur la piste
-            if not self.has_left_pits:
-                self.last_completed_lap = lap_completed
-                return None
-
-            # Sinon : armer l'attente de la MAJ de LapLastLapTime
-            self._pending = True
-            self._pending_since = now
-            self._pending_info = {
-                "lap_number": lap_completed,
-                "prev_lap_time": lap_time
-            }
-
-            self.last_completed_lap = lap_completed
-            return None
-
-        # 2) Tour en attente : guetter la MAJ de LapLastLapTime
-        if self._pending:
-            info = self._pending_info
-            prev_lap_time = info.get("prev_lap_time", 0.0)
-
-            # a) Pas encore de MAJ
-            if lap_time == prev_lap_time:
-                if (now - self._pending_since) >= self.pending_max_wait:
-                    # Timeout : iRacing n'a pas posé de nouveau temps
-                    self._pending = False
-                    result = {
-                        "lap_number": info["lap_number"],
-                        "lap_time": lap_time,
-                        "prev_lap_time": prev_lap_time,
-                        "timed_out": True
-                    }
-                    self._pending_info = {}
-                    self._pending_since = 0.0
-                    return result
-                return None
-
-            # b) MAJ reçue : retourner les infos
-            self._pending = False
-            result = {
-                "lap_number": info["lap_number"],
-                "lap_time": lap_time,
-                "prev_lap_time": prev_lap_time,
-                "timed_out": False
-            }
-            self._pending_info = {}
-            self._pending_since = 0.0
-            return result
-
-        # 3) Rien de nouveau
+    def _on_reset(self, lap_completed, lap_time, now):
+        self.reset()
+        self.last_completed_lap = lap_completed
         return None
 
+    #--------------------------------------------------------------------------------------------------------------#
+    # Action : suit LapCompleted sans armer de tour (on n'a pas encore roulé).                                     #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _on_sync_lap(self, lap_completed, lap_time, now):
+        self.last_completed_lap = lap_completed
+        return None
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Action : ligne franchie, arme l'attente de la MAJ de LapLastLapTime et clôt les accumulateurs du tour. Les   #
+    # temps de référence sont ceux de la frame précédente : un temps posé sur la frame de la ligne compte déjà     #
+    # comme nouveau et confirme le tour dès la frame suivante.                                                     #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _on_arm(self, lap_completed, lap_time, now):
+        self._pending_since = now
+        self._pending_info = {
+            "lap_number": lap_completed,
+            "prev_lap_time": self._seen_lap_time if self._seen else lap_time,
+            "prev_car_lap_time": self._seen_car_lap_time if self._seen else self._car_lap_time,
+            "stats": self.accumulators.roll(),
+        }
+        self.last_completed_lap = lap_completed
+        return None
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Action : nouveau temps reçu, le tour est terminé.                                                            #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _on_confirm(self, lap_completed, lap_time, now):
+        if lap_time != self._pending_info.get("prev_lap_time", 0.0):
+            return self._finish(lap_time, now, timed_out=False, signal="LapLastLapTime")
+        return self._finish(self._car_lap_time, now, timed_out=False, signal="CarIdxLastLapTime")
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Action : timeout, le tour est terminé sans nouveau temps.                                                    #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _on_timeout(self, lap_completed, lap_time, now):
+        return self._finish(lap_time, now, timed_out=True, signal=None)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Clôt le tour en attente et retourne ses infos (dont les horodatages ligne franchie / confirmation).          #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _finish(self, lap_time: float, now: float, timed_out: bool, signal: Optional[str]) -> dict:
+        info = self._pending_info
+        result = {
+            "lap_number": info["lap_number"],
+            "lap_time": lap_time,
+            "prev_lap_time": info.get("prev_lap_time", 0.0),
+            "timed_out": timed_out,
+            "signal": signal,
+            "crossed_at": self._pending_since,
+            "confirmed_at": now,
+            "stats": info.get("stats", {}),
+        }
+        self._pending_info = {}
+        self._pending_since = 0.0
+        return result
+
 
 #--------------------------------------------------------------------------------------------------------------#
 # Orchestre détection + validation : compare les incidents entre début et fin de tour.                         #
@@ -122,53 +293,107 @@ class LapDetector:
 class LapValidator:
 
     #--------------------------------------------------------------------------------------------------------------#
-    # Initialise le validateur : détecteur, baseline d'incidents et flag out lap.                                  #
+    # Initialise le validateur : détecteur, baseline d'incidents, flags out lap et règles de validité compilées    #
+    # (`rules` : configuration de lap_rules, défaut DEFAULT_RULES).                                                #
     #--------------------------------------------------------------------------------------------------------------#
-    def __init__(self):
+    def __init__(self, rules=None):
         self.detector = LapDetector()
+        self.rules = CompiledRules(DEFAULT_RULES if rules is None else rules)
 
         # Calibration et suivi des incidents
         self.initialized = False
         self.inc_at_lap_start = 0
 
-        # Flag de détection des out laps (sortie des stands)
+        # Flags de détection des out laps : tour en cours / tour terminé en attente de son temps
         self.was_in_pits_this_lap = False
+        self._pending_out_lap = False
+
+        # Incidents du tour terminé, figés à la ligne (ceux survenus pendant l'attente du temps vont au suivant)
+        self._pending_inc_delta = 0
+
+        # Infos du dernier tour terminé (horodatages, signal de confirmation, statistiques des accumulateurs)
+        self.last_lap_info: Optional[dict] = None
 
     #--------------------------------------------------------------------------------------------------------------#
-    # Réinitialise le validateur (retour au garage).                                                               #
+    # Réinitialise le validateur (changement de session).                                                          #
     #--------------------------------------------------------------------------------------------------------------#
     def reset(self):
         self.detector.reset()
+        discontinuities = self.detector.accumulators.get("discontinuities")
+        if discontinuities is not None:
+            discontinuities.detector.reset()
+        self._reset_lap_tracking()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Oublie le suivi du tour (incidents, flags out lap) ; le détecteur garde sa référence LapCompleted.           #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _reset_lap_tracking(self):
         self.initialized = False
         self.inc_at_lap_start = 0
         self.was_in_pits_this_lap = False
+        self._pending_out_lap = False
+        self._pending_inc_delta = 0
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # État complet du suivi (détecteur, accumulateurs, incidents, flags out lap), sérialisable en JSON : un        #
+    # enregistrement démarré en cours de session le porte dans son en-tête pour que le rejeu reparte du même état. #
+    #--------------------------------------------------------------------------------------------------------------#
+    def snapshot(self) -> dict:
+        return {
+            "detector": self.detector.snapshot(),
+            "initialized": self.initialized,
+            "inc_at_lap_start": self.inc_at_lap_start,
+            "was_in_pits_this_lap": self.was_in_pits_this_lap,
+            "pending_out_lap": self._pending_out_lap,
+            "pending_inc_delta": self._pending_inc_delta,
+        }
 
     #--------------------------------------------------------------------------------------------------------------#
-    # Analyse l'état télémétrique, détecte/valide un tour et retourne (status, lap_time, reason).                  #
+    # Reprend un état produit par `snapshot` (ValueError / TypeError si l'état est illisible).                     #
     #--------------------------------------------------------------------------------------------------------------#
-    def update(self, state: dict) -> tuple[str, float, Optional[str]]:
+    def restore(self, data: dict):
+        if not isinstance(data, dict) or not isinstance(data.get("detector"), dict):
+            raise ValueError("État du validateur illisible")
+        self.detector.restore(data["detector"])
+        self.initialized = bool(data.get("initialized"))
+        self.inc_at_lap_start = int(data.get("inc_at_lap_start") or 0)
+        self.was_in_pits_this_lap = bool(data.get("was_in_pits_this_lap"))
+        self._pending_out_lap = bool(data.get("pending_out_lap"))
+        self._pending_inc_delta = int(data.get("pending_inc_delta") or 0)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Analyse l'état télémétrique, détecte/valide un tour et retourne (status, lap_time, reason) ;                 #
+    # `reason` est une LapReason pour un tour invalide, None sinon.                                                #
+    #--------------------------------------------------------------------------------------------------------------#
+    def update(self, state: dict, now: Optional[float] = None) -> tuple[str, float, Optional[LapReason]]:
         lap_completed = int(state.get("LapCompleted", 0) or 0)
         surface = int(state.get("PlayerTrackSurface", 0) or 0)
         lap_time = float(state.get("LapLastLapTime", 0.0) or 0.0)
         inc_count = int(state.get("PlayerCarMyIncidentCount", 0) or 0)
+        car_lap_time = state.get("PlayerCarIdxLastLapTime")
 
         # Mémoriser le passage par les stands PENDANT le tour
         if surface in (1, 2):
             self.was_in_pits_this_lap = True
-        elif surface == 3 and self.was_in_pits_this_lap:
-            # Arrivée sur la piste après les stands : reset du flag pour le PROCHAIN tour,
-            # sauf si le premier tour n'a pas encore été détecté (changement 0→1 ignoré)
-            if self.detector.last_completed_lap > 0:
-                self.was_in_pits_this_lap = False
-
-        # Reset si retour pit/garage (après avoir été sur piste)
-        if surface == 1 and self.detector.has_left_pits:
-            self.reset()
+
+        # Cycle de vie du tour (table de transitions du détecteur)
+        lap_info = self.detector.detect(
+            lap_completed, lap_time, surface, now,
+            float(car_lap_time) if car_lap_time is not None else None,
+            state,
+        )
+        event = self.detector.last_event
+
+        # Retour pit/garage après avoir roulé, ou session relancée : tout repartir de zéro
+        if event in ("garage_return", "rewind"):
+            self._reset_lap_tracking()
             return "none", 0.0, None
 
-        # Session relancée (le compteur recule)
-        if lap_completed < self.detector.last_completed_lap:
-            self.reset()
+        # Saut de temps (replay) : le tour en cours est coupé là ; le tour partiel qui suit porte la discontinuité
+        discontinuities = self.detector.accumulators.get("discontinuities")
+        if discontinuities is not None and discontinuities.frame_kind == KIND_TIME_JUMP:
+            self.detector.split(lap_completed)
+            self._reset_lap_tracking()
             return "none", 0.0, None
 
         # Première arrivée en piste : prendre la baseline d'incidents
@@ -176,39 +401,29 @@ class LapValidator:
             self.inc_at_lap_start = inc_count
             self.initialized = True
 
-        # Détecter si un tour est terminé
-        lap_info = self.detector.detect(lap_completed, lap_time, surface)
+        # Ligne franchie : le tour terminé garde son flag out lap et ses incidents, le suivant repart de l'état actuel
+        if event == "new_lap":
+            self._pending_out_lap = self.was_in_pits_this_lap
+            self.was_in_pits_this_lap = surface in (1, 2)
+            self._pending_inc_delta = inc_count - self.inc_at_lap_start
+            self.inc_at_lap_start = inc_count
 
         if lap_info is None:
             return "none", 0.0, None
 
+        self.last_lap_info = lap_info
         detected_lap_time = lap_info["lap_time"]
-        timed_out = lap_info.get("timed_out", False)
-
-        # Incidents survenus pendant ce tour
-        lap_inc_delta = inc_count - self.inc_at_lap_start
 
-        # Mémoriser le flag out lap avant de le réinitialiser
-        was_out_lap = self.was_in_pits_this_lap
+        # Incidents survenus pendant ce tour (figés à la ligne)
+        lap_inc_delta = self._pending_inc_delta
 
         # Préparer le tour suivant
-        self.inc_at_lap_start = inc_count
-        self.was_in_pits_this_lap = False
-
-        # Déterminer status et reason
-        if detected_lap_time <= 0 or timed_out:
-            # Tour incomplet ou annulé
-            if was_out_lap:
-                return "invalid", detected_lap_time, "out_lap"
-            elif lap_inc_delta > 0:
-                return "invalid", detected_lap_time, f"flag_and_incidents:{lap_inc_delta}"
-            else:
-                return "invalid", detected_lap_time, None
-
-        elif lap_inc_delta > 0:
-            # Tour avec incidents
-            return "invalid", detected_lap_time, f"incidents:{lap_inc_delta}"
-
-        else:
-            # Tour valide
-            return "valid", detected_lap_time, None
+        self._pending_inc_delta = 0
+        was_out_lap = self._pending_out_lap
+        self._pending_out_lap = False
+
+        # Règles de validité, en une passe (un tour passé par les stands n'est jamais un record)
+        reason = self.rules.evaluate(lap_facts(lap_info, was_out_lap, lap_inc_delta))
+        if reason is not None:
+            return "invalid", detected_lap_time, reason
+        return "valid", detected_lap_time, None
@@ -0,0 +1,217 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/leaderboard.py                                                                     #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Index des records en mémoire : pour chaque combo (trackID, carID), les meilleurs tours triés   #
+#               par temps (mis à jour par bisect à chaque record) ; top N, record absolu et rang sans tri.     #
+#               Index inverse joueur → combos. Joueurs identifiés par un entier (table des noms).              #
+################################################################################################################
+
+
+import bisect
+from typing import Optional
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Table des noms de joueurs : chaque nom reçoit un entier à sa première apparition (jamais réattribué). Les    #
+# index ne manipulent que ces entiers ; les noms ne sont résolus que pour l'UI et le stockage.                 #
+#--------------------------------------------------------------------------------------------------------------#
+class NameTable:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Crée une table vide.                                                                                         #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self):
+        self._names: list[str] = []
+        self._ids: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Identifiant d'un nom (ajouté à la table s'il est nouveau).                                                   #
+    #--------------------------------------------------------------------------------------------------------------#
+    def intern(self, name: str) -> int:
+        pid = self._ids.get(name)
+        if pid is None:
+            pid = self._ids[name] = len(self._names)
+            self._names.append(name)
+        return pid
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Identifiant d'un nom déjà vu (None sinon ; la table n'est pas modifiée).                                     #
+    #--------------------------------------------------------------------------------------------------------------#
+    def get(self, name: str) -> Optional[int]:
+        return self._ids.get(name)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Nom d'un identifiant.                                                                                        #
+    #--------------------------------------------------------------------------------------------------------------#
+    def name(self, pid: int) -> str:
+        return self._names[pid]
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Classement d'un combo : liste triée de (temps, id joueur) et temps courant de chaque joueur.                 #
+#--------------------------------------------------------------------------------------------------------------#
+class Leaderboard:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Crée un classement vide.                                                                                     #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self):
+        self._sorted: list[tuple[float, int]] = []
+        self._times: dict[int, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Place (ou déplace) un joueur à son nouveau temps : retrait de l'ancienne position puis insertion triée.      #
+    #--------------------------------------------------------------------------------------------------------------#
+    def update(self, pid: int, lap_time: float):
+        self.remove(pid)
+        if not lap_time or lap_time <= 0:
+            return
+        lap_time = float(lap_time)
+        bisect.insort(self._sorted, (lap_time, pid))
+        self._times[pid] = lap_time
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Retire un joueur du classement (sans effet s'il n'y figure pas).                                             #
+    #--------------------------------------------------------------------------------------------------------------#
+    def remove(self, pid: int):
+        old = self._times.pop(pid, None)
+        if old is None:
+            return
+        i = bisect.bisect_left(self._sorted, (old, pid))
+        if i < len(self._sorted) and self._sorted[i] == (old, pid):
+            del self._sorted[i]
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Temps d'un joueur (None s'il n'a pas de temps sur ce combo).                                                 #
+    #--------------------------------------------------------------------------------------------------------------#
+    def time(self, pid: int) -> Optional[float]:
+        return self._times.get(pid)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Meilleur temps du combo (None si aucun).                                                                     #
+    #--------------------------------------------------------------------------------------------------------------#
+    def best(self) -> Optional[float]:
+        return self._sorted[0][0] if self._sorted else None
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Top N [(temps, id joueur)], du meilleur au moins bon.                                                        #
+    #--------------------------------------------------------------------------------------------------------------#
+    def top(self, limit: int = 3) -> list[tuple[float, int]]:
+        return self._sorted[:max(0, int(limit))]
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Rang d'un joueur (1 = record absolu ; None s'il n'a pas de temps), par recherche dichotomique.               #
+    #--------------------------------------------------------------------------------------------------------------#
+    def rank(self, pid: int) -> Optional[int]:
+        t = self._times.get(pid)
+        if t is None:
+            return None
+        return bisect.bisect_left(self._sorted, (t, pid)) + 1
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Classements de tous les combos, indexés par le tuple (trackID, carID).                                       #
+#--------------------------------------------------------------------------------------------------------------#
+class LeaderboardIndex:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Crée un index vide (voir `rebuild`).                                                                         #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self):
+        self._boards: dict[tuple[int, int], Leaderboard] = {}
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Reconstruit tout l'index depuis des lignes [(combo, id joueur, temps)] (chargement, changement externe).     #
+    #--------------------------------------------------------------------------------------------------------------#
+    def rebuild(self, rows):
+        grouped: dict[tuple[int, int], list] = {}
+        for combo, pid, lap_time in rows:
+            if lap_time and lap_time > 0:
+                grouped.setdefault(combo, []).append((float(lap_time), pid))
+        boards: dict[tuple[int, int], Leaderboard] = {}
+        for combo, times in grouped.items():
+            times.sort()
+            board = boards[combo] = Leaderboard()
+            board._sorted = times
+            board._times = {pid: t for t, pid in times}
+        self._boards = boards
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Classement d'un combo (None s'il n'a aucun temps).                                                           #
+    #--------------------------------------------------------------------------------------------------------------#
+    def get(self, combo: tuple[int, int]) -> Optional[Leaderboard]:
+        return self._boards.get(combo)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Met à jour le temps d'un joueur pour un combo (nouveau record personnel).                                    #
+    #--------------------------------------------------------------------------------------------------------------#
+    def update(self, combo: tuple[int, int], pid: int, lap_time: float):
+        board = self._boards.get(combo)
+        if board is None:
+            board = self._boards[combo] = Leaderboard()
+        board.update(pid, lap_time)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Retire le temps d'un joueur d'un combo (suppression du joueur).                                              #
+    #--------------------------------------------------------------------------------------------------------------#
+    def remove(self, combo: tuple[int, int], pid: int):
+        board = self._boards.get(combo)
+        if board is not None:
+            board.remove(pid)
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Index inverse joueur → combos où il a un record, insensible à la casse (clé : nom normalisé, puis id du nom  #
+# exact tel qu'écrit dans les records → ensemble des combos (trackID, carID)).                                 #
+#--------------------------------------------------------------------------------------------------------------#
+class PlayerIndex:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Crée un index vide (voir `rebuild`).                                                                         #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self):
+        self._players: dict[str, dict[int, set]] = {}
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Nom normalisé (comparaison insensible à la casse, comme DataStore.delete_player).                            #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def _norm(name: str) -> str:
+        return str(name).strip().lower()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Reconstruit l'index depuis des lignes [(combo, id joueur, nom exact)].                                       #
+    #--------------------------------------------------------------------------------------------------------------#
+    def rebuild(self, rows):
+        self._players = {}
+        for combo, pid, name in rows:
+            self.add(combo, pid, name)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Note qu'un joueur (id et nom exact) a un record sur un combo.                                                #
+    #--------------------------------------------------------------------------------------------------------------#
+    def add(self, combo: tuple[int, int], pid: int, name: str):
+        self._players.setdefault(self._norm(name), {}).setdefault(pid, set()).add(combo)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Records d'un joueur, toutes casses confondues : [(id joueur, combo)], en O(nombre de records).               #
+    #--------------------------------------------------------------------------------------------------------------#
+    def records(self, name: str) -> list[tuple[int, tuple[int, int]]]:
+        spellings = self._players.get(self._norm(name), {})
+        return [(pid, combo) for pid, combos in spellings.items() for combo in combos]
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Retire un joueur de l'index ; retourne ses records [(id joueur, combo)].                                     #
+    #--------------------------------------------------------------------------------------------------------------#
+    def remove(self, name: str) -> list[tuple[int, tuple[int, int]]]:
+        removed = self.records(name)
+        self._players.pop(self._norm(name), None)
+        return removed
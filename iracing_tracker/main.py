@@ -1,17 +1,20 @@
 ################################################################################################################
 # Projet : iRacing Tracker                                                                                     #
 # Fichier : iracing_tracker/main.py                                                                            #
-# Date de modification : 16.06.2026                                                                            #
+# Date de modification : 18.10.2026                                                                            #
 # Auteur : Nicolas Schneeberger                                                                                #
 # Description : Coordonne la collecte iRacing, la validation des tours et l'interface graphique.               #
 ################################################################################################################
 
+import math
 import time
 import queue
 import threading
+from typing import Optional
 
 from iracing_tracker.irsdk_client import IRClient
-from iracing_tracker.lap_validator import LapValidator
+from iracing_tracker.lap_validator import LapValidator, STATE_PENDING
+from iracing_tracker.field_lap_detector import FieldLapDetector
 from iracing_tracker.data_store import DataStore
 from iracing_tracker.ui import TrackerUI
 
@@ -19,16 +22,46 @@ from iracing_tracker.session_manager import SessionManager
 from iracing_tracker.telemetry_reader import TelemetryReader
 from iracing_tracker.record_manager import RecordManager, format_lap_time
 from iracing_tracker.ui_bridge import UIBridge
+from iracing_tracker.session_recorder import SessionRecorder
+from iracing_tracker.incident_heat import IncidentHeatIndex, format_incident_events
+from iracing_tracker.stint_tracker import StintTracker, format_stint_summary
+from iracing_tracker.lap_projection import LapProjector, ReferenceLapStore, REFERENCE_PB, format_projection
+from iracing_tracker.write_behind import format_write_behind_stats
+from iracing_tracker.lap_history import LapHistory, format_history_summary
+
+
+# Nombre minimal de tours valides du joueur sur le combo avant d'annoncer la place d'un tour (« top X % »)
+LAP_PERCENTILE_MIN_LAPS = 10
 
 
 #--------------------------------------------------------------------------------------------------------------#
 # Boucle principale (thread worker) : lecture télémétrie → validation des tours → mise à jour de l'UI.         #
 #--------------------------------------------------------------------------------------------------------------#
-def loop(ir_client, ui_bridge, validator, session_manager, telemetry_reader,
-         record_manager, selected_player_ref, sel_lock, runtime_flags, flags_lock):
+def loop(ir_client, ui_bridge, validator, field_detector, session_manager, telemetry_reader,
+         record_manager, recorder, incident_heat, stint_tracker, projector, reference_laps, lap_history,
+         selected_player_ref, sel_lock, runtime_flags, flags_lock, stop_event):
     last_laps_feed = []
+    projection_key = None
+    session_started = None
+    best_shown = None  # ((joueur, trackID, carID), version des records) du record perso affiché
+    field_table = None  # Tableau des tours du plateau mis en forme (refait seulement après un tour terminé)
+
+    while not stop_event.is_set():
+        # 0) Joueurs supprimés depuis la fenêtre des joueurs : purge de leurs seuls records et courbes
+        with flags_lock:
+            deleted_players, runtime_flags["deleted_players"] = runtime_flags.get("deleted_players") or [], []
+        for name in deleted_players:
+            try:
+                removed = record_manager.delete_player(name)
+                reference_laps.delete(removed)
+                ui_bridge.log(f"Joueur {name} supprimé ({len(removed)} records)")
+            except Exception as e:
+                ui_bridge.log(f"Erreur suppression joueur : {e}")
+            projection_key = None
+            if session_manager.context.is_ready:
+                ui_bridge.update_ranking(record_manager.get_ranking(
+                    session_manager.context.track_id, session_manager.context.car_id, limit=3))
 
-    while True:
         # 1) Lecture core en premier : CRITIQUE, c'est elle qui initialise la connexion iRSDK,
         #    donc elle DOIT précéder is_session_active().
         try:
@@ -38,11 +71,16 @@ def loop(ir_client, ui_bridge, validator, session_manager, telemetry_reader,
 
         # 2) Vérifier si une session est active (après la lecture core)
         if not session_manager.is_active():
-            _handle_session_inactive(ir_client, ui_bridge, validator, session_manager, telemetry_reader)
+            _handle_session_inactive(ir_client, ui_bridge, validator, field_detector, session_manager,
+                                     telemetry_reader, recorder, stint_tracker, projector)
+            projection_key = None
+            session_started = None
+            best_shown = None
+            field_table = None
             if last_laps_feed:
                 last_laps_feed.clear()
                 ui_bridge.update_last_laps([])
-            time.sleep(0.1)
+            stop_event.wait(0.1)
             continue
 
         # 3) Session active : effacer le message d'attente
@@ -65,9 +103,11 @@ def loop(ir_client, ui_bridge, validator, session_manager, telemetry_reader,
                         session_manager.context.track_id,
                         session_manager.context.car_id,
                     )
-                    # Forcer la MAJ du record affiché et recharger les records du disque
+                    # Forcer la MAJ du record affiché ; recharger les records seulement s'ils ont changé sur disque
                     ui_bridge.reset_coalescing()
-                    record_manager.reload()
+                    record_manager.refresh(force=True)
+                    best_shown = None
+                    session_started = int(time.time())
 
                 # Message « session démarrée » (une seule fois)
                 if session_manager.should_send_session_started_message():
@@ -96,9 +136,18 @@ def loop(ir_client, ui_bridge, validator, session_manager, telemetry_reader,
         except Exception as e:
             ui_bridge.log(f"Erreur lecture contexte : {e}")
 
+        # 4bis) Tours terminés de tout le plateau (tableaux CarIdx lus avec le core)
+        try:
+            field_events = field_detector.detect(state_core)
+            if field_events:
+                field_table = None
+        except Exception as e:
+            ui_bridge.log(f"Erreur détection plateau : {e}")
+
         # 5) Lecture debug (si la zone est activée)
         with flags_lock:
             debug_enabled = bool(runtime_flags.get("debug_enabled", False))
+            projector.mode = runtime_flags.get("projection_reference", REFERENCE_PB)
 
         if debug_enabled:
             debug_data = telemetry_reader.read_debug()
@@ -107,6 +156,23 @@ def loop(ir_client, ui_bridge, validator, session_manager, telemetry_reader,
                 merged_debug = {**state_core, **debug_data}
                 merged_debug["is_waiting_session_msg_sent"] = session_manager.is_waiting_session_msg_sent
                 merged_debug["session_start_msg_sent"] = session_manager.session_start_msg_sent
+                if field_table is None:
+                    field_table = _format_field_lap_table(field_detector.lap_table())
+                merged_debug["FieldLapTable"] = field_table
+                merged_debug["LapStateMachine"] = _format_lap_state_machine(validator.detector)
+                merged_debug["IncidentHotspots"] = _format_incident_hotspots(
+                    incident_heat.hotspots(session_manager.context.track_id))
+                merged_debug["Persistence"] = format_write_behind_stats(record_manager.persistence_stats())
+                with sel_lock:
+                    debug_player = selected_player_ref["name"]
+                merged_debug["LapHistory"] = format_history_summary(lap_history.summary(
+                    session_manager.context.track_id, session_manager.context.car_id, debug_player))
+                player_stats = record_manager.get_player_stats(debug_player)
+                merged_debug["PlayerRecords"] = (
+                    f"{player_stats['records']} records, {player_stats['absolute']} absolus"
+                    + (f", rang moyen {player_stats['avg_rank']:.1f}" if player_stats["avg_rank"] else ""))
+                merged_debug["LapStats"] = _format_lap_stats(record_manager.get_lap_stats(
+                    debug_player, session_manager.context.track_id, session_manager.context.car_id))
                 ui_bridge.update_debug(merged_debug)
 
         # 5bis) Horloge de session → UI (valeur core 10 Hz, coalescée à 1 s côté UI)
@@ -119,23 +185,29 @@ def loop(ir_client, ui_bridge, validator, session_manager, telemetry_reader,
         surface = int(state_core.get("PlayerTrackSurface") or 0)
         ui_bridge.set_player_menu_state(surface in (1, -1))
 
-        # 7) Mise à jour du record personnel du joueur sélectionné
+        # 7) Mise à jour du record personnel du joueur sélectionné (après un éventuel changement externe,
+        #    ex. joueur supprimé depuis la fenêtre des joueurs ; contrôle espacé, simple stat des fichiers)
+        try:
+            record_manager.refresh()
+        except Exception as e:
+            ui_bridge.log(f"Erreur rechargement des records : {e}")
         with sel_lock:
             player = selected_player_ref["name"]
 
         if player and player != "---" and session_manager.context.is_ready:
-            best_text = record_manager.get_personal_best_formatted(
-                player,
-                session_manager.context.track_id,
-                session_manager.context.car_id
-            )
-            ui_bridge.update_player_best(best_text)
+            # Rien à redemander tant que joueur, combo et version des records n'ont pas changé
+            best_key = (player, session_manager.context.track_id, session_manager.context.car_id)
+            if best_shown != (best_key, record_manager.version):
+                best_text, version = record_manager.get_personal_best_text(*best_key)
+                ui_bridge.update_player_best(best_text)
+                best_shown = (best_key, version)
         else:
             ui_bridge.update_player_best("---")
+            best_shown = None
 
         # 8) Validation du tour
         if not player or player == "---":
-            time.sleep(0.1)
+            stop_event.wait(0.1)
             continue
 
         lap_state = {
@@ -143,18 +215,132 @@ def loop(ir_client, ui_bridge, validator, session_manager, telemetry_reader,
             "PlayerTrackSurface": state_core.get("PlayerTrackSurface"),
             "LapLastLapTime": state_core.get("LapLastLapTime"),
             "PlayerCarMyIncidentCount": state_core.get("PlayerCarMyIncidentCount"),
+            "PlayerCarIdxLastLapTime": _player_car_value(state_core.get("CarIdxLastLapTime"),
+                                                         session_manager.context.player_car_idx),
+            # Alimentent les accumulateurs par tour (vitesse, incidents positionnés, voie des stands)
+            "LapDistPct": state_core.get("LapDistPct"),
+            "Speed": state_core.get("Speed"),
+            "OnPitRoad": state_core.get("OnPitRoad"),
+            "SessionTime": state_core.get("SessionTime"),
+            "SessionFlags": state_core.get("SessionFlags"),
         }
 
-        status, lap_time, reason = validator.update(lap_state)
+        # Enregistrement de session ouvert avant de valider la frame : son en-tête porte l'état du validateur,
+        # pour qu'un enregistrement démarré en cours de session (changement de joueur) se rejoue à l'identique
+        if session_manager.context.is_ready:
+            try:
+                recorder.ensure(session_manager.context.track_id, session_manager.context.car_id, player,
+                                validator.snapshot)
+            except Exception as e:
+                ui_bridge.log(f"Erreur enregistrement session : {e}")
+                recorder.stop()
+
+        now = time.time()
+        status, lap_time, reason = validator.update(lap_state, now)
+
+        # 8quinquies) Tour projeté : courbe PB reprise du cache au changement de combo/joueur, projection par frame
+        if session_manager.context.is_ready:
+            key = (session_manager.context.track_id, session_manager.context.car_id, player)
+            if key != projection_key:
+                projection_key = key
+                projector.reset()
+                projector.personal = reference_laps.get(*key)
+        projected = projector.update(lap_state["LapCompleted"], lap_state["LapDistPct"], lap_state["SessionTime"],
+                                     int(lap_state.get("PlayerTrackSurface") or 0))
+        reference = projector.reference()
+        ui_bridge.update_projection(format_projection(projected, reference.lap_time if reference else None))
+        lap_reference = None
+        if status != "none":
+            lap_reference = projector.lap_result(int(lap_state.get("LapCompleted") or 0), status, lap_time)
+
+        lap_stats = (validator.last_lap_info or {}).get("stats") if status != "none" else None
+        incident_events = ((lap_stats or {}).get("incidents") or {}).get("events") or []
+        # Horodatages de latence du tour (« persisted » envoyé à part, au commit du record s'il y en a un)
+        latency_stamps = None
+        if status != "none" and validator.last_lap_info:
+            latency_stamps = {
+                "crossed": validator.last_lap_info.get("crossed_at"),
+                "validated": validator.last_lap_info.get("confirmed_at"),
+            }
+
+        # 8ter) Chronologie des incidents du tour → index des zones d'incidents du circuit
+        if incident_events and session_manager.context.is_ready:
+            try:
+                incident_heat.add_events(session_manager.context.track_id, incident_events)
+            except Exception as e:
+                ui_bridge.log(f"Erreur index des incidents : {e}")
+
+        # 8bis) Enregistrement de la télémétrie de validation (rejouable hors ligne)
+        if session_manager.context.is_ready:
+            try:
+                recorder.record_frame(now, lap_state)
+                if status != "none":
+                    recorder.record_lap(now, int(lap_state.get("LapCompleted") or 0), status, lap_time, reason,
+                                        lap_stats)
+            except Exception as e:
+                ui_bridge.log(f"Erreur enregistrement session : {e}")
+                recorder.stop()
+
+        # 8sexies) Historique complet des tours (valides et invalides, avec leur raison)
+        if status != "none" and session_manager.context.is_ready:
+            try:
+                lap_history.append(now, session_started or int(now), session_manager.context.track_id,
+                                   session_manager.context.car_id, player,
+                                   int(lap_state.get("LapCompleted") or 0), lap_time, status == "valid",
+                                   reason.code if reason is not None else None,
+                                   ((lap_stats or {}).get("incidents") or {}).get("delta", 0))
+            except Exception as e:
+                ui_bridge.log(f"Erreur historique des tours : {e}")
+            # Statistiques agrégées (joueur / combo / global), à jour sans relire l'historique
+            try:
+                record_manager.record_lap(player, session_manager.context.track_id, session_manager.context.car_id,
+                                          lap_time, status == "valid", reason.code if reason is not None else None)
+            except Exception as e:
+                ui_bridge.log(f"Erreur statistiques des tours : {e}")
+
+        # 8quater) Relais (sortie → entrée des stands) : stats glissantes, résumé persisté en fin de relais
+        if status != "none":
+            stint_tracker.add_lap(status, lap_time)
+        stint_context = {
+            "track_id": session_manager.context.track_id,
+            "car_id": session_manager.context.car_id,
+            "player": player,
+        }
+        was_active = stint_tracker.active
+        finished_stint = stint_tracker.update(int(lap_state.get("PlayerTrackSurface") or 0),
+                                              validator.detector.last_event, now, stint_context)
+        if finished_stint:
+            _persist_stint(ui_bridge, finished_stint)
+        if status != "none" or was_active != stint_tracker.active:
+            ui_bridge.update_stint(stint_tracker.summary(now))
 
         # 9) Sauvegarde si le tour est valide
         if status == "valid" and session_manager.context.is_ready:
-            is_personal, is_absolute = record_manager.save_lap(
-                player,
-                session_manager.context.track_id,
-                session_manager.context.car_id,
-                lap_time
-            )
+            on_persisted = None
+            if latency_stamps is not None:
+                def on_persisted(at, validated=latency_stamps.get("validated")):
+                    ui_bridge.report_lap_persisted({"validated": validated, "persisted": at})
+            try:
+                is_personal, is_absolute = record_manager.save_lap(
+                    player,
+                    session_manager.context.track_id,
+                    session_manager.context.car_id,
+                    lap_time,
+                    lap_stats,
+                    on_persisted=on_persisted
+                )
+            except Exception as e:
+                ui_bridge.log(f"Erreur sauvegarde du tour : {e}")
+                is_personal = is_absolute = False
+
+            # Nouveau record personnel : sa courbe devient la référence PB du tour projeté
+            if is_personal and lap_reference is not None:
+                projector.personal = lap_reference
+                try:
+                    reference_laps.save(session_manager.context.track_id, session_manager.context.car_id, player,
+                                        lap_reference)
+                except Exception as e:
+                    ui_bridge.log(f"Erreur sauvegarde courbe de référence : {e}")
 
             # Log et bannière selon le type de record
             if is_absolute:
@@ -165,6 +351,17 @@ def loop(ir_client, ui_bridge, validator, session_manager, telemetry_reader,
                 ui_bridge.show_banner_message("personal_record")
             else:
                 suffix = ""
+            if is_personal:
+                rank = record_manager.get_rank(player, session_manager.context.track_id,
+                                               session_manager.context.car_id)
+                if rank:
+                    suffix += f" - {rank[0]}/{rank[1]} au classement"
+            else:
+                # Place du tour parmi tous ceux du joueur sur ce combo (distribution des temps)
+                percentile = record_manager.get_lap_percentile(player, session_manager.context.track_id,
+                                                               session_manager.context.car_id, lap_time)
+                if percentile and percentile[1] >= LAP_PERCENTILE_MIN_LAPS:
+                    suffix += f" - top {max(1, math.ceil(percentile[0] * 100))} % de vos tours"
             ui_bridge.log(f"Nouveau tour pour {player} : {format_lap_time(lap_time)}{suffix}")
 
             # Classement en temps réel
@@ -184,53 +381,160 @@ def loop(ir_client, ui_bridge, validator, session_manager, telemetry_reader,
             ui_bridge.update_last_laps(last_laps_feed)
 
         elif status == "invalid":
-            # Messages selon la raison d'invalidité
-            if reason == "out_lap":
+            # Messages selon la raison d'invalidité (LapReason : code de la règle + mesure)
+            try:
+                lap_no = int(state_core.get("LapCompleted") or 0)
+            except Exception:
+                lap_no = 0
+            code = reason.code if reason is not None else None
+            if code == "out_lap":
                 ui_bridge.log(f"Nouveau tour pour {player} : tour sortie des stands")
-                try:
-                    lap_no = int(state_core.get("LapCompleted") or 0)
-                except Exception:
-                    lap_no = 0
                 last_laps_feed.append(f"{lap_no}\tTour sortie des stands\t{player}")
-            elif reason and reason.startswith("flag_and_incidents:"):
-                x_count = reason.split(":")[1]
-                ui_bridge.log(f"Nouveau tour pour {player} : tour invalide (drapeau - {x_count}x)")
-                try:
-                    lap_no = int(state_core.get("LapCompleted") or 0)
-                except Exception:
-                    lap_no = 0
-                last_laps_feed.append(f"{lap_no}\tTour invalide ({x_count}x)\t{player}")
-            elif reason and reason.startswith("incidents:"):
-                x_count = reason.split(":")[1]
-                ui_bridge.log(f"Nouveau tour pour {player} : tour invalide ({x_count}x)")
-                try:
-                    lap_no = int(state_core.get("LapCompleted") or 0)
-                except Exception:
-                    lap_no = 0
-                last_laps_feed.append(f"{lap_no}\tTour invalide ({x_count}x)\t{player}")
+            elif code == "flag_and_incidents":
+                ui_bridge.log(f"Nouveau tour pour {player} : tour invalide (drapeau - {reason.incidents}x)"
+                              f"{_incident_positions_suffix(incident_events)}")
+                last_laps_feed.append(f"{lap_no}\tTour invalide ({reason.incidents}x)\t{player}")
+            elif code == "incidents":
+                ui_bridge.log(f"Nouveau tour pour {player} : tour invalide ({reason.incidents}x)"
+                              f"{_incident_positions_suffix(incident_events)}")
+                last_laps_feed.append(f"{lap_no}\tTour invalide ({reason.incidents}x)\t{player}")
+            elif code == "black_flag":
+                ui_bridge.log(f"Nouveau tour pour {player} : tour invalide (drapeau noir)")
+                last_laps_feed.append(f"{lap_no}\tTour invalide (drapeau noir)\t{player}")
+            elif code == "tow":
+                ui_bridge.log(f"Nouveau tour pour {player} : tour invalide (remorquage)")
+                last_laps_feed.append(f"{lap_no}\tTour invalide (remorquage)\t{player}")
+            elif code == "discontinuity":
+                ui_bridge.log(f"Nouveau tour pour {player} : tour invalide (discontinuité : {reason.value})")
+                last_laps_feed.append(f"{lap_no}\tTour invalide (discontinuité)\t{player}")
+            elif code == "off_track":
+                ui_bridge.log(f"Nouveau tour pour {player} : tour invalide (hors piste {reason.value:.1f} s)")
+                last_laps_feed.append(f"{lap_no}\tTour invalide (hors piste)\t{player}")
             else:
                 ui_bridge.log(f"Nouveau tour pour {player} : tour invalide")
-                try:
-                    lap_no = int(state_core.get("LapCompleted") or 0)
-                except Exception:
-                    lap_no = 0
                 last_laps_feed.append(f"{lap_no}\tTour invalide\t{player}")
             ui_bridge.update_last_laps(last_laps_feed)
 
-        time.sleep(0.1)
+        # 10) Latence du tour : ligne franchie → validé (l'UI ajoute « affiché »), envoyée dès maintenant ; l'écriture
+        #     d'un record (validé → enregistré) arrive à part, au commit
+        if latency_stamps is not None:
+            ui_bridge.report_lap_latency(latency_stamps)
+
+        # Cadence rapide à l'approche de la ligne et tant qu'un tour attend son temps
+        try:
+            lap_pct = float(state_core.get("LapDistPct") or 0.0)
+        except (TypeError, ValueError):
+            lap_pct = 0.0
+        if validator.detector.state == STATE_PENDING or lap_pct >= TelemetryReader.FAST_POLL_LAP_PCT:
+            stop_event.wait(TelemetryReader.FAST_CORE_INTERVAL)
+        else:
+            stop_event.wait(0.1)
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Valeur d'un tableau CarIdx pour la voiture du joueur (None si index ou tableau indisponible).                #
+#--------------------------------------------------------------------------------------------------------------#
+def _player_car_value(values, car_idx):
+    if values is None or car_idx is None:
+        return None
+    try:
+        return values[car_idx]
+    except (IndexError, TypeError):
+        return None
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Sauvegarde le résumé d'un relais terminé et le résume dans les logs.                                         #
+#--------------------------------------------------------------------------------------------------------------#
+def _persist_stint(ui_bridge, summary: dict):
+    try:
+        DataStore.append_stint(f"{summary.get('track_id')}|{summary.get('car_id')}", summary)
+    except Exception as e:
+        ui_bridge.log(f"Erreur sauvegarde relais : {e}")
+    ui_bridge.log(f"Fin du {format_stint_summary(summary)} ({summary.get('player')})")
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Suffixe de log listant la position des incidents du tour (« : 2x à 34 %, 2x à 78 % »), vide si inconnue.     #
+#--------------------------------------------------------------------------------------------------------------#
+def _incident_positions_suffix(events: list) -> str:
+    text = format_incident_events(events)
+    return f" : {text}" if text else ""
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Met en forme les zones d'incidents du circuit pour la zone debug (une ligne par zone).                       #
+#--------------------------------------------------------------------------------------------------------------#
+def _format_incident_hotspots(hotspots: list[dict]) -> str:
+    if not hotspots:
+        return "---"
+    return "\n" + "\n".join(
+        f"{h['start'] * 100:.0f}-{h['end'] * 100:.0f} %  {h['points']}x  ({h['share'] * 100:.0f} %)"
+        for h in hotspots
+    )
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Met en forme les statistiques agrégées d'un joueur sur le combo pour la zone debug.                          #
+#--------------------------------------------------------------------------------------------------------------#
+def _format_lap_stats(stats: Optional[dict]) -> str:
+    if not stats or not stats["laps"]:
+        return "aucun tour"
+    minutes = stats["driving_time"] / 60.0
+    text = f"{stats['valid']} valides / {stats['invalid']} invalides, {minutes:.0f} min de roulage"
+    if stats["mean"] is not None:
+        text += f"  moy {format_lap_time(stats['mean'])} (σ {stats['stdev']:.2f})"
+    if stats["median"] is not None:
+        text += f"  médiane {format_lap_time(stats['median'])}"
+    if stats["trend"] is not None:
+        text += f"  tendance {stats['trend']:+.2f} s"
+    return text
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Met en forme le tableau des tours du plateau pour la zone debug (une ligne par voiture).                     #
+#--------------------------------------------------------------------------------------------------------------#
+def _format_field_lap_table(rows: list[dict]) -> str:
+    lines = [
+        f"#{r['car_idx']:02d}  {r['laps']} tours  dernier {format_lap_time(r['last'])}  meilleur {format_lap_time(r['best'])}"
+        for r in rows
+    ]
+    return "\n" + "\n".join(lines) if lines else "---"
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Met en forme le détecteur de tours pour la zone debug (état, temps par état, compteurs de transitions).      #
+#--------------------------------------------------------------------------------------------------------------#
+def _format_lap_state_machine(detector) -> str:
+    times = "  ".join(f"{state} {secs:.0f}s" for state, secs in detector.time_in_state.items())
+    lines = [f"état {detector.state}  ({times})"]
+    for (src, event, dst), count in sorted(detector.transition_counts.items()):
+        lines.append(f"{src} --{event}--> {dst} : {count}")
+    return "\n" + "\n".join(lines)
 
 
 #--------------------------------------------------------------------------------------------------------------#
 # Gère l'absence de session : message d'attente, reset complet (validator, télémétrie, contexte, UI), shutdown iRSDK.#
 #--------------------------------------------------------------------------------------------------------------#
-def _handle_session_inactive(ir_client, ui_bridge, validator, session_manager, telemetry_reader):
+def _handle_session_inactive(ir_client, ui_bridge, validator, field_detector, session_manager,
+                             telemetry_reader, recorder, stint_tracker, projector):
     if session_manager.should_send_waiting_message():
         ui_bridge.log("En attente du démarrage d'une session…")
         ui_bridge.show_banner_message("waiting")
         session_manager.mark_waiting_message_sent()
 
+        # Fin de session : le relais en cours est clos et sauvegardé
+        finished_stint = stint_tracker.end(time.time())
+        if finished_stint:
+            _persist_stint(ui_bridge, finished_stint)
+        stint_tracker.reset()
+        ui_bridge.update_stint(None)
+
         # Reset de l'état interne
         validator.reset()
+        field_detector.reset()
+        projector.reset()
+        recorder.stop()
         telemetry_reader.reset_throttling()
         ui_bridge.reset_coalescing()
         session_manager.reset_context()
@@ -240,6 +544,7 @@ def _handle_session_inactive(ir_client, ui_bridge, validator, session_manager, t
         ui_bridge.update_context("---", "---")
         ui_bridge.update_session_time(None)
         ui_bridge.update_player_best("-:--.---")
+        ui_bridge.update_projection(format_projection(None, None))
         ui_bridge.update_debug({})
 
         # Shutdown iRSDK pour ne pas continuer à lire l'ancien contexte
@@ -258,16 +563,31 @@ def _handle_session_inactive(ir_client, ui_bridge, validator, session_manager, t
 def main():
     # Composants de base
     ir_client = IRClient()
-    validator = LapValidator()
+    rules_error = None
+    try:
+        validator = LapValidator(DataStore.load_lap_rules())
+    except (ValueError, TypeError, AttributeError) as e:
+        # Configuration des règles invalide : règles par défaut (signalé dans les logs une fois l'UI prête)
+        validator = LapValidator()
+        rules_error = e
+    field_detector = FieldLapDetector()
     players = DataStore.load_players()
 
     # Managers
     session_manager = SessionManager(ir_client)
     telemetry_reader = TelemetryReader(ir_client)
     record_manager = RecordManager()
+    recorder = SessionRecorder()
+    incident_heat = IncidentHeatIndex()
+    stint_tracker = StintTracker()
+    projector = LapProjector()
+    reference_laps = ReferenceLapStore()
+    lap_history = LapHistory()
 
     # UI
     ui = TrackerUI(players, lambda p: None)
+    if rules_error is not None:
+        ui.add_log(f"Règles de validité invalides ({rules_error}) : règles par défaut utilisées")
 
     # Pont UI (queue worker → UI)
     ui_event_queue = queue.Queue()
@@ -275,7 +595,8 @@ def main():
     ui.bind_event_queue(ui_event_queue)
 
     # Flag debug partagé (protégé par un lock)
-    runtime_flags = {"debug_enabled": ui.debug_visible.get()}
+    runtime_flags = {"debug_enabled": ui.debug_visible.get(), "projection_reference": REFERENCE_PB,
+                     "deleted_players": []}
     flags_lock = threading.Lock()
 
     def on_debug_toggle(visible: bool):
@@ -284,6 +605,20 @@ def main():
 
     ui.set_on_debug_toggle(on_debug_toggle)
 
+    # Référence du tour projeté (record personnel / meilleur tour de la session)
+    def on_reference_change(mode: str):
+        with flags_lock:
+            runtime_flags["projection_reference"] = mode
+
+    ui.set_on_reference_change(on_reference_change)
+
+    # Suppression d'un joueur : players.json est mis à jour par la fenêtre, ses records par le worker
+    def on_player_delete(name: str):
+        with flags_lock:
+            runtime_flags["deleted_players"].append(name)
+
+    ui.set_on_player_delete(on_player_delete)
+
     # Joueur sélectionné (état partagé thread-safe)
     selected_player = {"name": players[0] if players else "---"}
     sel_lock = threading.Lock()
@@ -295,12 +630,14 @@ def main():
 
     ui.set_on_player_change(on_player_change)
 
-    # Lancement du thread worker (daemon)
+    # Lancement du thread worker (daemon, arrêté par stop_event à la fermeture de la fenêtre)
+    stop_event = threading.Event()
     t = threading.Thread(
         target=loop,
         args=(
-            ir_client, ui_bridge, validator, session_manager, telemetry_reader,
-            record_manager, selected_player, sel_lock, runtime_flags, flags_lock
+            ir_client, ui_bridge, validator, field_detector, session_manager, telemetry_reader,
+            record_manager, recorder, incident_heat, stint_tracker, projector, reference_laps, lap_history,
+            selected_player, sel_lock, runtime_flags, flags_lock, stop_event
         ),
         daemon=True
     )
@@ -309,6 +646,12 @@ def main():
     # Boucle Qt (thread principal)
     ui.mainloop()
 
+    # Arrêt : le worker termine son tour de boucle (plus aucune écriture de record ni de statistiques), puis les
+    # records en attente sont validés et le stockage fermé
+    stop_event.set()
+    t.join(timeout=5.0)
+    record_manager.close()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,80 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/name_catalog.py                                                                    #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Catalogue persistant des noms de circuits et de voitures par ID (name_catalog.json), rempli à  #
+#               chaque contexte vu en session : les records se libellent sans télémétrie.                      #
+################################################################################################################
+
+from typing import Optional
+
+from iracing_tracker.data_store import DataStore
+from iracing_tracker.sqlite_store import split_combo_key
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Noms des circuits (avec configuration) et des voitures par ID. Le fichier n'est lu qu'au premier accès, puis #
+# tenu en mémoire ; il n'est réécrit que lorsqu'un nom est nouveau ou a changé.                                #
+#--------------------------------------------------------------------------------------------------------------#
+class NameCatalog:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Crée le catalogue (sans lecture disque : voir `_names`).                                                     #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self):
+        self._tracks: Optional[dict[int, str]] = None
+        self._cars: Optional[dict[int, str]] = None
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Tables {ID: nom} des circuits et des voitures, chargées à la première demande.                               #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _names(self) -> tuple[dict[int, str], dict[int, str]]:
+        if self._tracks is None:
+            catalog = DataStore.load_name_catalog()
+            self._tracks = {int(k): v for k, v in catalog["tracks"].items() if k.lstrip("-").isdigit()}
+            self._cars = {int(k): v for k, v in catalog["cars"].items() if k.lstrip("-").isdigit()}
+        return self._tracks, self._cars
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Note les noms d'un contexte de session ; réécrit le fichier si l'un d'eux est nouveau ou a changé.           #
+    # Retourne True si le catalogue a été modifié.                                                                 #
+    #--------------------------------------------------------------------------------------------------------------#
+    def remember(self, track_id: Optional[int], track_name: str, car_id: Optional[int], car_name: str) -> bool:
+        tracks, cars = self._names()
+        changed = False
+        for names, key, name in ((tracks, track_id, track_name), (cars, car_id, car_name)):
+            if key is None or not name or name == "---":
+                continue
+            if names.get(int(key)) != name:
+                names[int(key)] = name
+                changed = True
+        if changed:
+            DataStore.save_name_catalog({
+                "tracks": {str(k): v for k, v in sorted(tracks.items())},
+                "cars": {str(k): v for k, v in sorted(cars.items())},
+            })
+        return changed
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Nom d'un circuit (« track <ID> » s'il n'a jamais été vu).                                                    #
+    #--------------------------------------------------------------------------------------------------------------#
+    def track_name(self, track_id: int) -> str:
+        return self._names()[0].get(track_id) or f"track {track_id}"
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Nom d'une voiture (« car <ID> » si elle n'a jamais été vue).                                                 #
+    #--------------------------------------------------------------------------------------------------------------#
+    def car_name(self, car_id: int) -> str:
+        return self._names()[1].get(car_id) or f"car {car_id}"
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Libellé d'un combo « circuit — voiture », depuis ses IDs ou sa clé « trackID|carID ».                        #
+    #--------------------------------------------------------------------------------------------------------------#
+    def combo_label(self, track_id, car_id: Optional[int] = None) -> str:
+        if car_id is None:
+            combo = split_combo_key(track_id)
+            if combo is None:
+                return str(track_id)
+            track_id, car_id = combo
+        return f"{self.track_name(track_id)} — {self.car_name(car_id)}"
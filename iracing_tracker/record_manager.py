@@ -1,15 +1,29 @@
 ################################################################################################################
 # Projet : iRacing Tracker                                                                                     #
 # Fichier : iracing_tracker/record_manager.py                                                                  #
-# Date de modification : 16.06.2026                                                                            #
+# Date de modification : 18.10.2026                                                                            #
 # Auteur : Nicolas Schneeberger                                                                                #
-# Description : Gère les meilleurs tours (lecture, sauvegarde, comparaison aux records).                       #
+# Description : Gère les meilleurs tours (lecture, sauvegarde, comparaison aux records), sur le moteur de      #
+#               stockage configuré (JSON ou SQLite).                                                           #
 ################################################################################################################
 
+import time
 from datetime import datetime
-from typing import Optional
+from typing import Callable, Optional
 
 from iracing_tracker.data_store import DataStore
+from iracing_tracker.lap_stats import LapStats
+from iracing_tracker.leaderboard import LeaderboardIndex, NameTable, PlayerIndex
+from iracing_tracker.record_store import open_record_store
+from iracing_tracker.sqlite_store import split_combo_key
+from iracing_tracker.write_behind import WriteBehindStore, configured_durability_window
+
+
+# Intervalle minimal (s) entre deux contrôles de modification externe du stockage
+EXTERNAL_CHECK_INTERVAL = 2.0
+
+# Intervalle minimal (s) entre deux écritures des statistiques agrégées (toujours écrites à la fermeture)
+LAP_STATS_SAVE_INTERVAL = 30.0
 
 
 #--------------------------------------------------------------------------------------------------------------#
@@ -37,16 +51,82 @@ def format_lap_time(lap_time: float) -> str:
 class RecordManager:
 
     #--------------------------------------------------------------------------------------------------------------#
-    # Initialise le cache des meilleurs tours (rechargé après chaque sauvegarde pour rester cohérent).             #
+    # Ouvre le stockage des meilleurs tours (moteur fourni, ou moteur configuré : JSON ou SQLite). Les écritures   #
+    # passent par le thread de persistance sauf si la fenêtre de durabilité vaut 0 (écriture synchrone).           #
     #--------------------------------------------------------------------------------------------------------------#
-    def __init__(self):
-        self._best_laps: dict = DataStore.load_best_laps()
+    def __init__(self, store=None, durability_window: Optional[float] = None):
+        store = store if store is not None else open_record_store()
+        if durability_window is None:
+            durability_window = configured_durability_window()
+        self.store = WriteBehindStore(store, durability_window) if durability_window > 0 else store
+        self._last_check = time.monotonic()
+        # Classements triés par combo (trackID, carID) et index joueur → combos, tenus à jour à chaque record
+        # (reconstruits à chaque rechargement). Les joueurs y sont des entiers de la table `names`.
+        self.names = NameTable()
+        self.leaderboards = LeaderboardIndex()
+        self.player_index = PlayerIndex()
+        # Texte du record perso par (joueur, trackID, carID), et version des records : incrémentée à chaque
+        # record, suppression ou rechargement (un appelant qui a vu cette version n'a rien à redemander)
+        self._best_text: dict[tuple, str] = {}
+        self.version = 0
+        self._rebuild_indexes()
+        # Statistiques agrégées des tours (valides et invalides), tenues à jour à chaque tour
+        self.lap_stats = LapStats.from_dict(DataStore.load_lap_stats())
+        self._lap_stats_saved = float("-inf")
 
     #--------------------------------------------------------------------------------------------------------------#
-    # Recharge les meilleurs tours depuis le disque (ex. après une modification externe).                          #
+    # Valide les écritures en attente et ferme le stockage (à l'arrêt de l'application) ; retourne False si des    #
+    # records n'ont pas pu être écrits.                                                                            #
+    #--------------------------------------------------------------------------------------------------------------#
+    def close(self) -> bool:
+        self.save_lap_stats(force=True)
+        return self.store.close() is not False
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Profondeur de queue et latence de commit du thread de persistance (None en écriture synchrone).              #
+    #--------------------------------------------------------------------------------------------------------------#
+    def persistence_stats(self) -> Optional[dict]:
+        return self.store.stats() if isinstance(self.store, WriteBehindStore) else None
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Recharge inconditionnellement les meilleurs tours depuis le disque.                                          #
     #--------------------------------------------------------------------------------------------------------------#
     def reload(self):
-        self._best_laps = DataStore.load_best_laps()
+        self.store.reload()
+        self._rebuild_indexes()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Reconstruit les index en mémoire (classements, joueur → combos) depuis le stockage : clés « trackID|carID »  #
+    # découpées et noms internés une seule fois ici (les clés non numériques sont ignorées).                       #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _rebuild_indexes(self):
+        rows = []
+        for combo_key, players_map in self.store.load_all().items():
+            combo = split_combo_key(combo_key)
+            if combo is None or not isinstance(players_map, dict):
+                continue
+            for player, entry in players_map.items():
+                if isinstance(entry, dict):
+                    rows.append((combo, self.names.intern(str(player)), str(player), entry.get("time")))
+        self.leaderboards.rebuild((combo, pid, lap_time) for combo, pid, _, lap_time in rows)
+        self.player_index.rebuild((combo, pid, name) for combo, pid, name, _ in rows)
+        self._best_text.clear()
+        self.version += 1
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Recharge seulement si le stockage a changé hors de ce RecordManager (signature des fichiers / data_version), #
+    # au plus une fois par EXTERNAL_CHECK_INTERVAL sauf si `force`. Retourne True si un rechargement a eu lieu.    #
+    #--------------------------------------------------------------------------------------------------------------#
+    def refresh(self, force: bool = False) -> bool:
+        now = time.monotonic()
+        if not force and now - self._last_check < EXTERNAL_CHECK_INTERVAL:
+            return False
+        self._last_check = now
+        if not self.store.reload_if_changed():
+            return False
+        # Changement externe (ex. joueur supprimé hors application) : les index repartent du stockage
+        self._rebuild_indexes()
+        return True
 
     #--------------------------------------------------------------------------------------------------------------#
     # Retourne le meilleur temps d'un joueur pour un combo track|car donné, ou None.                               #
@@ -55,40 +135,148 @@ class RecordManager:
         if not player or player == "---":
             return None
 
-        key = f"{track_id}|{car_id}"
-        entry = self._best_laps.get(key, {}).get(player)
-
-        if entry and isinstance(entry, dict):
-            return entry.get("time")
-        return None
+        # Lu dans le classement du combo : ni clé formatée ni accès au stockage
+        pid = self.names.get(player)
+        board = self.leaderboards.get((track_id, car_id)) if pid is not None else None
+        return board.time(pid) if board else None
 
     #--------------------------------------------------------------------------------------------------------------#
-    # Sauvegarde un tour s'il bat le record perso ; retourne (is_personal_record, is_absolute_record).             #
+    # Sauvegarde un tour s'il bat le record perso (avec ses statistiques par tour, si fournies) ;                  #
+    # retourne (is_personal_record, is_absolute_record). `on_persisted(horodatage epoch)` est appelé quand le      #
+    # record est écrit sur disque : tout de suite en écriture synchrone, au commit via le thread de persistance.   #
     #--------------------------------------------------------------------------------------------------------------#
-    def save_lap(self, player: str, track_id: int, car_id: int, lap_time: float) -> tuple[bool, bool]:
+    def save_lap(self, player: str, track_id: int, car_id: int, lap_time: float,
+                 stats: Optional[dict] = None,
+                 on_persisted: Optional[Callable[[float], None]] = None) -> tuple[bool, bool]:
         if not player or player == "---":
             return False, False
 
         # Déterminer le record absolu AVANT d'écrire le nouveau temps
         is_absolute = self.is_absolute_record(track_id, car_id, lap_time)
 
-        key = f"{track_id}|{car_id}"
-        times = self._best_laps.setdefault(key, {})
-
-        prev = times.get(player)
-        is_personal = (prev is None) or (lap_time < prev["time"])
+        prev = self.get_personal_best(player, track_id, car_id)
+        is_personal = (prev is None) or (lap_time < prev)
 
         if is_personal:
-            times[player] = {
+            entry = {
                 "time": lap_time,
                 "date": datetime.now().isoformat()
             }
-            DataStore.save_best_laps(self._best_laps)
-            # Recharger après sauvegarde pour rester cohérent avec le disque
-            self.reload()
+            if stats:
+                entry["stats"] = stats
+            # La mémoire fait foi : pas de relecture du fichier qu'on vient d'écrire
+            if isinstance(self.store, WriteBehindStore):
+                self.store.save_entry(track_id, car_id, player, entry, on_commit=on_persisted)
+            else:
+                self.store.save_entry(track_id, car_id, player, entry)
+                if on_persisted:
+                    on_persisted(time.time())
+            pid = self.names.intern(player)
+            self.leaderboards.update((track_id, car_id), pid, lap_time)
+            self.player_index.add((track_id, car_id), pid, player)
+            self._best_text.pop((player, track_id, car_id), None)
+            self.version += 1
 
         return is_personal, is_absolute
 
+    #--------------------------------------------------------------------------------------------------------------#
+    # Compte un tour terminé (valide ou non, raison = code de LapReason) dans les statistiques agrégées, écrites   #
+    # au plus une fois par LAP_STATS_SAVE_INTERVAL.                                                                #
+    #--------------------------------------------------------------------------------------------------------------#
+    def record_lap(self, player: str, track_id: int, car_id: int, lap_time: Optional[float], valid: bool,
+                   reason: Optional[str] = None):
+        if not player or player == "---" or track_id is None or car_id is None:
+            return
+        self.lap_stats.add(player, track_id, car_id, lap_time, valid, reason)
+        self.save_lap_stats()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Écrit les séries de statistiques modifiées (sans attendre l'intervalle si `force`) : ajout au journal des    #
+    # statistiques, par le thread de persistance s'il y en a un. Les séries sont copiées ici, sur le thread qui    #
+    # les modifie.                                                                                                 #
+    #--------------------------------------------------------------------------------------------------------------#
+    def save_lap_stats(self, force: bool = False):
+        if not self.lap_stats.changed:
+            return
+        now = time.monotonic()
+        if not force and now - self._lap_stats_saved < LAP_STATS_SAVE_INTERVAL:
+            return
+        changes = self.lap_stats.changes()
+        if isinstance(self.store, WriteBehindStore):
+            self.store.submit(lambda: DataStore.append_lap_stats(changes))
+        else:
+            DataStore.append_lap_stats(changes)
+        self._lap_stats_saved = now
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Statistiques agrégées (résumé de LapAggregate) : globales, d'un combo, d'un joueur ou d'un joueur sur un     #
+    # combo, lues sans parcourir l'historique ; None si aucun tour.                                                #
+    #--------------------------------------------------------------------------------------------------------------#
+    def get_lap_stats(self, player: Optional[str] = None, track_id: Optional[int] = None,
+                      car_id: Optional[int] = None) -> Optional[dict]:
+        agg = self.lap_stats.get(player, track_id, car_id)
+        return agg.summary() if agg is not None else None
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Part des tours valides plus rapides qu'un temps sur un combo (0 à 1), parmi ceux du joueur ou, sans joueur,  #
+    # parmi ceux de tous les joueurs : (part, nombre de tours), ou None sans tour. Lu sur la distribution des      #
+    # temps, sans tri de l'historique.                                                                             #
+    #--------------------------------------------------------------------------------------------------------------#
+    def get_lap_percentile(self, player: Optional[str], track_id: int, car_id: int,
+                           lap_time: float) -> Optional[tuple[float, int]]:
+        if track_id is None or car_id is None:
+            return None
+        agg = self.lap_stats.get(player or None, track_id, car_id)
+        sketch = agg.sketch if agg is not None else None
+        fraction = sketch.fraction_faster(lap_time) if sketch is not None else None
+        return (fraction, sketch.count) if fraction is not None else None
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Tous les records d'un joueur (insensible à la casse) : {"trackID|carID": entrée}, lus sur ses seuls combos.  #
+    #--------------------------------------------------------------------------------------------------------------#
+    def get_player_records(self, player: str) -> dict:
+        records = {}
+        for pid, (track_id, car_id) in self.player_index.records(player):
+            entry = self.store.get_entry(track_id, car_id, self.names.name(pid))
+            if entry:
+                records[f"{track_id}|{car_id}"] = entry
+        return records
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Bilan d'un joueur sur ses combos : {"records", "absolute" (combos dont il détient le record), "avg_rank"}.   #
+    #--------------------------------------------------------------------------------------------------------------#
+    def get_player_stats(self, player: str) -> dict:
+        ranks = []
+        for pid, combo in self.player_index.records(player):
+            board = self.leaderboards.get(combo)
+            rank = board.rank(pid) if board else None
+            if rank is not None:
+                ranks.append(rank)
+        return {
+            "records": len(ranks),
+            "absolute": sum(1 for r in ranks if r == 1),
+            "avg_rank": sum(ranks) / len(ranks) if ranks else None,
+        }
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Supprime tous les records d'un joueur (insensible à la casse) en ne touchant que ses combos : une            #
+    # suppression par record dans le stockage, et ses statistiques agrégées. Retourne les records retirés          #
+    # [(clé du combo, nom exact)].                                                                                 #
+    #--------------------------------------------------------------------------------------------------------------#
+    def delete_player(self, player: str) -> list[tuple[str, str]]:
+        removed = []
+        for pid, (track_id, car_id) in self.player_index.remove(player):
+            self.leaderboards.remove((track_id, car_id), pid)
+            removed.append((track_id, car_id, self.names.name(pid)))
+        if removed:
+            self.store.delete_entries(removed)
+            # Toutes les casses du nom sont touchées : cache vidé en entier
+            self._best_text.clear()
+            self.version += 1
+        if self.lap_stats.remove_player(player):
+            self.save_lap_stats(force=True)
+        return [(f"{track_id}|{car_id}", name) for track_id, car_id, name in removed]
+
     #--------------------------------------------------------------------------------------------------------------#
     # Retourne le meilleur temps du joueur formaté (M:SS.mmm), ou '-:--.---' s'il n'y a pas de record.             #
     #--------------------------------------------------------------------------------------------------------------#
@@ -96,8 +284,23 @@ class RecordManager:
         if track_id is None or car_id is None:
             return "-:--.---"
 
-        best = self.get_personal_best(player, track_id, car_id)
-        return format_lap_time(best) if best else "-:--.---"
+        return self.get_personal_best_text(player, track_id, car_id)[0]
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Record perso formaté et version des records : (texte, version). Le texte est mis en cache jusqu'au prochain  #
+    # record du joueur sur ce combo (ou suppression / rechargement) ; tant que `version` n'a pas bougé, l'appelant #
+    # peut réutiliser le texte déjà affiché sans rappeler cette méthode.                                           #
+    #--------------------------------------------------------------------------------------------------------------#
+    def get_personal_best_text(self, player: str, track_id: Optional[int], car_id: Optional[int]) -> tuple[str, int]:
+        if track_id is None or car_id is None:
+            return "-:--.---", self.version
+
+        key = (player, track_id, car_id)
+        text = self._best_text.get(key)
+        if text is None:
+            best = self.get_personal_best(player, track_id, car_id)
+            text = self._best_text[key] = format_lap_time(best) if best else "-:--.---"
+        return text, self.version
 
     #--------------------------------------------------------------------------------------------------------------#
     # Retourne le top N des temps d'un combo track|car, trié du meilleur au moins bon.                             #
@@ -106,24 +309,30 @@ class RecordManager:
         if track_id is None or car_id is None:
             return []
 
-        key = f"{track_id}|{car_id}"
-        times = self._best_laps.get(key, {})
+        board = self.leaderboards.get((track_id, car_id))
+        if not board:
+            return []
+        # Noms résolus ici seulement, pour l'affichage
+        return [{"player": self.names.name(pid), "time": t} for t, pid in board.top(limit)]
 
-        ranking = []
-        for player, entry in times.items():
-            if entry and isinstance(entry, dict):
-                lap_time = entry.get("time")
-                if lap_time and lap_time > 0:
-                    ranking.append({"player": player, "time": lap_time})
+    #--------------------------------------------------------------------------------------------------------------#
+    # Rang du joueur dans le classement du combo : (rang, nombre de joueurs classés), ou None sans temps.          #
+    #--------------------------------------------------------------------------------------------------------------#
+    def get_rank(self, player: str, track_id: int, car_id: int) -> Optional[tuple[int, int]]:
+        if track_id is None or car_id is None:
+            return None
 
-        ranking.sort(key=lambda x: x["time"])
-        return ranking[:limit]
+        pid = self.names.get(player)
+        board = self.leaderboards.get((track_id, car_id)) if pid is not None else None
+        rank = board.rank(pid) if board else None
+        return (rank, len(board)) if rank is not None else None
 
     #--------------------------------------------------------------------------------------------------------------#
     # Indique si un temps est le record absolu (meilleur parmi tous les joueurs) du combo.                         #
     #--------------------------------------------------------------------------------------------------------------#
     def is_absolute_record(self, track_id: int, car_id: int, lap_time: float) -> bool:
-        ranking = self.get_ranking(track_id, car_id, limit=1)
-        if not ranking:
+        board = self.leaderboards.get((track_id, car_id))
+        best = board.best() if board else None
+        if best is None:
             return True  # Premier temps enregistré = record absolu
-        return lap_time <= ranking[0]["time"]
+        return lap_time <= best
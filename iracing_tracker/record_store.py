@@ -0,0 +1,147 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/record_store.py                                                                    #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Moteurs de stockage des meilleurs tours utilisés par RecordManager : JSON (best_laps.json)     #
+#               ou SQLite (records.db), choisi par IRTRACKER_RECORD_STORE ou par la présence de la base.       #
+################################################################################################################
+
+import os
+import threading
+from typing import Optional
+
+from iracing_tracker.data_store import DataStore, RECORDS_DB_PATH
+from iracing_tracker.sqlite_store import SqliteRecordStore
+
+
+# Moteurs disponibles
+BACKEND_JSON = "json"
+BACKEND_SQLITE = "sqlite"
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Stockage JSON : tous les meilleurs tours en mémoire (instantané best_laps.json + journal rejoué au           #
+# chargement) ; chaque record est une ligne ajoutée au journal. Le dict en mémoire est protégé par un verrou : #
+# le thread de persistance y écrit pendant que le worker le lit.                                               #
+#--------------------------------------------------------------------------------------------------------------#
+class JsonRecordStore:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Charge best_laps.json.                                                                                       #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reload()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Recharge les meilleurs tours depuis le disque (signature relevée avant la lecture : une écriture pendant     #
+    # le chargement sera vue comme un changement au prochain contrôle). Les statistiques par tour d'un             #
+    # instantané binaire restent sur disque : seuls les temps et dates servent en cours de session.                #
+    #--------------------------------------------------------------------------------------------------------------#
+    def reload(self):
+        signature = DataStore.best_laps_signature()
+        best_laps = DataStore.load_best_laps(with_stats=False)
+        with self._lock:
+            self._signature = signature
+            self._best_laps: dict = best_laps
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Recharge seulement si les fichiers ont changé hors de ce stockage (autre instance, suppression d'un joueur   #
+    # depuis la fenêtre des joueurs) ; la mémoire fait foi sinon. Une compaction du journal (même contenu) ne      #
+    # compte pas : la signature suit ses fichiers réécrits. Retourne True si un rechargement a eu lieu.            #
+    #--------------------------------------------------------------------------------------------------------------#
+    def reload_if_changed(self) -> bool:
+        changed, signature = DataStore.best_laps_changed_since(self._signature)
+        if changed is None:
+            return False
+        if not changed:
+            self._signature = signature
+            return False
+        self.reload()
+        return True
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Rien à fermer (interface commune avec SqliteRecordStore).                                                    #
+    #--------------------------------------------------------------------------------------------------------------#
+    def close(self):
+        pass
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Retourne l'entrée d'un joueur pour un combo ({"time", "date"[, "stats"]}), ou None.                          #
+    #--------------------------------------------------------------------------------------------------------------#
+    def get_entry(self, track_id: int, car_id: int, player: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._best_laps.get(f"{track_id}|{car_id}", {}).get(player)
+        return entry if isinstance(entry, dict) else None
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Écrit l'entrée d'un joueur pour un combo (une ligne ajoutée au journal).                                     #
+    #--------------------------------------------------------------------------------------------------------------#
+    def save_entry(self, track_id: int, car_id: int, player: str, entry: dict):
+        self.save_entries([(track_id, car_id, player, entry)])
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Écrit plusieurs entrées [(track_id, car_id, joueur, entrée)] en un seul ajout au journal (un fsync).         #
+    #--------------------------------------------------------------------------------------------------------------#
+    def save_entries(self, entries: list):
+        records = []
+        with self._lock:
+            for track_id, car_id, player, entry in entries:
+                key = f"{track_id}|{car_id}"
+                self._best_laps.setdefault(key, {})[player] = entry
+                records.append((key, player, entry))
+        self._append(records)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Supprime des entrées [(track_id, car_id, joueur)] : une ligne de suppression par entrée, en un seul ajout.   #
+    #--------------------------------------------------------------------------------------------------------------#
+    def delete_entries(self, keys: list):
+        records = []
+        with self._lock:
+            for track_id, car_id, player in keys:
+                key = f"{track_id}|{car_id}"
+                if self._best_laps.get(key, {}).pop(player, None) is not None:
+                    records.append((key, player, None))
+        self._append(records)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ajoute des lignes au journal ; notre propre ajout ne doit pas passer pour un changement externe (sauf s'il   #
+    # y en avait déjà un en attente ; indéterminé pendant une compaction de ce processus, compté comme le nôtre).  #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _append(self, records: list):
+        if not records:
+            return
+        external, _ = DataStore.best_laps_changed_since(self._signature)
+        signature = DataStore.append_best_laps(records)
+        self._signature = None if external else signature
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Tous les meilleurs tours ({"track|car": {joueur: entrée}}) : copie prise sous le verrou, que l'appelant      #
+    # peut parcourir pendant que le thread de persistance écrit.                                                   #
+    #--------------------------------------------------------------------------------------------------------------#
+    def load_all(self) -> dict:
+        with self._lock:
+            return {k: dict(v) if isinstance(v, dict) else v for k, v in self._best_laps.items()}
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Moteur configuré : IRTRACKER_RECORD_STORE (« json » / « sqlite »), sinon SQLite si records.db existe.        #
+#--------------------------------------------------------------------------------------------------------------#
+def configured_backend() -> str:
+    backend = (os.getenv("IRTRACKER_RECORD_STORE") or "").strip().lower()
+    if backend in (BACKEND_JSON, BACKEND_SQLITE):
+        return backend
+    return BACKEND_SQLITE if os.path.exists(RECORDS_DB_PATH) else BACKEND_JSON
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Ouvre le stockage des meilleurs tours (moteur demandé, ou moteur configuré).                                 #
+#--------------------------------------------------------------------------------------------------------------#
+def open_record_store(backend: Optional[str] = None):
+    backend = backend or configured_backend()
+    if backend == BACKEND_SQLITE:
+        return SqliteRecordStore()
+    if backend == BACKEND_JSON:
+        return JsonRecordStore()
+    raise ValueError(f"Moteur de stockage inconnu : {backend!r}")
@@ -1,13 +1,14 @@
 ################################################################################################################
 # Projet : iRacing Tracker                                                                                     #
 # Fichier : iracing_tracker/session_manager.py                                                                 #
-# Date de modification : 16.06.2026                                                                            #
+# Date de modification : 18.10.2026                                                                            #
 # Auteur : Nicolas Schneeberger                                                                                #
 # Description : Gère l'état de la session iRacing (détection des changements, contexte circuit/voiture).       #
 ################################################################################################################
 
 import time
 from typing import Optional
+from iracing_tracker.name_catalog import NameCatalog
 from iracing_tracker.ui.constants import SESSION_INACTIVE_GRACE_SECONDS
 
 
@@ -24,6 +25,7 @@ class SessionContext:
         self.track_name: str = "---"
         self.car_id: Optional[int] = None
         self.car_name: str = "---"
+        self.player_car_idx: Optional[int] = None
         self.is_ready: bool = False
 
     #--------------------------------------------------------------------------------------------------------------#
@@ -60,11 +62,13 @@ class SessionContext:
 class SessionManager:
 
     #--------------------------------------------------------------------------------------------------------------#
-    # Initialise le manager avec le client iRSDK, un contexte vide et les flags de messages.                       #
+    # Initialise le manager avec le client iRSDK, un contexte vide, le catalogue des noms (fourni ou ouvert        #
+    # par défaut) et les flags de messages.                                                                        #
     #--------------------------------------------------------------------------------------------------------------#
-    def __init__(self, ir_client):
+    def __init__(self, ir_client, catalog: Optional[NameCatalog] = None):
         self.ir_client = ir_client
         self.context = SessionContext()
+        self.catalog = catalog if catalog is not None else NameCatalog()
 
         # Flags pour éviter de répéter les messages de log (attente / démarrage)
         self.is_waiting_session_msg_sent = False
@@ -94,6 +98,7 @@ class SessionManager:
 
     #--------------------------------------------------------------------------------------------------------------#
     # Met à jour le contexte depuis les données iRSDK (WeekendInfo, DriverInfo) ; retourne True si changement.     #
+    # Les noms d'un nouveau contexte sont notés dans le catalogue.                                                 #
     #--------------------------------------------------------------------------------------------------------------#
     def update_context(self, context_data: dict) -> bool:
         weekend = context_data.get("WeekendInfo") or {}
@@ -112,6 +117,13 @@ class SessionManager:
             car_id, car_name = None, "---"
 
         changed = self.context.update(track_id, track_name, car_id, car_name)
+        # Index du joueur dans les tableaux CarIdx* (second signal de fin de tour)
+        self.context.player_car_idx = idx if 0 <= idx < len(drivers) else None
+        if changed:
+            try:
+                self.catalog.remember(track_id, track_name, car_id, car_name)
+            except Exception:
+                pass  # Catalogue non écrit : les libellés retomberont sur les IDs
         return changed
 
     #--------------------------------------------------------------------------------------------------------------#
@@ -0,0 +1,173 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/session_recorder.py                                                                #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Enregistre la télémétrie de validation (JSON lines) pour pouvoir la rejouer hors ligne.        #
+################################################################################################################
+
+import os
+import json
+import glob
+from datetime import datetime
+from typing import Callable, Iterator, Optional
+
+from iracing_tracker.data_store import DATA_DIR
+
+
+RECORDINGS_DIR = os.path.join(DATA_DIR, "recordings")
+RECORDING_VERSION = 1
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Indique si l'enregistrement des sessions est actif (désactivable via IRTRACKER_RECORD=0).                    #
+#--------------------------------------------------------------------------------------------------------------#
+def recording_enabled() -> bool:
+    return os.getenv("IRTRACKER_RECORD", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Liste les enregistrements disponibles (du plus ancien au plus récent).                                       #
+#--------------------------------------------------------------------------------------------------------------#
+def list_recordings(directory: str = RECORDINGS_DIR) -> list[str]:
+    return sorted(glob.glob(os.path.join(directory, "*.jsonl")))
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Lit un enregistrement : en-tête puis, dans l'ordre, les frames (t, state) et les tours (dict).               #
+# Format : en-tête {"type": "header", "vars": [...], "validator": état}, puis frames [t, v1, v2, ...] et       #
+# tours {"lap": ...}. « validator » (optionnel) est l'état du LapValidator avant la première frame.            #
+#--------------------------------------------------------------------------------------------------------------#
+def read_recording(path: str) -> tuple[dict, Iterator[tuple[str, object]]]:
+    f = open(path, "r", encoding="utf-8")
+    try:
+        header = json.loads(f.readline() or "{}")
+    except json.JSONDecodeError:
+        header = {}
+    var_names = header.get("vars") or []
+
+    def _entries():
+        with f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    # Dernière ligne tronquée (arrêt brutal) : on s'arrête là
+                    break
+                if isinstance(item, list):
+                    yield "frame", (item[0], dict(zip(var_names, item[1:])))
+                elif isinstance(item, dict) and "lap" in item:
+                    yield "lap", item
+
+    return header, _entries()
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Écrit la télémétrie de validation d'une session (une frame par itération worker + résultat de chaque tour).  #
+#--------------------------------------------------------------------------------------------------------------#
+class SessionRecorder:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Initialise l'enregistreur (aucun fichier ouvert tant qu'aucune session n'est démarrée).                      #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self, directory: str = RECORDINGS_DIR, enabled: Optional[bool] = None):
+        self.directory = directory
+        self.enabled = recording_enabled() if enabled is None else bool(enabled)
+        self._file = None
+        self._key: Optional[tuple] = None
+        self._vars: Optional[list] = None
+        self._header: dict = {}
+        self.path: Optional[str] = None
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # S'assure qu'un enregistrement est ouvert pour ce combo/joueur ; en démarre un autre si le contexte change.   #
+    # `validator_state` (appelé seulement au démarrage d'un enregistrement, avant la frame courante) fournit       #
+    # l'état du validateur écrit dans l'en-tête : un enregistrement ouvert en cours de session se rejoue alors     #
+    # depuis ce même état, et non depuis un validateur neuf.                                                       #
+    #--------------------------------------------------------------------------------------------------------------#
+    def ensure(self, track_id: int, car_id: int, player: str,
+               validator_state: Optional[Callable[[], dict]] = None):
+        if not self.enabled:
+            return
+        key = (track_id, car_id, player)
+        if key == self._key and self._file is not None:
+            return
+        self.stop()
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.path = os.path.join(self.directory, f"{stamp}_{track_id}_{car_id}.jsonl")
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._key = key
+        self._vars = None
+        self._header = {
+            "type": "header",
+            "version": RECORDING_VERSION,
+            "track_id": track_id,
+            "car_id": car_id,
+            "player": player,
+            "started": datetime.now().isoformat(timespec="seconds"),
+        }
+        if validator_state is not None:
+            self._header["validator"] = validator_state()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ajoute une frame (l'en-tête, qui fige la liste des variables, est écrit avec la première).                   #
+    #--------------------------------------------------------------------------------------------------------------#
+    def record_frame(self, now: float, state: dict):
+        if self._file is None:
+            return
+        if self._vars is None:
+            self._vars = list(state.keys())
+            self._header["vars"] = self._vars
+            self._write(self._header)
+        self._write([round(now, 4)] + [state.get(v) for v in self._vars])
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ajoute le résultat de validation d'un tour (référence pour le rejeu, statistiques des accumulateurs) et      #
+    # vide le tampon sur disque.                                                                                   #
+    #--------------------------------------------------------------------------------------------------------------#
+    def record_lap(self, now: float, lap_number: int, status: str, lap_time: float, reason,
+                   stats: Optional[dict] = None):
+        if self._file is None or self._vars is None:
+            return
+        self._write({
+            "lap": lap_number,
+            "t": round(now, 4),
+            "status": status,
+            "lap_time": lap_time,
+            "reason": None if reason is None else str(reason),
+            "stats": stats or {},
+        })
+        try:
+            self._file.flush()
+        except (OSError, AttributeError):
+            pass
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Sérialise une ligne JSON compacte ; désactive l'enregistrement en cas d'erreur disque.                       #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _write(self, item):
+        try:
+            self._file.write(json.dumps(item, separators=(",", ":"), ensure_ascii=False) + "\n")
+        except (OSError, ValueError):
+            self.stop()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ferme l'enregistrement en cours (fin de session, changement de combo ou de joueur).                          #
+    #--------------------------------------------------------------------------------------------------------------#
+    def stop(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+                # Aucune frame écrite : ne pas laisser de fichier vide
+                if self._vars is None and self.path and os.path.getsize(self.path) == 0:
+                    os.remove(self.path)
+            except OSError:
+                pass
+        self._file = None
+        self._key = None
+        self._vars = None
+
@@ -0,0 +1,253 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/sqlite_store.py                                                                    #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Moteur de stockage SQLite (WAL) des meilleurs tours : tables joueurs, combos et tours,         #
+#               classement indexé sur (track_id, car_id, time), record écrit par un upsert d'une ligne.        #
+################################################################################################################
+
+import json
+import sqlite3
+import threading
+from typing import Optional
+
+from iracing_tracker.data_store import RECORDS_DB_PATH, _ensure_parent_dir
+
+
+# Version du schéma (PRAGMA user_version)
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    id   INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS combos (
+    track_id INTEGER NOT NULL,
+    car_id   INTEGER NOT NULL,
+    PRIMARY KEY (track_id, car_id)
+);
+CREATE TABLE IF NOT EXISTS laps (
+    track_id  INTEGER NOT NULL,
+    car_id    INTEGER NOT NULL,
+    player_id INTEGER NOT NULL REFERENCES players(id) ON DELETE CASCADE,
+    time      REAL NOT NULL,
+    date      TEXT,
+    stats     TEXT,
+    PRIMARY KEY (track_id, car_id, player_id),
+    FOREIGN KEY (track_id, car_id) REFERENCES combos(track_id, car_id)
+);
+CREATE INDEX IF NOT EXISTS laps_ranking ON laps (track_id, car_id, time);
+"""
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Découpe une clé de combo « trackID|carID » en deux entiers (None si la clé n'est pas numérique).             #
+#--------------------------------------------------------------------------------------------------------------#
+def split_combo_key(key: str) -> Optional[tuple[int, int]]:
+    try:
+        track, car = str(key).split("|", 1)
+        return int(track), int(car)
+    except (ValueError, TypeError):
+        return None
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Stockage SQLite des meilleurs tours (même interface que JsonRecordStore). Une connexion partagée entre le    #
+# thread UI et le worker, protégée par un verrou ; chaque écriture est une transaction courte.                 #
+#--------------------------------------------------------------------------------------------------------------#
+class SqliteRecordStore:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ouvre (ou crée) la base en mode WAL et applique le schéma.                                                   #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self, path: str = RECORDS_DB_PATH):
+        self.path = path
+        if path != ":memory:":
+            _ensure_parent_dir(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+            self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ferme la connexion.                                                                                          #
+    #--------------------------------------------------------------------------------------------------------------#
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Rien à recharger : la base est la source de vérité (interface commune avec JsonRecordStore).                 #
+    #--------------------------------------------------------------------------------------------------------------#
+    def reload(self):
+        pass
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Indique si une autre connexion a validé une écriture depuis le dernier contrôle (PRAGMA data_version, qui    #
+    # ignore les écritures de cette connexion). Rien à recharger : les lectures interrogent la base.               #
+    #--------------------------------------------------------------------------------------------------------------#
+    def reload_if_changed(self) -> bool:
+        with self._lock:
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        changed = version != self._data_version
+        self._data_version = version
+        return changed
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Retourne l'id d'un joueur, en le créant si besoin (dans la transaction courante).                            #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _player_id(self, player: str) -> int:
+        self._conn.execute("INSERT OR IGNORE INTO players (name) VALUES (?)", (player,))
+        return self._conn.execute("SELECT id FROM players WHERE name = ?", (player,)).fetchone()[0]
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Retourne l'entrée d'un joueur pour un combo ({"time", "date"[, "stats"]}), ou None.                          #
+    #--------------------------------------------------------------------------------------------------------------#
+    def get_entry(self, track_id: int, car_id: int, player: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT l.time, l.date, l.stats FROM laps l JOIN players p ON p.id = l.player_id "
+                "WHERE l.track_id = ? AND l.car_id = ? AND p.name = ?",
+                (track_id, car_id, player),
+            ).fetchone()
+        return self._row_entry(row) if row else None
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Convertit une ligne (time, date, stats) en entrée au format de best_laps.json.                               #
+    #--------------------------------------------------------------------------------------------------------------#
+    @staticmethod
+    def _row_entry(row) -> dict:
+        entry = {"time": row[0], "date": row[1]}
+        if row[2]:
+            try:
+                entry["stats"] = json.loads(row[2])
+            except json.JSONDecodeError:
+                pass
+        return entry
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Écrit l'entrée d'un joueur pour un combo (upsert d'une ligne ; joueur et combo créés au besoin).             #
+    #--------------------------------------------------------------------------------------------------------------#
+    def save_entry(self, track_id: int, car_id: int, player: str, entry: dict):
+        self.save_entries([(track_id, car_id, player, entry)])
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Écrit plusieurs entrées [(track_id, car_id, joueur, entrée)] en une seule transaction.                       #
+    #--------------------------------------------------------------------------------------------------------------#
+    def save_entries(self, entries: list):
+        with self._lock, self._conn:
+            for track_id, car_id, player, entry in entries:
+                stats = entry.get("stats")
+                player_id = self._player_id(player)
+                self._conn.execute("INSERT OR IGNORE INTO combos (track_id, car_id) VALUES (?, ?)",
+                                   (track_id, car_id))
+                self._conn.execute(
+                    "INSERT INTO laps (track_id, car_id, player_id, time, date, stats) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (track_id, car_id, player_id) DO UPDATE SET "
+                    "time = excluded.time, date = excluded.date, stats = excluded.stats",
+                    (track_id, car_id, player_id, float(entry["time"]), entry.get("date"),
+                     json.dumps(stats, ensure_ascii=False, separators=(",", ":")) if stats else None),
+                )
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Supprime des entrées [(track_id, car_id, joueur)] en une seule transaction (le joueur reste dans la table).  #
+    #--------------------------------------------------------------------------------------------------------------#
+    def delete_entries(self, keys: list):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM laps WHERE track_id = ? AND car_id = ? "
+                "AND player_id = (SELECT id FROM players WHERE name = ?)",
+                [(track_id, car_id, player) for track_id, car_id, player in keys],
+            )
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Tous les meilleurs tours au format de best_laps.json ({"track|car": {joueur: entrée}}).                      #
+    #--------------------------------------------------------------------------------------------------------------#
+    def load_all(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT l.track_id, l.car_id, p.name, l.time, l.date, l.stats "
+                "FROM laps l JOIN players p ON p.id = l.player_id"
+            ).fetchall()
+        data: dict = {}
+        for track_id, car_id, name, *rest in rows:
+            data.setdefault(f"{track_id}|{car_id}", {})[name] = self._row_entry(rest)
+        return data
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Parcourt tous les tours en flux, par paquets de `batch` lignes : (track_id, car_id, joueur, entrée).         #
+    #--------------------------------------------------------------------------------------------------------------#
+    def iter_entries(self, batch: int = 1000):
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT l.track_id, l.car_id, p.name, l.time, l.date, l.stats "
+                "FROM laps l JOIN players p ON p.id = l.player_id ORDER BY l.track_id, l.car_id, l.time"
+            )
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(batch)
+            if not rows:
+                return
+            for track_id, car_id, name, *rest in rows:
+                yield track_id, car_id, name, self._row_entry(rest)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Supprime un joueur et ses tours (insensible à la casse, comme DataStore.delete_player).                      #
+    #--------------------------------------------------------------------------------------------------------------#
+    def delete_player(self, name: str):
+        target = str(name).strip().lower()
+        with self._lock, self._conn:
+            ids = [(pid,) for pid, n in self._conn.execute("SELECT id, name FROM players")
+                   if str(n).strip().lower() == target]
+            self._conn.executemany("DELETE FROM laps WHERE player_id = ?", ids)
+            self._conn.executemany("DELETE FROM players WHERE id = ?", ids)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ajoute des joueurs (sans tour) ; retourne le nombre de nouveaux joueurs.                                     #
+    #--------------------------------------------------------------------------------------------------------------#
+    def add_players(self, names: list[str]) -> int:
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO players (name) VALUES (?)",
+                                   [(str(n),) for n in names if n and n != "---"])
+            return self._conn.total_changes - before
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Importe un dict au format de best_laps.json en une transaction ; un temps déjà présent plus rapide (ou égal) #
+    # est conservé. Retourne (tours écrits, tours déjà à jour, entrées ignorées).                                  #
+    #--------------------------------------------------------------------------------------------------------------#
+    def import_best_laps(self, best_laps: dict) -> tuple[int, int, int]:
+        imported = unchanged = skipped = 0
+        with self._lock, self._conn:
+            for key, players_map in (best_laps or {}).items():
+                combo = split_combo_key(key)
+                if combo is None or not isinstance(players_map, dict):
+                    skipped += len(players_map) if isinstance(players_map, dict) else 1
+                    continue
+                self._conn.execute("INSERT OR IGNORE INTO combos (track_id, car_id) VALUES (?, ?)", combo)
+                for player, entry in players_map.items():
+                    if not player or player == "---" or not isinstance(entry, dict) or not entry.get("time"):
+                        skipped += 1
+                        continue
+                    stats = entry.get("stats")
+                    cursor = self._conn.execute(
+                        "INSERT INTO laps (track_id, car_id, player_id, time, date, stats) VALUES (?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT (track_id, car_id, player_id) DO UPDATE SET "
+                        "time = excluded.time, date = excluded.date, stats = excluded.stats "
+                        "WHERE excluded.time < laps.time",
+                        (*combo, self._player_id(str(player)), float(entry["time"]), entry.get("date"),
+                         json.dumps(stats, ensure_ascii=False, separators=(",", ":")) if stats else None),
+                    )
+                    # Upsert sans effet (temps en base plus rapide) : 0 ligne modifiée
+                    if cursor.rowcount > 0:
+                        imported += 1
+                    else:
+                        unchanged += 1
+        return imported, unchanged, skipped
@@ -0,0 +1,176 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/stint_tracker.py                                                                   #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Découpe l'activité en relais (sortie des stands → entrée aux stands) avec des statistiques     #
+#               glissantes (Welford) sur les tours valides, mises à jour en O(1) par tour.                     #
+################################################################################################################
+
+import math
+from datetime import datetime
+from typing import Optional
+
+from iracing_tracker.record_manager import format_lap_time
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Statistiques glissantes d'une série de temps : nombre, moyenne, variance (Welford), meilleur et pire.        #
+#--------------------------------------------------------------------------------------------------------------#
+class RunningStats:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Initialise une série vide.                                                                                   #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.best: Optional[float] = None
+        self.worst: Optional[float] = None
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ajoute une valeur (mise à jour de Welford, numériquement stable).                                            #
+    #--------------------------------------------------------------------------------------------------------------#
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if self.best is None or value < self.best:
+            self.best = value
+        if self.worst is None or value > self.worst:
+            self.worst = value
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Variance d'échantillon (0 en dessous de deux valeurs).                                                       #
+    #--------------------------------------------------------------------------------------------------------------#
+    @property
+    def variance(self) -> float:
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Écart-type d'échantillon.                                                                                    #
+    #--------------------------------------------------------------------------------------------------------------#
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.variance)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Résumé sérialisable (None si la série est vide).                                                             #
+    #--------------------------------------------------------------------------------------------------------------#
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": round(self.mean, 4) if self.count else None,
+            "stdev": round(self.stdev, 4) if self.count else None,
+            "best": self.best,
+            "worst": self.worst,
+        }
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Suit le relais en cours : démarré à la sortie des stands, clos à l'entrée aux stands ou au retour garage.    #
+# Surfaces iRSDK : 1 stand, 2 approche des stands, 3 piste (comme LapValidator).                               #
+#--------------------------------------------------------------------------------------------------------------#
+class StintTracker:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Initialise le suivi : aucun relais en cours, numérotation à partir de 1.                                     #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self):
+        self.number = 0
+        self.active = False
+        self._in_pits = True
+        self._reset_stint()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Vide les compteurs du relais.                                                                                #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _reset_stint(self):
+        self.context: dict = {}
+        self.started: Optional[str] = None
+        self._started_ts: Optional[float] = None
+        self.laps = 0
+        self.valid = RunningStats()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Oublie le relais en cours sans le clore (changement de session) ; la numérotation repart à zéro.             #
+    #--------------------------------------------------------------------------------------------------------------#
+    def reset(self):
+        self.number = 0
+        self.active = False
+        self._in_pits = True
+        self._reset_stint()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Suit les transitions stands/piste de la frame ; retourne le résumé du relais qui vient de se terminer, ou    #
+    # None. `event` est le dernier événement du LapDetector (garage_return / rewind closent le relais).            #
+    #--------------------------------------------------------------------------------------------------------------#
+    def update(self, surface: int, event: Optional[str], now: float, context: Optional[dict] = None) -> Optional[dict]:
+        finished = None
+        in_pits = surface in (1, 2)
+
+        if self.active and (in_pits or event in ("garage_return", "rewind")):
+            finished = self.end(now)
+        elif not self.active and self._in_pits and surface == 3:
+            self.number += 1
+            self.active = True
+            self.context = dict(context or {})
+            self.started = datetime.now().isoformat(timespec="seconds")
+            self._started_ts = now
+
+        if surface not in (0, -1):
+            self._in_pits = in_pits
+        return finished
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Compte un tour terminé dans le relais en cours ; seuls les tours valides alimentent les statistiques.        #
+    #--------------------------------------------------------------------------------------------------------------#
+    def add_lap(self, status: str, lap_time: float):
+        if not self.active:
+            return
+        self.laps += 1
+        if status == "valid" and lap_time and lap_time > 0:
+            self.valid.add(float(lap_time))
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Résumé du relais en cours (None si aucun).                                                                   #
+    #--------------------------------------------------------------------------------------------------------------#
+    def summary(self, now: Optional[float] = None) -> Optional[dict]:
+        if not self.active:
+            return None
+        duration = (now - self._started_ts) if (now is not None and self._started_ts is not None) else None
+        return {
+            **self.context,
+            "stint": self.number,
+            "started": self.started,
+            "duration": round(duration, 1) if duration is not None else None,
+            "laps": self.laps,
+            "valid": self.valid.to_dict(),
+        }
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Clôt le relais en cours et retourne son résumé final (None si aucun relais ou relais sans tour).             #
+    #--------------------------------------------------------------------------------------------------------------#
+    def end(self, now: float) -> Optional[dict]:
+        result = self.summary(now)
+        if result is not None:
+            result["ended"] = datetime.now().isoformat(timespec="seconds")
+        self.active = False
+        self._reset_stint()
+        return result if result and result["laps"] > 0 else None
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Met en forme un résumé de relais pour l'affichage (« relais 2 : 12 tours, 9 valides, moy 1:24.512 … »).      #
+#--------------------------------------------------------------------------------------------------------------#
+def format_stint_summary(summary: Optional[dict]) -> str:
+    if not summary:
+        return "---"
+    valid = summary.get("valid") or {}
+    text = f"relais {summary.get('stint')} : {summary.get('laps', 0)} tours, {valid.get('count', 0)} valides"
+    if valid.get("count"):
+        text += (f", moy {format_lap_time(valid['mean'])} ± {valid['stdev']:.3f} s, "
+                 f"meilleur {format_lap_time(valid['best'])}, pire {format_lap_time(valid['worst'])}")
+    return text
@@ -1,7 +1,7 @@
 ################################################################################################################
 # Projet : iRacing Tracker                                                                                     #
 # Fichier : iracing_tracker/telemetry_reader.py                                                                #
-# Date de modification : 16.06.2026                                                                            #
+# Date de modification : 18.10.2026                                                                            #
 # Auteur : Nicolas Schneeberger                                                                                #
 # Description : Lecture des variables iRSDK par catégorie, avec throttling automatique.                        #
 ################################################################################################################
@@ -16,7 +16,11 @@ from typing import Optional
 class TelemetryReader:
 
     # Variables iRSDK regroupées par catégorie
-    CORE_VARS = ["LapCompleted","LapLastLapTime","PlayerTrackSurface","PlayerCarMyIncidentCount","SessionTime",]
+    CORE_VARS = ["LapCompleted","LapLastLapTime","PlayerTrackSurface","PlayerCarMyIncidentCount","SessionTime",
+                 "LapDistPct","Speed","OnPitRoad","SessionFlags",]
+
+    # Tableaux CarIdx du plateau complet, lus avec le core (détection des tours de toutes les voitures)
+    FIELD_VARS = ["CarIdxLapCompleted","CarIdxLastLapTime","CarIdxTrackSurface","CarIdxOnPitRoad",]
 
     CONTEXT_VARS = [
         "WeekendInfo",
@@ -27,11 +31,7 @@ class TelemetryReader:
     DEBUG_VARS = [
         "SessionNum",
         "SessionTimeRemain",
-        "CarIdxLapCompleted",
-        "CarIdxLastLapTime",
         "CarIdxLapDistPct",
-        "CarIdxTrackSurface",
-        "CarIdxOnPitRoad",
         "CarIdxPosition",
         "CarIdxSpeed",
         "CarIdxRPM",
@@ -39,6 +39,8 @@ class TelemetryReader:
 
     # Intervalles de throttling (secondes)
     CORE_INTERVAL = 0.1
+    FAST_CORE_INTERVAL = 1.0 / 60.0   # Cadence iRSDK : utilisée à l'approche de la ligne / tour en attente
+    FAST_POLL_LAP_PCT = 0.97          # LapDistPct au-delà duquel on passe en cadence rapide
     CONTEXT_INTERVAL = 2.0
     DEBUG_INTERVAL = 0.3
 
@@ -54,7 +56,7 @@ class TelemetryReader:
         self._last_debug_read = 0.0
 
     #--------------------------------------------------------------------------------------------------------------#
-    # Lit les variables "core" (état tour, incidents) à 10 Hz ; None si la lecture est throttlée.                  #
+    # Lit les variables "core" (état tour, incidents, tableaux du plateau) à 10 Hz ; None si throttlée.            #
     #--------------------------------------------------------------------------------------------------------------#
     def read_core(self, force: bool = False) -> Optional[dict]:
         now = time.time()
@@ -62,7 +64,7 @@ class TelemetryReader:
             return None
 
         self._last_core_read = now
-        return self.ir_client.freeze_and_read(self.CORE_VARS)
+        return self.ir_client.freeze_and_read(self.CORE_VARS + self.FIELD_VARS)
 
     #--------------------------------------------------------------------------------------------------------------#
     # Lit le contexte (circuit, voiture) toutes les 2 s ; None si la lecture est throttlée.                        #
@@ -0,0 +1,7 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/tools/__init__.py                                                                  #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Outils en ligne de commande (benchmarks, maintenance des données).                             #
+################################################################################################################
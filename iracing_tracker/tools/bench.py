@@ -0,0 +1,448 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/tools/bench.py                                                                     #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Benchmarks des chemins critiques (par frame / par tour), lancés en ligne de commande.          #
+#               Usage : python -m iracing_tracker.tools.bench <nom> [--seconds N]                              #
+################################################################################################################
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+import numpy as np
+
+from iracing_tracker.field_lap_detector import FieldLapDetector, CAR_SLOTS
+from iracing_tracker.lap_validator import LapValidator, FRAME_BUDGET_US
+from iracing_tracker.discontinuity_detector import DiscontinuityDetector
+from iracing_tracker.lap_projection import LapProjector
+from iracing_tracker import data_store
+from iracing_tracker.data_store import DataStore, _append_line, _atomic_write_json
+from iracing_tracker.record_store import JsonRecordStore
+from iracing_tracker.record_manager import RecordManager
+from iracing_tracker.lap_history import LapHistory, COLUMNS, CHUNK_ROWS
+from iracing_tracker.binary_snapshot import encode_best_laps, decode_best_laps
+
+
+# Budget par frame du détecteur de discontinuités seul (µs)
+DISCONTINUITY_BUDGET_US = 5.0
+
+# Budget par frame du tour projeté (µs)
+PROJECTION_BUDGET_US = 5.0
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Affiche le résultat d'un benchmark par frame : coût moyen, débit et marge par rapport au budget temps réel.  #
+#--------------------------------------------------------------------------------------------------------------#
+def _report_frames(name: str, frames: int, elapsed: float, hz: float):
+    per_frame_us = (elapsed / frames) * 1e6 if frames else 0.0
+    fps = frames / elapsed if elapsed > 0 else float("inf")
+    budget_us = 1e6 / hz
+    print(f"[{name}] {frames} frames en {elapsed:.3f} s : {per_frame_us:.1f} µs/frame, "
+          f"{fps:,.0f} frames/s ({fps / hz:,.0f}x temps réel à {hz:g} Hz, "
+          f"{100.0 * per_frame_us / budget_us:.2f} % du budget de {budget_us:.0f} µs)")
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Génère des frames CarIdx* synthétiques : 64 voitures, tours de ~90 s, MAJ du temps 0,5 s après la ligne.     #
+#--------------------------------------------------------------------------------------------------------------#
+def _synthetic_field_frames(seconds: float, hz: float, cars: int = CAR_SLOTS, seed: int = 1):
+    rng = random.Random(seed)
+    lap_len = [rng.uniform(85.0, 95.0) for _ in range(cars)]
+    offset = [rng.uniform(0.0, 90.0) for _ in range(cars)]
+    frames = []
+    for i in range(int(seconds * hz)):
+        t = i / hz
+        completed, last_time, surface, pit = [], [], [], []
+        for c in range(cars):
+            run = t + offset[c]
+            laps = int(run // lap_len[c])
+            since_line = run - laps * lap_len[c]
+            shown = laps if since_line >= 0.5 else laps - 1
+            completed.append(laps)
+            last_time.append(lap_len[c] if shown > 0 else -1.0)
+            surface.append(3)
+            pit.append(False)
+        frames.append({
+            "CarIdxLapCompleted": completed,
+            "CarIdxLastLapTime": last_time,
+            "CarIdxTrackSurface": surface,
+            "CarIdxOnPitRoad": pit,
+        })
+    return frames
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Benchmark FieldLapDetector : 64 voitures à 60 Hz (génération des frames exclue de la mesure).                #
+#--------------------------------------------------------------------------------------------------------------#
+def bench_field(seconds: float = 300.0, hz: float = 60.0):
+    frames = _synthetic_field_frames(seconds, hz)
+    detector = FieldLapDetector()
+    events = 0
+    start = time.perf_counter()
+    for i, frame in enumerate(frames):
+        events += len(detector.detect(frame, now=i / hz))
+    elapsed = time.perf_counter() - start
+    _report_frames("field", len(frames), elapsed, hz)
+    print(f"[field] {events} tours détectés, {len(detector.lap_table())} voitures dans le tableau")
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Génère des frames joueur synthétiques : sortie des stands, tours de ~90 s, incidents et passage aux stands   #
+# (avec les variables des accumulateurs par tour).                                                             #
+#--------------------------------------------------------------------------------------------------------------#
+def _synthetic_player_frames(seconds: float, hz: float, seed: int = 1):
+    rng = random.Random(seed)
+    lap_len = 90.0
+    frames = []
+    inc = 0
+    for i in range(int(seconds * hz)):
+        t = i / hz
+        laps = int(t // lap_len)
+        since_line = t - laps * lap_len
+        shown = laps if since_line >= 0.5 else laps - 1
+        if rng.random() < 0.5 / hz / 60.0:
+            inc += rng.choice((1, 2, 4))
+        if t < 5.0:
+            surface = 1
+        elif laps % 10 == 9 and since_line > 80.0:
+            surface = 2
+        else:
+            surface = 3
+        frames.append({
+            "LapCompleted": laps,
+            "LapLastLapTime": lap_len + 0.001 * shown if shown > 0 else -1.0,
+            "PlayerTrackSurface": surface,
+            "PlayerCarMyIncidentCount": inc,
+            "LapDistPct": since_line / lap_len,
+            "Speed": 20.0 if surface != 3 else 45.0 + 15.0 * rng.random(),
+            "OnPitRoad": surface != 3,
+            "SessionTime": t,
+        })
+    return frames
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Benchmark LapValidator.update (transitions + accumulateurs) ; échoue si le budget par frame est dépassé.     #
+#--------------------------------------------------------------------------------------------------------------#
+def bench_fsm(seconds: float = 300.0, hz: float = 60.0) -> bool:
+    frames = _synthetic_player_frames(seconds, hz)
+    validator = LapValidator()
+    laps = 0
+    start = time.perf_counter()
+    for i, frame in enumerate(frames):
+        if validator.update(frame, now=i / hz)[0] != "none":
+            laps += 1
+    elapsed = time.perf_counter() - start
+    _report_frames("fsm", len(frames), elapsed, hz)
+    per_frame_us = (elapsed / len(frames)) * 1e6 if frames else 0.0
+    counts = sum(validator.detector.transition_counts.values())
+    print(f"[fsm] {laps} tours, {counts} transitions ; budget {FRAME_BUDGET_US:.0f} µs/frame : "
+          f"{'OK' if per_frame_us <= FRAME_BUDGET_US else 'DÉPASSÉ'}")
+    return per_frame_us <= FRAME_BUDGET_US
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Benchmark DiscontinuityDetector.update seul (avec une téléportation par tour) ; échoue au-delà du budget.    #
+#--------------------------------------------------------------------------------------------------------------#
+def bench_discontinuity(seconds: float = 300.0, hz: float = 60.0) -> bool:
+    frames = _synthetic_player_frames(seconds, hz)
+    for i, frame in enumerate(frames):
+        if i % int(90.0 * hz) == int(45.0 * hz):
+            frame["LapDistPct"] = (frame["LapDistPct"] + 0.3) % 1.0
+    detector = DiscontinuityDetector()
+    found = 0
+    start = time.perf_counter()
+    for i, frame in enumerate(frames):
+        if detector.update(frame["LapDistPct"], frame["SessionTime"], frame["PlayerTrackSurface"], i / hz):
+            found += 1
+    elapsed = time.perf_counter() - start
+    _report_frames("discontinuity", len(frames), elapsed, hz)
+    per_frame_us = (elapsed / len(frames)) * 1e6 if frames else 0.0
+    print(f"[discontinuity] {found} discontinuités ; budget {DISCONTINUITY_BUDGET_US:.0f} µs/frame : "
+          f"{'OK' if per_frame_us <= DISCONTINUITY_BUDGET_US else 'DÉPASSÉ'}")
+    return per_frame_us <= DISCONTINUITY_BUDGET_US
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Benchmark LapProjector.update (relevé de courbe + projection), chaque tour devenant la référence de session. #
+#--------------------------------------------------------------------------------------------------------------#
+def bench_projection(seconds: float = 300.0, hz: float = 60.0) -> bool:
+    frames = _synthetic_player_frames(seconds, hz)
+    projector = LapProjector()
+    projected = 0
+    start = time.perf_counter()
+    for frame in frames:
+        if projector.update(frame["LapCompleted"], frame["LapDistPct"], frame["SessionTime"],
+                            frame["PlayerTrackSurface"]) is not None:
+            projected += 1
+        if frame["LapDistPct"] < 1.0 / hz / 90.0:
+            projector.lap_result(frame["LapCompleted"], "valid", frame["LapLastLapTime"])
+    elapsed = time.perf_counter() - start
+    _report_frames("projection", len(frames), elapsed, hz)
+    per_frame_us = (elapsed / len(frames)) * 1e6 if frames else 0.0
+    print(f"[projection] {projected} frames projetées ; budget {PROJECTION_BUDGET_US:.0f} µs/frame : "
+          f"{'OK' if per_frame_us <= PROJECTION_BUDGET_US else 'DÉPASSÉ'}")
+    return per_frame_us <= PROJECTION_BUDGET_US
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Benchmark de l'écriture d'un record selon la taille de l'historique : réécriture complète de l'instantané    #
+# contre une ligne ajoutée au journal (dans un dossier temporaire). Échoue si le coût du journal grandit avec  #
+# l'historique.                                                                                                #
+#--------------------------------------------------------------------------------------------------------------#
+def bench_journal(seconds: float = 300.0, hz: float = 60.0, sizes=(100, 1000, 10000), writes: int = 20) -> bool:
+    tmp = tempfile.mkdtemp(prefix="irtracker-bench-")
+    try:
+        snapshot_path = os.path.join(tmp, "best_laps.json")
+        journal_path = os.path.join(tmp, "best_laps.journal.jsonl")
+        entry = {"time": 84.512, "date": "2026-01-01T12:00:00", "stats": {"speed": {"min": 20.1, "max": 71.3}}}
+        costs = []
+        for n in sizes:
+            data = {f"{i % 50}|{i // 50}": {f"player{i}": dict(entry)} for i in range(n)}
+            if os.path.exists(journal_path):
+                os.remove(journal_path)
+            for i in range(n):
+                _append_line(journal_path, json.dumps({"k": "1|1", "p": f"player{i}", "e": entry}) + "\n")
+
+            start = time.perf_counter()
+            for _ in range(writes):
+                _atomic_write_json(snapshot_path, data)
+            snapshot_ms = (time.perf_counter() - start) / writes * 1e3
+
+            line = json.dumps({"k": "1|1", "p": "player0", "e": entry}) + "\n"
+            start = time.perf_counter()
+            for _ in range(writes):
+                _append_line(journal_path, line)
+            journal_ms = (time.perf_counter() - start) / writes * 1e3
+            costs.append(journal_ms)
+            print(f"[journal] {n:>6} records : instantané {snapshot_ms:7.2f} ms/record, "
+                  f"journal {journal_ms:6.2f} ms/record")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    # fsync domine : on tolère du bruit, pas une croissance proportionnelle à l'historique
+    flat = costs[-1] <= 3.0 * max(costs[0], 0.05)
+    print(f"[journal] coût du journal {'stable' if flat else 'CROISSANT'} avec l'historique")
+    return flat
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Redirige les fichiers des meilleurs tours vers un dossier temporaire (jamais les données de l'utilisateur).  #
+#--------------------------------------------------------------------------------------------------------------#
+@contextlib.contextmanager
+def _temp_best_laps_files():
+    names = ("BEST_LAPS_PATH", "BEST_LAPS_BIN_PATH", "BEST_LAPS_JOURNAL_PATH", "BEST_LAPS_COMPACTING_PATH")
+    saved = {name: getattr(data_store, name) for name in names}
+    tmp = tempfile.mkdtemp(prefix="irtracker-bench-")
+    try:
+        data_store.BEST_LAPS_PATH = os.path.join(tmp, "best_laps.json")
+        data_store.BEST_LAPS_BIN_PATH = os.path.join(tmp, "best_laps.bin")
+        data_store.BEST_LAPS_JOURNAL_PATH = os.path.join(tmp, "best_laps.journal.jsonl")
+        data_store.BEST_LAPS_COMPACTING_PATH = data_store.BEST_LAPS_JOURNAL_PATH + ".compacting"
+        yield tmp
+    finally:
+        for name, value in saved.items():
+            setattr(data_store, name, value)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Coût de RecordManager.save_lap (écriture synchrone, moteur JSON) selon le nombre de records existants :      #
+# la mémoire faisant foi, il ne doit pas dépendre de la taille de best_laps.json. Le rechargement complet      #
+# qui suivait chaque record est mesuré à titre de comparaison.                                                 #
+#--------------------------------------------------------------------------------------------------------------#
+def bench_save(seconds: float = 300.0, hz: float = 60.0, sizes=(100, 1000, 10000), writes: int = 20) -> bool:
+    entry = {"time": 84.512, "date": "2026-01-01T12:00:00", "stats": {"speed": {"min": 20.1, "max": 71.3}}}
+    costs = []
+    for n in sizes:
+        with _temp_best_laps_files():
+            DataStore.save_best_laps({f"{i % 50}|{i // 50}": {f"player{i}": dict(entry)} for i in range(n)})
+            manager = RecordManager(JsonRecordStore(), durability_window=0)
+
+            start = time.perf_counter()
+            for i in range(writes):
+                manager.save_lap("bench", 1, 1, 90.0 - i * 0.01)
+            save_ms = (time.perf_counter() - start) / writes * 1e3
+
+            start = time.perf_counter()
+            for _ in range(writes):
+                manager.refresh(force=True)
+            refresh_ms = (time.perf_counter() - start) / writes * 1e3
+
+            start = time.perf_counter()
+            for _ in range(writes):
+                manager.reload()
+            reload_ms = (time.perf_counter() - start) / writes * 1e3
+            manager.close()
+        costs.append(save_ms)
+        print(f"[save] {n:>6} records : save_lap {save_ms:6.2f} ms, contrôle externe {refresh_ms * 1e3:6.1f} µs "
+              f"(rechargement complet évité : {reload_ms:7.2f} ms)")
+    # fsync du journal domine : on tolère du bruit, pas une croissance proportionnelle au fichier
+    flat = costs[-1] <= 3.0 * max(costs[0], 0.05)
+    print(f"[save] coût de save_lap {'stable' if flat else 'CROISSANT'} avec la taille du fichier")
+    return flat
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Historique en colonnes : `laps` tours synthétiques (blocs figés écrits directement), puis chargement,        #
+# statistiques globales (tout l'historique, un combo, un joueur) et ajout d'un tour. Budget : requête < 50 ms. #
+#--------------------------------------------------------------------------------------------------------------#
+def bench_history(seconds: float = 300.0, hz: float = 60.0, laps: int = 500_000) -> bool:
+    rng = np.random.default_rng(1)
+    tmp = tempfile.mkdtemp(prefix="irtracker-bench-")
+    try:
+        _atomic_write_json(os.path.join(tmp, "catalog.json"),
+                           {"players": [f"player{i}" for i in range(20)], "reasons": ["out_lap", "incidents", "tow"]})
+        for index, start in enumerate(range(0, laps, CHUNK_ROWS)):
+            n = min(CHUNK_ROWS, laps - start)
+            valid = rng.random(n) < 0.7
+            data = {
+                "ts": 1.7e9 + np.arange(start, start + n) * 90.0,
+                "session": 1.7e9 + (np.arange(start, start + n) // 30) * 2700,
+                "track": rng.integers(1, 40, n),
+                "car": rng.integers(1, 20, n),
+                "player": rng.integers(0, 20, n),
+                "lap": np.arange(n) % 30,
+                "time": rng.normal(90.0, 3.0, n),
+                "valid": valid,
+                "reason": np.where(valid, -1, rng.integers(0, 3, n)),
+                "incidents": np.where(valid, 0, rng.integers(0, 5, n)),
+            }
+            np.savez(os.path.join(tmp, f"chunk_{index:05d}.npz"),
+                     **{name: data[name].astype(dtype) for name, dtype, _ in COLUMNS})
+
+        start = time.perf_counter()
+        history = LapHistory(tmp)
+        load_ms = (time.perf_counter() - start) * 1e3
+        history.columns()
+        memory = sum(col.nbytes for col in history.columns().values())
+
+        queries = {"global": (None, None, None), "combo": (12, 7, None), "joueur": (12, 7, "player3")}
+        worst = 0.0
+        for label, (track_id, car_id, player) in queries.items():
+            start = time.perf_counter()
+            history._summaries.clear()
+            summary = history.summary(track_id, car_id, player)
+            query_ms = (time.perf_counter() - start) * 1e3
+            worst = max(worst, query_ms)
+            print(f"[history] requête {label:<7}: {query_ms:6.2f} ms "
+                  f"({summary['laps']} tours, {summary['valid']} valides)")
+
+        start = time.perf_counter()
+        history.append(time.time(), 0, 12, 7, "player3", 1, 90.0, True)
+        append_ms = (time.perf_counter() - start) * 1e3
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(f"[history] {laps} tours : chargement {load_ms:.1f} ms, mémoire {memory / 1e6:.1f} Mo "
+          f"({memory / laps:.0f} o/tour), ajout {append_ms:.2f} ms")
+    print(f"[history] budget 50 ms/requête : {'OK' if worst <= 50.0 else 'DÉPASSÉ'}")
+    return worst <= 50.0
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Instantané des meilleurs tours : taille et temps de chargement du JSON (indent=2) et du format binaire       #
+# (complet, puis sans les statistiques par tour comme au démarrage) sur `records` records synthétiques, avec   #
+# des statistiques propres à chaque record (mêmes champs que les accumulateurs de LapAccumulators).            #
+#--------------------------------------------------------------------------------------------------------------#
+def bench_snapshot(seconds: float = 300.0, hz: float = 60.0, records: int = 100_000, repeat: int = 3) -> bool:
+    rng = random.Random(1)
+
+    def lap_stats() -> dict:
+        incidents = rng.random() < 0.2
+        return {
+            "speed": {"min": round(rng.uniform(15.0, 30.0), 2), "max": round(rng.uniform(60.0, 80.0), 2),
+                      "avg": round(rng.uniform(40.0, 55.0), 2)},
+            "off_track": {"time": round(rng.uniform(0.0, 1.5), 3), "count": rng.randrange(3)},
+            "incidents": {"delta": 2 if incidents else 0,
+                          "first_pct": round(rng.random(), 4) if incidents else None,
+                          "last_pct": round(rng.random(), 4) if incidents else None,
+                          "events": [[round(rng.random(), 4), 2, 1]] if incidents else []},
+            "pit_lane": {"time": 0.0},
+            "flags": {"mask": rng.choice((0, 4, 0x40000))},
+            "not_in_world": {"time": 0.0, "count": 0},
+            "discontinuity": {"count": 0, "kinds": []},
+        }
+
+    best_laps: dict = {}
+    for i in range(records):
+        combo = best_laps.setdefault(f"{i % 400}|{i % 150}", {})
+        combo[f"player{rng.randrange(1000)}"] = {"time": round(rng.uniform(60.0, 120.0), 3),
+                                                  "date": f"2026-01-{1 + i % 28:02d}T12:{i % 60:02d}:00",
+                                                  "stats": lap_stats()}
+    count = sum(len(v) for v in best_laps.values())
+
+    tmp = tempfile.mkdtemp(prefix="irtracker-bench-")
+    try:
+        json_path = os.path.join(tmp, "best_laps.json")
+        bin_path = os.path.join(tmp, "best_laps.bin")
+        _atomic_write_json(json_path, best_laps)
+        with open(bin_path, "wb") as f:
+            f.write(encode_best_laps(best_laps))
+
+        def timed(load) -> float:
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                load()
+                best = min(best, time.perf_counter() - start)
+            return best * 1e3
+
+        def load_json():
+            with open(json_path, "r", encoding="utf-8") as f:
+                json.load(f)
+
+        def load_binary(with_stats):
+            with open(bin_path, "rb") as f:
+                decode_best_laps(f.read(), with_stats=with_stats)
+
+        json_ms = timed(load_json)
+        full_ms = timed(lambda: load_binary(True))
+        lean_ms = timed(lambda: load_binary(False))
+        json_size, bin_size = os.path.getsize(json_path), os.path.getsize(bin_path)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(f"[snapshot] {count} records : JSON {json_size / 1e6:6.1f} Mo, {json_ms:6.1f} ms")
+    print(f"[snapshot] binaire       {bin_size / 1e6:6.1f} Mo, {full_ms:6.1f} ms ({full_ms / json_ms:.0%} du JSON) ; "
+          f"sans statistiques {lean_ms:6.1f} ms ({lean_ms / json_ms:.0%} du JSON)")
+    return full_ms < json_ms and lean_ms < json_ms
+
+
+BENCHMARKS = {
+    "field": bench_field,
+    "fsm": bench_fsm,
+    "discontinuity": bench_discontinuity,
+    "projection": bench_projection,
+    "journal": bench_journal,
+    "save": bench_save,
+    "history": bench_history,
+    "snapshot": bench_snapshot,
+}
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Point d'entrée CLI : lance un benchmark (ou tous) avec la durée simulée demandée.                            #
+#--------------------------------------------------------------------------------------------------------------#
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m iracing_tracker.tools.bench")
+    parser.add_argument("name", choices=sorted(BENCHMARKS) + ["all"])
+    parser.add_argument("--seconds", type=float, default=300.0, help="durée de télémétrie simulée")
+    args = parser.parse_args(argv)
+
+    # Un benchmark qui retourne False signale un budget dépassé
+    names = sorted(BENCHMARKS) if args.name == "all" else [args.name]
+    ok = True
+    for name in names:
+        if BENCHMARKS[name](seconds=args.seconds) is False:
+            ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
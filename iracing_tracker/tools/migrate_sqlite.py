@@ -0,0 +1,79 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/tools/migrate_sqlite.py                                                            #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Migration unique de best_laps.json (et des joueurs) vers la base SQLite records.db, puis       #
+#               vérification. Relançable : un temps déjà présent plus rapide est conservé.                     #
+#               Usage : python -m iracing_tracker.tools.migrate_sqlite [--json FICHIER] [--db FICHIER]         #
+################################################################################################################
+
+import sys
+import json
+import argparse
+
+from iracing_tracker.data_store import DataStore, RECORDS_DB_PATH
+from iracing_tracker.sqlite_store import SqliteRecordStore, split_combo_key
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Compte les entrées du JSON absentes de la base ou plus rapides que le temps en base.                         #
+#--------------------------------------------------------------------------------------------------------------#
+def _verify(best_laps: dict, store: SqliteRecordStore) -> int:
+    missing = 0
+    for key, players_map in best_laps.items():
+        combo = split_combo_key(key)
+        if combo is None or not isinstance(players_map, dict):
+            continue
+        for player, entry in players_map.items():
+            if not isinstance(entry, dict) or not entry.get("time") or player == "---":
+                continue
+            stored = store.get_entry(*combo, player)
+            if stored is None or stored["time"] > float(entry["time"]):
+                missing += 1
+    return missing
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Point d'entrée CLI : importe le JSON dans la base, vérifie et affiche le bilan.                              #
+#--------------------------------------------------------------------------------------------------------------#
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m iracing_tracker.tools.migrate_sqlite")
+    parser.add_argument("--json", default=None,
+                        help="fichier best_laps.json à migrer (défaut : best_laps.json + journal des records)")
+    parser.add_argument("--db", default=RECORDS_DB_PATH, help="base SQLite de destination")
+    args = parser.parse_args(argv)
+
+    if args.json is None:
+        best_laps = DataStore.load_best_laps()
+    else:
+        try:
+            with open(args.json, "r", encoding="utf-8") as f:
+                best_laps = json.load(f)
+        except FileNotFoundError:
+            best_laps = {}
+        except json.JSONDecodeError as e:
+            print(f"{args.json} illisible : {e}")
+            return 1
+        if not isinstance(best_laps, dict):
+            print(f"{args.json} : format inattendu")
+            return 1
+
+    store = SqliteRecordStore(args.db)
+    try:
+        players = store.add_players(DataStore.load_players())
+        imported, unchanged, skipped = store.import_best_laps(best_laps)
+        missing = _verify(best_laps, store)
+    finally:
+        store.close()
+
+    print(f"{imported} tours importés, {unchanged} déjà à jour, {skipped} entrées ignorées, {players} nouveaux joueurs → {args.db}")
+    if missing:
+        print(f"Vérification : {missing} tours absents de la base")
+        return 1
+    print("Vérification OK : la base est utilisée au prochain lancement (IRTRACKER_RECORD_STORE=json pour revenir au JSON)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/tools/revalidate.py                                                                #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Rejoue les sessions enregistrées dans le LapValidator actuel (un processus par session)        #
+#               et liste les tours dont le statut change.                                                      #
+#               Usage : python -m iracing_tracker.tools.revalidate [fichiers|dossier] [--workers N]            #
+################################################################################################################
+
+import os
+import sys
+import time
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from iracing_tracker.lap_validator import LapValidator
+from iracing_tracker.name_catalog import NameCatalog
+from iracing_tracker.record_manager import format_lap_time
+from iracing_tracker.session_recorder import RECORDINGS_DIR, list_recordings, read_recording
+
+
+# Objectif de débit : secondes de télémétrie rejouées par seconde de calcul (tous processus confondus)
+DEFAULT_REALTIME_TARGET = 500.0
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Indexe des résultats de tours par (numéro de tour, occurrence) : un reset de session peut réutiliser un N°.  #
+#--------------------------------------------------------------------------------------------------------------#
+def _index_laps(laps: list[dict]) -> dict:
+    seen = Counter()
+    indexed = {}
+    for lap in laps:
+        n = lap["lap"]
+        indexed[(n, seen[n])] = lap
+        seen[n] += 1
+    return indexed
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Rejoue un enregistrement dans un LapValidator (exécuté dans un processus du pool), repris de l'état noté     #
+# dans l'en-tête : un enregistrement ouvert en cours de session (changement de joueur) ne repart pas à neuf.   #
+#--------------------------------------------------------------------------------------------------------------#
+def revalidate_file(path: str) -> dict:
+    start = time.perf_counter()
+    header, entries = read_recording(path)
+
+    validator = LapValidator()
+    if header.get("validator") is not None:
+        try:
+            validator.restore(header["validator"])
+        except (ValueError, TypeError, KeyError):
+            validator = LapValidator()
+    recorded, replayed = [], []
+    frames = 0
+    first_t = last_t = None
+    for kind, item in entries:
+        if kind == "lap":
+            recorded.append(item)
+            continue
+        t, state = item
+        frames += 1
+        if first_t is None:
+            first_t = t
+        last_t = t
+        status, lap_time, reason = validator.update(state, now=t)
+        if status != "none":
+            replayed.append({
+                "lap": int(state.get("LapCompleted") or 0),
+                "status": status,
+                "lap_time": lap_time,
+                "reason": None if reason is None else str(reason),
+            })
+
+    # Comparaison tour par tour (statut, raison, temps)
+    before, after = _index_laps(recorded), _index_laps(replayed)
+    changes = []
+    for key in sorted(set(before) | set(after)):
+        old, new = before.get(key), after.get(key)
+        old_sig = (old["status"], old["reason"], old["lap_time"]) if old else None
+        new_sig = (new["status"], new["reason"], new["lap_time"]) if new else None
+        if old_sig != new_sig:
+            changes.append({"lap": key[0], "before": old, "after": new})
+
+    return {
+        "path": path,
+        "header": header,
+        "frames": frames,
+        "laps": len(recorded),
+        "duration": (last_t - first_t) if frames > 1 else 0.0,
+        "elapsed": time.perf_counter() - start,
+        "changes": changes,
+    }
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Met en forme un résultat de tour pour le rapport (« valid 1:23.456 », « invalid (incidents:2) »…).           #
+#--------------------------------------------------------------------------------------------------------------#
+def _describe(lap) -> str:
+    if lap is None:
+        return "absent"
+    text = f"{lap['status']} {format_lap_time(lap['lap_time'])}"
+    return f"{text} ({lap['reason']})" if lap.get("reason") else text
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Résout les arguments (fichiers et/ou dossiers) en liste d'enregistrements.                                   #
+#--------------------------------------------------------------------------------------------------------------#
+def _collect_paths(targets: list[str]) -> list[str]:
+    if not targets:
+        return list_recordings()
+    paths = []
+    for target in targets:
+        if os.path.isdir(target):
+            paths.extend(list_recordings(target))
+        else:
+            paths.append(target)
+    return paths
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Point d'entrée CLI : rejoue en parallèle, affiche le rapport des différences et le débit obtenu.             #
+#--------------------------------------------------------------------------------------------------------------#
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m iracing_tracker.tools.revalidate")
+    parser.add_argument("targets", nargs="*", help=f"enregistrements ou dossiers (défaut : {RECORDINGS_DIR})")
+    parser.add_argument("--workers", type=int, default=None, help="nombre de processus (défaut : nb de cœurs)")
+    parser.add_argument("--target", type=float, default=DEFAULT_REALTIME_TARGET,
+                        help="débit minimal attendu, en multiple du temps réel")
+    args = parser.parse_args(argv)
+
+    paths = _collect_paths(args.targets)
+    if not paths:
+        print("Aucun enregistrement trouvé.")
+        return 0
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(revalidate_file, paths))
+    wall = time.perf_counter() - start
+
+    catalog = NameCatalog()
+    total_frames = total_laps = total_changes = 0
+    total_duration = total_replay = 0.0
+    for res in results:
+        total_frames += res["frames"]
+        total_replay += res["elapsed"]
+        total_laps += res["laps"]
+        total_duration += res["duration"]
+        total_changes += len(res["changes"])
+        if not res["changes"]:
+            continue
+        h = res["header"]
+        if h.get("track_id") is not None and h.get("car_id") is not None:
+            combo = catalog.combo_label(h["track_id"], h["car_id"])
+        else:
+            combo = f"circuit {h.get('track_id')}, voiture {h.get('car_id')}"
+        print(f"{os.path.basename(res['path'])} ({combo}, {h.get('player')}) : "
+              f"{len(res['changes'])} tour(s) modifié(s)")
+        for change in res["changes"]:
+            print(f"  tour {change['lap']} : {_describe(change['before'])} -> {_describe(change['after'])}")
+
+    # Débit de rejeu par processus (hors démarrage du pool) et débit global (mur)
+    factor = total_duration / total_replay if total_replay > 0 else float("inf")
+    wall_factor = total_duration / wall if wall > 0 else float("inf")
+    print(f"{len(results)} session(s), {total_laps} tour(s), {total_changes} changement(s) ; "
+          f"{total_frames} frames en {wall:.2f} s ({wall_factor:,.0f}x temps réel au global), "
+          f"rejeu {factor:,.0f}x temps réel par processus (objectif {args.target:,.0f}x)")
+    if factor < args.target:
+        print("Objectif de débit non atteint.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/tools/scenarios.py                                                                 #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Corpus de scénarios télémétriques scriptés et harnais de vérification du LapValidator :        #
+#               séquence (status, reason) attendue + débit en frames/s.                                        #
+#               Usage : python -m iracing_tracker.tools.scenarios [nom ...] [--repeat N]                       #
+################################################################################################################
+
+import sys
+import time
+import argparse
+from typing import Optional
+
+from iracing_tracker.lap_validator import LapValidator
+from iracing_tracker.lap_rules import FLAG_BLACK
+
+
+# Fréquence des frames scriptées (celle de la boucle worker)
+SCENARIO_HZ = 10.0
+
+# Surfaces iRSDK (irsdk_TrkLoc)
+NOT_IN_WORLD, OFF_TRACK, PIT_STALL, APPROACHING_PITS, ON_TRACK = -1, 0, 1, 2, 3
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Construit une télémétrie joueur frame par frame (LapCompleted, LapLastLapTime, surface, incidents).          #
+#--------------------------------------------------------------------------------------------------------------#
+class ScenarioBuilder:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Démarre au stand, LapCompleted donné (0 en début de session), aucun temps posé.                              #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self, lap_completed: int = 0, hz: float = SCENARIO_HZ):
+        self.dt = 1.0 / hz
+        self.t = 0.0
+        self.lap_completed = lap_completed
+        self.lap_time = -1.0
+        self.surface = PIT_STALL
+        self.incidents = 0
+        self.flags = 0
+        self.pct: Optional[float] = None          # LapDistPct (None = non émis, comme dans les anciens scénarios)
+        self.session_offset = 0.0                 # Décalage de SessionTime par rapport à l'horloge (saut de replay)
+        self.frames: list[tuple[float, dict]] = []
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Émet des frames pendant `seconds` avec l'état courant (surface modifiable au passage).                       #
+    #--------------------------------------------------------------------------------------------------------------#
+    def hold(self, seconds: float, surface: Optional[int] = None) -> "ScenarioBuilder":
+        if surface is not None:
+            self.surface = surface
+        for _ in range(max(1, int(round(seconds / self.dt)))):
+            self.t += self.dt
+            frame = {
+                "LapCompleted": self.lap_completed,
+                "LapLastLapTime": self.lap_time,
+                "PlayerTrackSurface": self.surface,
+                "PlayerCarMyIncidentCount": self.incidents,
+                "SessionFlags": self.flags,
+            }
+            if self.pct is not None:
+                frame["LapDistPct"] = self.pct
+                frame["SessionTime"] = self.t + self.session_offset
+            self.frames.append((self.t, frame))
+        return self
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Roule en piste pendant `seconds` en faisant avancer LapDistPct (tour de `lap_seconds`).                      #
+    #--------------------------------------------------------------------------------------------------------------#
+    def drive(self, seconds: float, lap_seconds: float = 85.0) -> "ScenarioBuilder":
+        if self.pct is None:
+            self.pct = 0.0
+        self.surface = ON_TRACK
+        for _ in range(max(1, int(round(seconds / self.dt)))):
+            self.pct = (self.pct + self.dt / lap_seconds) % 1.0
+            self.hold(self.dt)
+        return self
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Téléportation : LapDistPct saute de `delta` (fraction de tour) d'une frame à l'autre.                        #
+    #--------------------------------------------------------------------------------------------------------------#
+    def teleport(self, delta: float) -> "ScenarioBuilder":
+        self.pct = ((self.pct or 0.0) + delta) % 1.0
+        return self.hold(self.dt)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Saut de replay : SessionTime avance de `seconds` et LapCompleted de `laps` (nouveau temps posé).             #
+    #--------------------------------------------------------------------------------------------------------------#
+    def jump_time(self, seconds: float, laps: int, lap_time: float) -> "ScenarioBuilder":
+        self.session_offset += seconds
+        self.lap_completed += laps
+        self.lap_time = lap_time
+        return self.hold(self.dt)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Sortie des stands : stand → voie des stands → piste.                                                         #
+    #--------------------------------------------------------------------------------------------------------------#
+    def leave_pits(self) -> "ScenarioBuilder":
+        return self.hold(2.0, PIT_STALL).hold(5.0, APPROACHING_PITS).hold(1.0, ON_TRACK)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Franchit la ligne ; iRacing pose `lap_time` après `lag` secondes (None = aucun temps posé ; 0 = sur la       #
+    # frame même où LapCompleted s'incrémente).                                                                    #
+    #--------------------------------------------------------------------------------------------------------------#
+    def cross_line(self, lap_time: Optional[float], lag: float = 0.3) -> "ScenarioBuilder":
+        self.lap_completed += 1
+        if lag > 0:
+            self.hold(lag)
+        if lap_time is not None:
+            self.lap_time = lap_time
+        if self.pct is not None:
+            self.pct = 0.0
+        return self.hold(3.0)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Ajoute des incidents (x) à l'instant courant.                                                                #
+    #--------------------------------------------------------------------------------------------------------------#
+    def incident(self, count: int) -> "ScenarioBuilder":
+        self.incidents += count
+        return self.hold(0.1)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Drapeaux de session (SessionFlags) pendant `seconds`, puis retour à aucun drapeau.                           #
+    #--------------------------------------------------------------------------------------------------------------#
+    def flag(self, mask: int, seconds: float = 5.0) -> "ScenarioBuilder":
+        self.flags = mask
+        self.hold(seconds)
+        self.flags = 0
+        return self
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Remorquage : voiture hors du monde pendant le tow, puis déposée au stand.                                    #
+    #--------------------------------------------------------------------------------------------------------------#
+    def tow(self, seconds: float = 10.0) -> "ScenarioBuilder":
+        return self.hold(seconds, NOT_IN_WORLD).hold(2.0, PIT_STALL)
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Corpus : nom → (construction de la télémétrie, séquence (status, reason) attendue).                          #
+#--------------------------------------------------------------------------------------------------------------#
+def _clean_laps():
+    b = ScenarioBuilder().leave_pits().hold(80.0)
+    b.cross_line(None).hold(80.0).cross_line(84.512).hold(80.0).cross_line(84.337)
+    return b, [("invalid", "out_lap"), ("valid", None), ("valid", None)]
+
+def _out_lap_with_time():
+    b = ScenarioBuilder().leave_pits().hold(60.0).cross_line(70.250).hold(80.0).cross_line(84.100)
+    return b, [("invalid", "out_lap"), ("valid", None)]
+
+def _tow():
+    b = ScenarioBuilder().leave_pits().hold(60.0).cross_line(None).hold(40.0).incident(4).tow()
+    b.leave_pits().hold(60.0).cross_line(None).hold(80.0).cross_line(84.900)
+    return b, [("invalid", "out_lap"), ("invalid", "out_lap"), ("valid", None)]
+
+def _reset_to_pits():
+    b = ScenarioBuilder().leave_pits().hold(60.0).cross_line(None).hold(80.0).cross_line(84.400)
+    b.hold(30.0).hold(2.0, PIT_STALL).leave_pits().hold(60.0).cross_line(None).hold(80.0).cross_line(84.300)
+    return b, [("invalid", "out_lap"), ("valid", None), ("invalid", "out_lap"), ("valid", None)]
+
+def _flags_with_incidents():
+    b = ScenarioBuilder().leave_pits().hold(60.0).cross_line(None)
+    b.hold(30.0).incident(2).hold(50.0).cross_line(None)              # Tour non chronométré (drapeau) + 2x
+    b.hold(20.0).incident(4).hold(60.0).cross_line(86.010)            # Tour chronométré + 4x
+    b.hold(80.0).cross_line(84.800)
+    return b, [("invalid", "out_lap"), ("invalid", "flag_and_incidents:2"), ("invalid", "incidents:4"),
+               ("valid", None)]
+
+def _black_flag():
+    # Drapeau noir en cours de tour, sans incident : tour invalide, le suivant (drapeau levé) reste valide
+    b = ScenarioBuilder().leave_pits().hold(60.0).cross_line(None).hold(30.0).flag(FLAG_BLACK).hold(45.0)
+    b.cross_line(84.950).hold(80.0).cross_line(84.650)
+    return b, [("invalid", "out_lap"), ("invalid", "black_flag"), ("valid", None)]
+
+def _teleport():
+    # Saut de 30 % du tour en piste : tour invalide (discontinuité), le suivant reste valide
+    b = ScenarioBuilder().leave_pits().hold(60.0).cross_line(None)
+    b.drive(30.0).teleport(0.3).drive(29.0).cross_line(84.950).drive(84.0).cross_line(84.650)
+    return b, [("invalid", "out_lap"), ("invalid", "discontinuity"), ("valid", None)]
+
+def _replay_jump():
+    # Saut de replay (+3 tours) : aucun faux tour au saut, le tour partiel qui suit est invalide
+    b = ScenarioBuilder().leave_pits().hold(60.0).cross_line(None).drive(84.0).cross_line(84.500)
+    b.drive(40.0).jump_time(260.0, 3, 84.420).drive(44.0).cross_line(84.380).drive(84.0).cross_line(84.360)
+    return b, [("invalid", "out_lap"), ("valid", None), ("invalid", "discontinuity"), ("valid", None)]
+
+def _first_lap_of_session():
+    # Arrivée dans une session déjà entamée (LapCompleted hérité), départ du stand
+    b = ScenarioBuilder(lap_completed=3).leave_pits().hold(60.0).cross_line(None).hold(80.0).cross_line(84.700)
+    return b, [("invalid", "out_lap"), ("valid", None)]
+
+def _sdk_lag():
+    # Temps posé 2 s après la ligne (> pending_max_wait) : tour clos sans temps, le suivant reste valide
+    b = ScenarioBuilder().leave_pits().hold(60.0).cross_line(None).hold(80.0)
+    b.cross_line(84.600, lag=2.0).hold(80.0).cross_line(84.550)
+    return b, [("invalid", "out_lap"), ("invalid", "incomplete"), ("valid", None)]
+
+def _time_on_crossing_frame():
+    # Temps posé sur la frame même de la ligne : le tour est confirmé, pas expiré en « incomplete »
+    b = ScenarioBuilder().leave_pits().hold(60.0).cross_line(None).hold(80.0)
+    b.cross_line(87.500, lag=0.0).hold(80.0).cross_line(84.200, lag=0.0)
+    return b, [("invalid", "out_lap"), ("valid", None), ("valid", None)]
+
+
+SCENARIOS = {
+    "clean_laps": _clean_laps,
+    "out_lap_with_time": _out_lap_with_time,
+    "tow": _tow,
+    "reset_to_pits": _reset_to_pits,
+    "flags_with_incidents": _flags_with_incidents,
+    "black_flag": _black_flag,
+    "teleport": _teleport,
+    "replay_jump": _replay_jump,
+    "first_lap_of_session": _first_lap_of_session,
+    "sdk_lag": _sdk_lag,
+    "time_on_crossing_frame": _time_on_crossing_frame,
+}
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Rejoue les frames dans un LapValidator neuf ; retourne la séquence (status, reason) obtenue.                 #
+#--------------------------------------------------------------------------------------------------------------#
+def run_frames(frames: list[tuple[float, dict]]) -> list[tuple[str, Optional[str]]]:
+    validator = LapValidator()
+    results = []
+    for t, state in frames:
+        status, _lap_time, reason = validator.update(state, now=t)
+        if status != "none":
+            results.append((status, None if reason is None else str(reason)))
+    return results
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Exécute les scénarios demandés : vérifie les séquences et mesure le débit (frames/s).                        #
+#--------------------------------------------------------------------------------------------------------------#
+def run_scenarios(names: Optional[list[str]] = None, repeat: int = 1) -> bool:
+    ok = True
+    total_frames = 0
+    total_elapsed = 0.0
+    for name in names or list(SCENARIOS):
+        builder, expected = SCENARIOS[name]()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            got = run_frames(builder.frames)
+        elapsed = time.perf_counter() - start
+        total_frames += len(builder.frames) * repeat
+        total_elapsed += elapsed
+        if got == expected:
+            print(f"OK     {name} ({len(builder.frames)} frames)")
+        else:
+            ok = False
+            print(f"ÉCHEC  {name}\n         attendu : {expected}\n         obtenu  : {got}")
+    fps = total_frames / total_elapsed if total_elapsed > 0 else float("inf")
+    print(f"{total_frames} frames en {total_elapsed:.3f} s : {fps:,.0f} frames/s")
+    return ok
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Point d'entrée CLI : code de retour non nul si un scénario échoue.                                           #
+#--------------------------------------------------------------------------------------------------------------#
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m iracing_tracker.tools.scenarios")
+    parser.add_argument("names", nargs="*", choices=[[]] + list(SCENARIOS), help="scénarios (défaut : tous)")
+    parser.add_argument("--repeat", type=int, default=1, help="répétitions (mesure de débit)")
+    args = parser.parse_args(argv)
+    return 0 if run_scenarios(args.names or None, max(1, args.repeat)) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
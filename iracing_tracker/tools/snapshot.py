@@ -0,0 +1,69 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/tools/snapshot.py                                                                  #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Conversion de l'instantané des meilleurs tours entre JSON et format binaire compact.           #
+#               Usage : python -m iracing_tracker.tools.snapshot binary                                        #
+#                       python -m iracing_tracker.tools.snapshot json [--output FICHIER] [--switch]            #
+################################################################################################################
+
+import os
+import sys
+import argparse
+
+from iracing_tracker import data_store
+from iracing_tracker.data_store import DataStore, BEST_LAPS_PATH, BEST_LAPS_BIN_PATH, SNAPSHOT_BINARY
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Passe au format binaire : tous les records (instantané + journaux) réécrits dans best_laps.bin, qui devient  #
+# l'instantané ; best_laps.json est laissé en place comme dernier export.                                      #
+#--------------------------------------------------------------------------------------------------------------#
+def to_binary() -> int:
+    best_laps = DataStore.load_best_laps()
+    os.environ["IRTRACKER_SNAPSHOT_FORMAT"] = SNAPSHOT_BINARY
+    DataStore.save_best_laps(best_laps)
+    count = sum(len(v) for v in best_laps.values() if isinstance(v, dict))
+    print(f"{count} records → {BEST_LAPS_BIN_PATH} ({os.path.getsize(BEST_LAPS_BIN_PATH)} octets)")
+    if os.path.exists(BEST_LAPS_PATH):
+        print(f"{BEST_LAPS_PATH} ({os.path.getsize(BEST_LAPS_PATH)} octets) conservé comme export")
+    return 0
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Exporte les records en JSON ; avec `switch`, supprime best_laps.bin pour revenir à l'instantané JSON.        #
+#--------------------------------------------------------------------------------------------------------------#
+def to_json(output: str, switch: bool) -> int:
+    count = DataStore.export_best_laps_json(output)
+    print(f"{count} records → {output}")
+    if switch:
+        if os.path.abspath(output) != os.path.abspath(BEST_LAPS_PATH):
+            print(f"--switch exige l'export vers {BEST_LAPS_PATH}")
+            return 1
+        with data_store._snapshot_lock:
+            if os.path.exists(BEST_LAPS_BIN_PATH):
+                os.remove(BEST_LAPS_BIN_PATH)
+        print("Instantané JSON utilisé au prochain lancement")
+    return 0
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Point d'entrée CLI.                                                                                          #
+#--------------------------------------------------------------------------------------------------------------#
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m iracing_tracker.tools.snapshot")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("binary", help="passer l'instantané au format binaire (best_laps.bin)")
+    export = sub.add_parser("json", help="exporter les records en JSON")
+    export.add_argument("--output", default=BEST_LAPS_PATH, help="fichier JSON de destination")
+    export.add_argument("--switch", action="store_true", help="revenir à l'instantané JSON (supprime best_laps.bin)")
+    args = parser.parse_args(argv)
+
+    if args.command == "binary":
+        return to_binary()
+    return to_json(args.output, args.switch)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,408 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/tools/transfer.py                                                                  #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Export et import en flux des records et de l'historique des tours (CSV ou JSON Lines), pour    #
+#               passer d'un poste à l'autre ou archiver. Import validé, dédoublonné par empreinte du contenu,  #
+#               écrit en un seul lot (une transaction SQLite / un ajout au journal).                           #
+#               Usage : python -m iracing_tracker.tools.transfer export records|history FICHIER [--format F]   #
+#                       python -m iracing_tracker.tools.transfer import records|history FICHIER [--format F]   #
+################################################################################################################
+
+import sys
+import csv
+import json
+import time
+import hashlib
+import argparse
+import contextlib
+from typing import Optional
+
+from iracing_tracker.data_store import DataStore
+from iracing_tracker.lap_history import LapHistory
+from iracing_tracker.name_catalog import NameCatalog
+from iracing_tracker.record_store import BACKEND_SQLITE, configured_backend, open_record_store
+from iracing_tracker.sqlite_store import split_combo_key
+
+
+# Formats de fichier
+FORMAT_CSV = "csv"
+FORMAT_JSONL = "jsonl"
+
+# Colonnes exportées ; les noms de circuit et de voiture (catalogue) sont informatifs et ignorés à l'import
+RECORD_FIELDS = ("track_id", "car_id", "player", "time", "date", "stats", "track", "car")
+HISTORY_FIELDS = ("ts", "session", "track_id", "car_id", "player", "lap", "time", "valid", "reason", "incidents",
+                  "track", "car")
+
+# Intervalle (lignes) entre deux affichages de la progression
+PROGRESS_EVERY = 10000
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Ligne de fichier invalide (champ manquant ou illisible).                                                     #
+#--------------------------------------------------------------------------------------------------------------#
+class RowError(ValueError):
+    pass
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Compteur de lignes traitées : progression sur stderr toutes les PROGRESS_EVERY lignes, débit final.          #
+#--------------------------------------------------------------------------------------------------------------#
+class Progress:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Démarre le chronomètre (`label` : « export » / « import »).                                                  #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self, label: str):
+        self.label = label
+        self.rows = 0
+        self._start = time.perf_counter()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Compte une ligne.                                                                                            #
+    #--------------------------------------------------------------------------------------------------------------#
+    def tick(self):
+        self.rows += 1
+        if self.rows % PROGRESS_EVERY == 0:
+            print(f"\r{self.label} : {self.rows} lignes ({self.rate():,.0f} lignes/s)", end="", file=sys.stderr)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Débit moyen depuis le démarrage (lignes/s).                                                                  #
+    #--------------------------------------------------------------------------------------------------------------#
+    def rate(self) -> float:
+        elapsed = time.perf_counter() - self._start
+        return self.rows / elapsed if elapsed > 0 else float("inf")
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Bilan : nombre de lignes, durée et débit.                                                                    #
+    #--------------------------------------------------------------------------------------------------------------#
+    def done(self) -> str:
+        if self.rows >= PROGRESS_EVERY:
+            print(file=sys.stderr)
+        elapsed = time.perf_counter() - self._start
+        return f"{self.rows} lignes en {elapsed:.2f} s ({self.rate():,.0f} lignes/s)"
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Format d'un fichier : demandé, sinon déduit de l'extension (JSON Lines par défaut).                          #
+#--------------------------------------------------------------------------------------------------------------#
+def _detect_format(path: str, fmt: Optional[str]) -> str:
+    if fmt:
+        return fmt
+    return FORMAT_CSV if str(path).lower().endswith(".csv") else FORMAT_JSONL
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Empreinte du contenu d'une ligne (valeurs normalisées, dans l'ordre) : sert au dédoublonnage.                #
+#--------------------------------------------------------------------------------------------------------------#
+def _content_hash(values: tuple) -> bytes:
+    return hashlib.blake2b(repr(values).encode("utf-8"), digest_size=16).digest()
+
+
+# ---- Écriture / lecture en flux ----
+
+#--------------------------------------------------------------------------------------------------------------#
+# Écrit des lignes (dicts) une à une en CSV ou en JSON Lines ; en CSV, les objets (stats) sont en JSON.        #
+#--------------------------------------------------------------------------------------------------------------#
+def _write_rows(out, fmt: str, fields: tuple, rows, progress: Progress):
+    if fmt == FORMAT_CSV:
+        writer = csv.DictWriter(out, fieldnames=fields, lineterminator="\n")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({k: json.dumps(v, ensure_ascii=False, separators=(",", ":")) if isinstance(v, dict)
+                             else ("" if v is None else v) for k, v in row.items()})
+            progress.tick()
+    else:
+        for row in rows:
+            out.write(json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n")
+            progress.tick()
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Lit des lignes une à une : (numéro de ligne, dict). En CSV les champs vides valent None.                     #
+#--------------------------------------------------------------------------------------------------------------#
+def _read_rows(src, fmt: str):
+    if fmt == FORMAT_CSV:
+        for number, row in enumerate(csv.DictReader(src), start=2):
+            yield number, {k: (v if v != "" else None) for k, v in row.items()}
+        return
+    for number, line in enumerate(src, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield number, RowError(f"JSON illisible ({e.msg})")
+            continue
+        yield number, row if isinstance(row, dict) else RowError("objet JSON attendu")
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Ouvre le fichier de sortie / d'entrée (« - » : sortie / entrée standard).                                    #
+#--------------------------------------------------------------------------------------------------------------#
+def _open(path: str, mode: str):
+    if path == "-":
+        return contextlib.nullcontext(sys.stdout if "w" in mode else sys.stdin)
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+# ---- Validation ----
+
+#--------------------------------------------------------------------------------------------------------------#
+# Champ entier / nombre / nom de joueur d'une ligne (RowError s'il manque ou est illisible).                   #
+#--------------------------------------------------------------------------------------------------------------#
+def _int(row: dict, key: str) -> int:
+    try:
+        return int(row[key])
+    except (KeyError, TypeError, ValueError):
+        raise RowError(f"{key} : entier attendu") from None
+
+
+def _float(row: dict, key: str) -> float:
+    try:
+        return float(row[key])
+    except (KeyError, TypeError, ValueError):
+        raise RowError(f"{key} : nombre attendu") from None
+
+
+def _player(row: dict) -> str:
+    player = str(row.get("player") or "").strip()
+    if not player or player == "---":
+        raise RowError("player : nom attendu")
+    return player
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Valide une ligne de record → (track_id, car_id, joueur, entrée).                                             #
+#--------------------------------------------------------------------------------------------------------------#
+def _parse_record(row: dict) -> tuple:
+    track_id, car_id, player = _int(row, "track_id"), _int(row, "car_id"), _player(row)
+    lap_time = _float(row, "time")
+    if lap_time <= 0:
+        raise RowError("time : temps positif attendu")
+    entry = {"time": lap_time, "date": row.get("date") or None}
+    stats = row.get("stats")
+    if isinstance(stats, str):
+        try:
+            stats = json.loads(stats)
+        except json.JSONDecodeError:
+            raise RowError("stats : JSON illisible") from None
+    if stats:
+        if not isinstance(stats, dict):
+            raise RowError("stats : objet attendu")
+        entry["stats"] = stats
+    return track_id, car_id, player, entry
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Valide une ligne d'historique → tuple dans l'ordre des arguments de LapHistory.append.                       #
+#--------------------------------------------------------------------------------------------------------------#
+def _parse_history(row: dict) -> tuple:
+    lap_time = _float(row, "time") if row.get("time") not in (None, "") else None
+    valid = row.get("valid")
+    if isinstance(valid, str):
+        valid = valid.strip().lower() in ("1", "true", "yes", "oui")
+    return (
+        _float(row, "ts"), _int(row, "session"), _int(row, "track_id"), _int(row, "car_id"), _player(row),
+        _int(row, "lap"), lap_time if lap_time and lap_time > 0 else None, bool(valid),
+        row.get("reason") or None, _int(row, "incidents") if row.get("incidents") else 0,
+    )
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Empreinte d'un record : combo, joueur, temps (au millième) et date ; les statistiques par tour n'en font pas #
+# partie (même tour, même record).                                                                             #
+#--------------------------------------------------------------------------------------------------------------#
+def _record_hash(track_id: int, car_id: int, player: str, entry: dict) -> bytes:
+    return _content_hash((track_id, car_id, player, round(float(entry["time"]), 3), entry.get("date")))
+
+
+# ---- Records ----
+
+#--------------------------------------------------------------------------------------------------------------#
+# Parcourt un dict au format de best_laps.json : (track_id, car_id, joueur, entrée).                           #
+#--------------------------------------------------------------------------------------------------------------#
+def _iter_best_laps(best_laps: dict):
+    for combo_key, players_map in best_laps.items():
+        combo = split_combo_key(combo_key)
+        if combo is None or not isinstance(players_map, dict):
+            continue
+        for player, entry in players_map.items():
+            if isinstance(entry, dict) and entry.get("time"):
+                yield (*combo, player, entry)
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Parcourt les records d'un stockage ouvert (SQLite en flux ; en JSON, les temps et dates déjà en mémoire).    #
+#--------------------------------------------------------------------------------------------------------------#
+def _iter_store(store, backend: str):
+    if backend == BACKEND_SQLITE:
+        return store.iter_entries()
+    return _iter_best_laps(store.load_all())
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Parcourt les records du moteur pour l'export, statistiques par tour comprises. SQLite en flux ; en JSON,     #
+# l'instantané et le journal sont de toute façon lus en entier.                                                #
+#--------------------------------------------------------------------------------------------------------------#
+def _iter_records(backend: str):
+    if backend != BACKEND_SQLITE:
+        yield from _iter_best_laps(DataStore.load_best_laps())
+        return
+    store = open_record_store(backend)
+    try:
+        yield from store.iter_entries()
+    finally:
+        store.close()
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Exporte tous les records.                                                                                    #
+#--------------------------------------------------------------------------------------------------------------#
+def export_records(path: str, fmt: str, backend: str) -> int:
+    catalog = NameCatalog()
+    progress = Progress("export")
+    rows = (
+        {"track_id": t, "car_id": c, "player": p, "time": e["time"], "date": e.get("date"),
+         "stats": e.get("stats") or None, "track": catalog.track_name(t), "car": catalog.car_name(c)}
+        for t, c, p, e in _iter_records(backend)
+    )
+    with _open(path, "w") as out:
+        _write_rows(out, fmt, RECORD_FIELDS, rows, progress)
+    print(f"Records exportés → {path} : {progress.done()}", file=sys.stderr)
+    return 0
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Importe des records : lignes validées, doublons (empreinte déjà vue dans le fichier ou dans les records)     #
+# écartés, temps conservé seulement s'il bat le record en place. Tout est écrit en un seul lot.                #
+#--------------------------------------------------------------------------------------------------------------#
+def import_records(path: str, fmt: str, backend: str) -> int:
+    # Meilleurs temps et empreintes des records en place (ce qui n'est pas plus rapide est ignoré)
+    best: dict[tuple, float] = {}
+    seen: set[bytes] = set()
+    store = open_record_store(backend)
+    for t, c, p, e in _iter_store(store, backend):
+        best[(t, c, p)] = float(e["time"])
+        seen.add(_record_hash(t, c, p, e))
+
+    counts = {"importés": 0, "doublons": 0, "plus lents": 0, "invalides": 0}
+    progress = Progress("import")
+
+    def entries(src):
+        for number, row in _read_rows(src, fmt):
+            progress.tick()
+            try:
+                if isinstance(row, RowError):
+                    raise row
+                track_id, car_id, player, entry = _parse_record(row)
+            except RowError as e:
+                counts["invalides"] += 1
+                print(f"\rligne {number} ignorée : {e}", file=sys.stderr)
+                continue
+            digest = _record_hash(track_id, car_id, player, entry)
+            if digest in seen:
+                counts["doublons"] += 1
+                continue
+            seen.add(digest)
+            key = (track_id, car_id, player)
+            if key in best and best[key] <= entry["time"]:
+                counts["plus lents"] += 1
+                continue
+            best[key] = entry["time"]
+            counts["importés"] += 1
+            yield track_id, car_id, player, entry
+
+    try:
+        with _open(path, "r") as src:
+            store.save_entries(entries(src))
+    finally:
+        store.close()
+    print(f"Records importés ({backend}) : {progress.done()} ; "
+          + ", ".join(f"{n} {label}" for label, n in counts.items()), file=sys.stderr)
+    return 1 if counts["invalides"] else 0
+
+
+# ---- Historique ----
+
+#--------------------------------------------------------------------------------------------------------------#
+# Exporte l'historique des tours, bloc par bloc.                                                               #
+#--------------------------------------------------------------------------------------------------------------#
+def export_history(path: str, fmt: str) -> int:
+    catalog = NameCatalog()
+    progress = Progress("export")
+    rows = (
+        dict(zip(HISTORY_FIELDS, (*lap, catalog.track_name(lap[2]), catalog.car_name(lap[3]))))
+        for lap in LapHistory().iter_rows()
+    )
+    with _open(path, "w") as out:
+        _write_rows(out, fmt, HISTORY_FIELDS, rows, progress)
+    print(f"Historique exporté → {path} : {progress.done()}", file=sys.stderr)
+    return 0
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Importe des tours dans l'historique (application fermée) : lignes validées, doublons écartés par empreinte,  #
+# ajout groupé (LapHistory.extend).                                                                            #
+#--------------------------------------------------------------------------------------------------------------#
+def import_history(path: str, fmt: str) -> int:
+    history = LapHistory()
+    seen = {_content_hash(lap) for lap in history.iter_rows()}
+    counts = {"importés": 0, "doublons": 0, "invalides": 0}
+    progress = Progress("import")
+
+    def laps(src):
+        for number, row in _read_rows(src, fmt):
+            progress.tick()
+            try:
+                if isinstance(row, RowError):
+                    raise row
+                lap = _parse_history(row)
+            except RowError as e:
+                counts["invalides"] += 1
+                print(f"\rligne {number} ignorée : {e}", file=sys.stderr)
+                continue
+            digest = _content_hash(lap)
+            if digest in seen:
+                counts["doublons"] += 1
+                continue
+            seen.add(digest)
+            counts["importés"] += 1
+            yield lap
+
+    with _open(path, "r") as src:
+        history.extend(laps(src))
+    print(f"Historique importé : {progress.done()} ; "
+          + ", ".join(f"{n} {label}" for label, n in counts.items()), file=sys.stderr)
+    return 1 if counts["invalides"] else 0
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Point d'entrée CLI.                                                                                          #
+#--------------------------------------------------------------------------------------------------------------#
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m iracing_tracker.tools.transfer")
+    parser.add_argument("action", choices=("export", "import"))
+    parser.add_argument("data", choices=("records", "history"), help="records ou historique des tours")
+    parser.add_argument("path", help="fichier (« - » : sortie / entrée standard)")
+    parser.add_argument("--format", choices=(FORMAT_CSV, FORMAT_JSONL), default=None,
+                        help="format du fichier (défaut : d'après l'extension, JSON Lines sinon)")
+    parser.add_argument("--store", choices=("json", "sqlite"), default=None,
+                        help="moteur des records (défaut : moteur configuré)")
+    args = parser.parse_args(argv)
+
+    fmt = _detect_format(args.path, args.format)
+    backend = args.store or configured_backend()
+    if args.data == "records":
+        if args.action == "export":
+            return export_records(args.path, fmt, backend)
+        return import_records(args.path, fmt, backend)
+    if args.action == "export":
+        return export_history(args.path, fmt)
+    return import_history(args.path, fmt)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,14 @@
 ################################################################################################################
 # Projet : iRacing Tracker                                                                                     #
 # Fichier : iracing_tracker/ui/app.py                                                                          #
-# Date de modification : 16.06.2026                                                                            #
+# Date de modification : 18.10.2026                                                                            #
 # Auteur : Nicolas Schneeberger                                                                                #
 # Description : Façade de l'interface PySide6 : assemble les panneaux et orchestre thème et événements.        #
 ################################################################################################################
 
 import os
 import sys
+import time
 import ctypes
 import queue as _q
 
@@ -42,6 +43,8 @@ from .session_times_panel import SessionTimesPanel
 from .debug_panel import DebugPanel
 from .logs_panel import LogsPanel
 from .players_dialog import PlayersDialog
+from iracing_tracker.lap_latency import LapLatencyStats
+from iracing_tracker.stint_tracker import format_stint_summary
 
 
 if os.name == "nt":
@@ -75,6 +78,8 @@ class TrackerUI:
 
         self.on_player_change = on_player_change
         self.on_debug_toggle = on_debug_toggle
+        self.on_reference_change = None
+        self.on_player_delete = None
 
         # Root
         central = QWidget()
@@ -163,6 +168,8 @@ class TrackerUI:
         self._build_menubar()
         self._apply_debug_visibility()
         self._event_queue = None
+        self._lap_latency = LapLatencyStats()
+        self._stint_text = "---"
         self._queue_timer = QTimer(self._win)
         self._queue_timer.setInterval(16)
         self._queue_timer.timeout.connect(self._pump_event_queue)
@@ -194,6 +201,18 @@ class TrackerUI:
     def set_on_debug_toggle(self, cb):
         self.on_debug_toggle = cb
 
+    #--------------------------------------------------------------------------------------------------------------#
+    # Définit le callback appelé lors du choix de la référence du tour projeté ("pb" ou "session").                #
+    #--------------------------------------------------------------------------------------------------------------#
+    def set_on_reference_change(self, cb):
+        self.on_reference_change = cb
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Définit le callback appelé à la suppression d'un joueur dans la fenêtre des joueurs (purge de ses records).  #
+    #--------------------------------------------------------------------------------------------------------------#
+    def set_on_player_delete(self, cb):
+        self.on_player_delete = cb
+
     #--------------------------------------------------------------------------------------------------------------#
     # Associe la queue d'événements worker → UI et démarre le timer de vidage.                                     #
     #--------------------------------------------------------------------------------------------------------------#
@@ -242,6 +261,12 @@ class TrackerUI:
     def update_current_lap_time(self, text: str):
         self.player_panel.set_current_lap(text)
 
+    #--------------------------------------------------------------------------------------------------------------#
+    # Met à jour le temps projeté du tour en cours.                                                                #
+    #--------------------------------------------------------------------------------------------------------------#
+    def update_projection(self, text: str):
+        self.player_panel.set_projection(text)
+
     #--------------------------------------------------------------------------------------------------------------#
     # Met à jour le temps de session affiché.                                                                      #
     #--------------------------------------------------------------------------------------------------------------#
@@ -264,7 +289,7 @@ class TrackerUI:
     # Met à jour la zone de debug.                                                                                 #
     #--------------------------------------------------------------------------------------------------------------#
     def update_debug(self, data: dict):
-        self.debug_panel.set_debug_data(data)
+        self.debug_panel.set_debug_data({**data, "Stint": self._stint_text, "LapLatency": self._lap_latency.format()})
 
     #--------------------------------------------------------------------------------------------------------------#
     # Ajoute un message horodaté dans les logs.                                                                    #
@@ -301,7 +326,7 @@ class TrackerUI:
     #--------------------------------------------------------------------------------------------------------------#
     def _on_edit_players_clicked(self):
         try:
-            dlg = PlayersDialog(self._win)
+            dlg = PlayersDialog(self._win, on_delete=self.on_player_delete)
             # Appliquer le même thème + police que la fenêtre principale
             try:
                 colors = self._colors or self._theme.colors()
@@ -321,7 +346,7 @@ class TrackerUI:
                 pass
 
     #--------------------------------------------------------------------------------------------------------------#
-    # Construit la barre de menus (Fichier, Édition, Affichage avec Debug et Thème).                               #
+    # Construit la barre de menus (Fichier, Édition, Affichage : Debug, Thème, référence du tour projeté).         #
     #--------------------------------------------------------------------------------------------------------------#
     def _build_menubar(self):
         menubar = self._title_bar.menu_bar()
@@ -358,6 +383,18 @@ class TrackerUI:
         theme_menu.addAction(self._act_theme_light)
         theme_menu.addAction(self._act_theme_dark)
         view_menu.addMenu(theme_menu)
+
+        reference_menu = QMenu("Référence du tour projeté", menubar)
+        ref_group = QActionGroup(self._win)
+        ref_group.setExclusive(True)
+        self._act_reference_pb = QAction("Record personnel", ref_group, checkable=True)
+        self._act_reference_session = QAction("Meilleur tour de la session", ref_group, checkable=True)
+        self._act_reference_pb.setChecked(True)
+        self._act_reference_pb.triggered.connect(lambda: self._on_reference_changed("pb"))
+        self._act_reference_session.triggered.connect(lambda: self._on_reference_changed("session"))
+        reference_menu.addAction(self._act_reference_pb)
+        reference_menu.addAction(self._act_reference_session)
+        view_menu.addMenu(reference_menu)
         menubar.addMenu(view_menu)
 
     #--------------------------------------------------------------------------------------------------------------#
@@ -367,6 +404,16 @@ class TrackerUI:
         self._theme.set_mode(mode)
         self._apply_theme(self._theme.colors())
 
+    #--------------------------------------------------------------------------------------------------------------#
+    # Transmet au worker la référence choisie pour le tour projeté.                                                #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _on_reference_changed(self, mode: str):
+        if callable(self.on_reference_change):
+            try:
+                self.on_reference_change(mode)
+            except Exception:
+                pass
+
     #--------------------------------------------------------------------------------------------------------------#
     # Applique le thème : chrome de la fenêtre (bordures, bannière), puis délégation à chaque panneau.             #
     #--------------------------------------------------------------------------------------------------------------#
@@ -501,6 +548,8 @@ class TrackerUI:
                         self._handle_banner_message(payload.get("type", ""))
                     else:
                         self.set_banner(payload.get("text", ""))
+                elif name == "projection":
+                    self.update_projection(payload.get("text", "-:--.-"))
                 elif name == "current_lap":
                     self.update_current_lap_time(payload.get("text", "---"))
                 elif name == "session_times":
@@ -509,6 +558,16 @@ class TrackerUI:
                 elif name == "last_laps":
                     entries = payload.get("entries") or payload.get("lines") or payload.get("text")
                     self.update_session_times(entries or [])
+                elif name == "stint":
+                    self._stint_text = format_stint_summary(payload.get("summary"))
+                elif name == "lap_latency":
+                    # Émis après bannière/liste du même tour : tout est affiché à ce stade
+                    stamps = dict(payload.get("stamps") or {})
+                    stamps["displayed"] = time.time()
+                    self._lap_latency.add(stamps)
+                elif name == "lap_persisted":
+                    # Record écrit sur disque : seule l'étape validé → enregistré est mesurée
+                    self._lap_latency.add(dict(payload.get("stamps") or {}))
         except _q.Empty:
             pass
         except Exception as e:
@@ -1,9 +1,9 @@
 ################################################################################################################
 # Projet : iRacing Tracker                                                                                     #
 # Fichier : iracing_tracker/ui/player_panel.py                                                                 #
-# Date de modification : 16.06.2026                                                                            #
+# Date de modification : 18.10.2026                                                                            #
 # Auteur : Nicolas Schneeberger                                                                                #
-# Description : Panneau "JOUEUR" (sélection joueur, record perso, dernier tour).                               #
+# Description : Panneau "JOUEUR" (sélection joueur, record perso, dernier tour, tour projeté).                 #
 ################################################################################################################
 
 from PySide6.QtCore import Qt, QSize
@@ -119,6 +119,18 @@ class PlayerPanel(QWidget):
         self.current_lap_label.setFont(QFont(FONT_FAMILY, FONT_SIZE_LAPTIME, QFont.Bold))
         self.current_lap_label.setAlignment(Qt.AlignCenter)
         lay.addWidget(self.current_lap_label)
+
+        s = _hsep(self); self.separators.append(s)
+        lay.addSpacing(SECTION_SEPARATOR_SPACING); lay.addWidget(s); lay.addSpacing(SECTION_SEPARATOR_SPACING)
+
+        lbl_projection = QLabel("Tour projeté :")
+        lbl_projection.setFont(QFont(FONT_FAMILY, FONT_SIZE_LABELS))
+        lay.addWidget(lbl_projection)
+
+        self.projection_label = QLabel("-:--.-")
+        self.projection_label.setFont(QFont(FONT_FAMILY, FONT_SIZE_LAPTIME, QFont.Bold))
+        self.projection_label.setAlignment(Qt.AlignCenter)
+        lay.addWidget(self.projection_label)
         lay.addStretch(1)
 
     #--------------------------------------------------------------------------------------------------------------#
@@ -133,6 +145,12 @@ class PlayerPanel(QWidget):
     def set_current_lap(self, text: str):
         self.current_lap_label.setText(text or "---")
 
+    #--------------------------------------------------------------------------------------------------------------#
+    # Met à jour le temps projeté du tour en cours.                                                                #
+    #--------------------------------------------------------------------------------------------------------------#
+    def set_projection(self, text: str):
+        self.projection_label.setText(text or "-:--.-")
+
     #--------------------------------------------------------------------------------------------------------------#
     # Active/désactive le sélecteur de joueur (et le restyle selon l'état).                                        #
     #--------------------------------------------------------------------------------------------------------------#
@@ -169,10 +169,12 @@ class AddPlayerDialog(QDialog):
 class PlayersDialog(QDialog):
 
     #--------------------------------------------------------------------------------------------------------------#
-    # Construit la liste, les boutons (ajouter / supprimer / fermer) et leurs connexions.                          #
+    # Construit la liste, les boutons (ajouter / supprimer / fermer) et leurs connexions. `on_delete(nom)`, si     #
+    # fourni, prend en charge la suppression des records du joueur (sinon purge complète via DataStore).           #
     #--------------------------------------------------------------------------------------------------------------#
-    def __init__(self, parent: QWidget | None = None):
+    def __init__(self, parent: QWidget | None = None, on_delete=None):
         super().__init__(parent)
+        self.on_delete = on_delete
         self.setWindowTitle("Joueurs")
         self.setModal(True)
         self.modified = False
@@ -364,7 +366,11 @@ class PlayersDialog(QDialog):
             pass
         ret = msg.exec()
         if ret == QMessageBox.Yes:
-            DataStore.delete_player(name)
+            if callable(self.on_delete):
+                DataStore.remove_player(name)
+                self.on_delete(name)
+            else:
+                DataStore.delete_player(name)
             self.modified = True
             self._reload_players()
 
@@ -1,7 +1,7 @@
 ################################################################################################################
 # Projet : iRacing Tracker                                                                                     #
 # Fichier : iracing_tracker/ui_bridge.py                                                                       #
-# Date de modification : 16.06.2026                                                                            #
+# Date de modification : 18.10.2026                                                                            #
 # Auteur : Nicolas Schneeberger                                                                                #
 # Description : Pont thread-safe worker → UI : pousse des messages dans la queue, avec coalescing.             #
 ################################################################################################################
@@ -26,6 +26,7 @@ class UIBridge:
         self._last_player_best: Optional[str] = None
         self._last_player_menu_state: Optional[bool] = None
         self._last_session_time_sec: Optional[int] = None
+        self._last_projection: Optional[str] = None
 
     #--------------------------------------------------------------------------------------------------------------#
     # Envoie le contexte (circuit + voiture), seulement s'il diffère du dernier envoyé.                            #
@@ -79,6 +80,14 @@ class UIBridge:
             self.ui_queue.put(("player_menu_state", {"enabled": enabled}))
             self._last_player_menu_state = enabled
 
+    #--------------------------------------------------------------------------------------------------------------#
+    # Envoie le temps projeté du tour en cours (texte déjà formaté), seulement s'il a changé.                      #
+    #--------------------------------------------------------------------------------------------------------------#
+    def update_projection(self, text: str):
+        if text != self._last_projection:
+            self.ui_queue.put(("projection", {"text": text}))
+            self._last_projection = text
+
     #--------------------------------------------------------------------------------------------------------------#
     # Envoie un message de log (toujours, sans coalescing).                                                        #
     #--------------------------------------------------------------------------------------------------------------#
@@ -99,6 +108,7 @@ class UIBridge:
         self._last_player_best = None
         self._last_player_menu_state = None
         self._last_session_time_sec = None
+        self._last_projection = None
 
     #--------------------------------------------------------------------------------------------------------------#
     # Envoie le classement (top 3) à l'UI.                                                                         #
@@ -112,6 +122,24 @@ class UIBridge:
     def update_last_laps(self, entries):
         self.ui_queue.put(("last_laps", {"entries": entries}))
 
+    #--------------------------------------------------------------------------------------------------------------#
+    # Envoie les horodatages d'un tour (ligne franchie / validé) ; l'UI ajoute « affiché ».                        #
+    #--------------------------------------------------------------------------------------------------------------#
+    def report_lap_latency(self, stamps: dict):
+        self.ui_queue.put(("lap_latency", {"stamps": stamps}))
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Envoie l'écriture sur disque du record d'un tour (validé / enregistré), depuis le rappel du commit.          #
+    #--------------------------------------------------------------------------------------------------------------#
+    def report_lap_persisted(self, stamps: dict):
+        self.ui_queue.put(("lap_persisted", {"stamps": stamps}))
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Envoie le résumé du relais en cours (None si aucun relais).                                                  #
+    #--------------------------------------------------------------------------------------------------------------#
+    def update_stint(self, summary: Optional[dict]):
+        self.ui_queue.put(("stint", {"summary": summary}))
+
     #--------------------------------------------------------------------------------------------------------------#
     # Envoie un message à afficher dans la bannière (waiting / personal_record / absolute_record / clear).         #
     #--------------------------------------------------------------------------------------------------------------#
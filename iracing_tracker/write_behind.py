@@ -0,0 +1,317 @@
+################################################################################################################
+# Projet : iRacing Tracker                                                                                     #
+# Fichier : iracing_tracker/write_behind.py                                                                    #
+# Date de modification : 18.10.2026                                                                            #
+# Auteur : Nicolas Schneeberger                                                                                #
+# Description : Persistance différée des records : un thread dédié reçoit les écritures par une queue, les     #
+#               regroupe sur une fenêtre de durabilité et les valide en un seul commit (un fsync / une         #
+#               transaction). Les lectures voient immédiatement les écritures en attente.                      #
+################################################################################################################
+
+import os
+import time
+import queue
+import threading
+from typing import Callable, Optional
+
+
+# Marque d'une suppression en attente dans la superposition
+_DELETED = object()
+
+# Aucun dépôt reçu (nouvel essai d'une rafale en échec sans dépôt arrivé pendant la fenêtre)
+_NO_ITEM = object()
+
+# Fenêtre de durabilité par défaut (s) : délai maximal entre un record et son écriture sur disque
+DURABILITY_WINDOW = 0.25
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Fenêtre de durabilité configurée (IRTRACKER_DURABILITY_MS, en millisecondes ; 0 = écriture synchrone).       #
+#--------------------------------------------------------------------------------------------------------------#
+def configured_durability_window() -> float:
+    value = os.getenv("IRTRACKER_DURABILITY_MS")
+    if value is None or not value.strip():
+        return DURABILITY_WINDOW
+    try:
+        return max(0.0, float(value) / 1000.0)
+    except ValueError:
+        return DURABILITY_WINDOW
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Enveloppe un stockage de records (JsonRecordStore / SqliteRecordStore) : `save_entry` n'écrit plus sur le    #
+# thread appelant mais dépose une intention dans la queue ; le thread de persistance valide chaque rafale en   #
+# un appel `save_entries` (et `delete_entries`). Les écritures en attente sont superposées aux lectures.       #
+#--------------------------------------------------------------------------------------------------------------#
+class WriteBehindStore:
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Démarre le thread de persistance devant `store`.                                                             #
+    #--------------------------------------------------------------------------------------------------------------#
+    def __init__(self, store, window: float = DURABILITY_WINDOW):
+        self.store = store
+        self.window = float(window)
+        self._queue: queue.Queue = queue.Queue()
+        self._pending: dict[tuple, dict] = {}
+        self._lock = threading.Lock()
+        self._commit_lock = threading.Lock()
+        self._closed = False
+
+        # Statistiques de commit (latence = premier dépôt de la rafale → fin du commit)
+        self.commits = 0
+        self.committed = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.last_latency: Optional[float] = None
+        self.max_latency = 0.0
+        self._latency_sum = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="record-write-behind", daemon=True)
+        self._thread.start()
+
+    # ---- Interface de stockage ----
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Recharge le stockage sous-jacent (les écritures en attente restent superposées ; jamais pendant un commit,   #
+    # pour qu'une entrée ne quitte pas la superposition avant d'être visible dans le stockage rechargé).           #
+    #--------------------------------------------------------------------------------------------------------------#
+    def reload(self):
+        with self._commit_lock:
+            self.store.reload()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Recharge le stockage sous-jacent s'il a changé hors de ce processus (même garde que `reload`).               #
+    #--------------------------------------------------------------------------------------------------------------#
+    def reload_if_changed(self) -> bool:
+        with self._commit_lock:
+            return self.store.reload_if_changed()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Entrée d'un joueur pour un combo : écriture en attente, sinon stockage.                                      #
+    #--------------------------------------------------------------------------------------------------------------#
+    def get_entry(self, track_id: int, car_id: int, player: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._pending.get((track_id, car_id, player))
+        if entry is None:
+            return self.store.get_entry(track_id, car_id, player)
+        return None if entry is _DELETED else entry
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Dépose l'écriture d'une entrée (visible immédiatement en lecture, écrite par le thread de persistance) ;     #
+    # après fermeture, écriture synchrone. Le test de fermeture et le dépôt sont atomiques (sous le verrou).       #
+    # `on_commit(horodatage epoch)` est appelé une fois l'entrée écrite (depuis le thread de persistance).         #
+    #--------------------------------------------------------------------------------------------------------------#
+    def save_entry(self, track_id: int, car_id: int, player: str, entry: dict,
+                   on_commit: Optional[Callable[[float], None]] = None):
+        key = (track_id, car_id, player)
+        with self._lock:
+            if not self._closed:
+                self._pending[key] = entry
+                self._queue.put((time.perf_counter(), key, entry, [on_commit] if on_commit else []))
+                return
+        self.store.save_entries([(track_id, car_id, player, entry)])
+        if on_commit:
+            on_commit(time.time())
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Dépose la suppression d'entrées [(track_id, car_id, joueur)] (invisibles immédiatement en lecture).          #
+    #--------------------------------------------------------------------------------------------------------------#
+    def delete_entries(self, keys: list):
+        now = time.perf_counter()
+        with self._lock:
+            if not self._closed:
+                for key in keys:
+                    self._pending[tuple(key)] = _DELETED
+                    self._queue.put((now, tuple(key), _DELETED, []))
+                return
+        self.store.delete_entries(keys)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Dépose une autre écriture (`task()`, ex. ajout au journal des statistiques) à exécuter sur le thread de      #
+    # persistance avec la rafale suivante ; exécutée tout de suite après fermeture. Une erreur est comptée dans    #
+    # les statistiques, sans nouvel essai.                                                                         #
+    #--------------------------------------------------------------------------------------------------------------#
+    def submit(self, task: Callable[[], None]):
+        with self._lock:
+            if not self._closed:
+                self._queue.put(task)
+                return
+        task()
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Tous les meilleurs tours, écritures en attente comprises (le stockage retourne déjà une copie, lue sous son  #
+    # propre verrou : elle ne bouge plus pendant un commit).                                                       #
+    #--------------------------------------------------------------------------------------------------------------#
+    def load_all(self) -> dict:
+        data = self.store.load_all()
+        with self._lock:
+            pending = list(self._pending.items())
+        for (track_id, car_id, player), entry in pending:
+            if entry is _DELETED:
+                data.get(f"{track_id}|{car_id}", {}).pop(player, None)
+            else:
+                data.setdefault(f"{track_id}|{car_id}", {})[player] = entry
+        return data
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Vide la queue (attend le commit de tout ce qui a été déposé), puis ferme le stockage. La fermeture et le     #
+    # marqueur d'arrêt sont posés sous le verrou des dépôts : aucune intention ne peut suivre le marqueur.         #
+    # Retourne False si des écritures n'ont pas pu être validées (commit en échec jusqu'à l'arrêt).                #
+    #--------------------------------------------------------------------------------------------------------------#
+    def close(self, timeout: float = 5.0) -> bool:
+        self.flush(timeout)
+        with self._lock:
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join(timeout)
+        self.store.close()
+        with self._lock:
+            return not self._pending
+
+    # ---- Persistance ----
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Attend que toutes les écritures déposées soient validées : True si chacune des entrées en attente à l'appel  #
+    # est écrite (ou remplacée par un dépôt plus récent) avant `timeout`, False sinon (délai ou commit en échec).  #
+    #--------------------------------------------------------------------------------------------------------------#
+    def flush(self, timeout: float = 5.0) -> bool:
+        with self._lock:
+            pending = list(self._pending.items())
+        done = threading.Event()
+        self._queue.put(done)
+        if not done.wait(timeout):
+            return False
+        with self._lock:
+            return not any(self._pending.get(key) is entry for key, entry in pending)
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Boucle du thread : attend une écriture, regroupe celles qui arrivent dans la fenêtre, valide la rafale. Une  #
+    # rafale en échec est gardée et revalidée avant tout nouveau dépôt (après une fenêtre) : les dépôts arrivés    #
+    # entre-temps la complètent et la remplacent clé par clé, jamais l'inverse.                                    #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _run(self):
+        retry = None
+        while True:
+            if retry is None:
+                batch: dict[tuple, dict] = {}
+                callbacks: dict[tuple, list] = {}
+                first = None
+                item = self._queue.get()
+            else:
+                batch, callbacks, first = retry
+                retry = None
+                try:
+                    item = self._queue.get(timeout=max(self.window, 0.05))
+                except queue.Empty:
+                    item = _NO_ITEM
+            tasks: list = []
+            waiters: list[threading.Event] = []
+            deadline = time.perf_counter() + self.window
+            stop = False
+            while item is not _NO_ITEM:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                elif callable(item):
+                    tasks.append(item)
+                else:
+                    submitted, key, entry, on_commit = item
+                    first = submitted if first is None else first
+                    batch[key] = entry
+                    callbacks.setdefault(key, []).extend(on_commit)
+                # Un flush ou un arrêt valide la rafale sans attendre la fin de la fenêtre
+                if stop or waiters:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    continue
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if batch and not self._commit(batch, callbacks, first):
+                retry = (batch, callbacks, first)
+            for task in tasks:
+                try:
+                    task()
+                except Exception as e:
+                    self.errors += 1
+                    self.last_error = str(e)
+            # Un flush en attente constate lui-même un échec (entrées toujours en attente)
+            for w in waiters:
+                w.set()
+            if stop:
+                return
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Valide une rafale en un appel au stockage ; les entrées écrites quittent la superposition et leurs rappels   #
+    # `on_commit` reçoivent l'heure de fin du commit. Retourne False si le commit a échoué (entrées toujours       #
+    # superposées en mémoire, rafale à revalider).                                                                 #
+    #--------------------------------------------------------------------------------------------------------------#
+    def _commit(self, batch: dict, callbacks: dict, first: float) -> bool:
+        try:
+            with self._commit_lock:
+                saves = [(*key, entry) for key, entry in batch.items() if entry is not _DELETED]
+                deletes = [key for key, entry in batch.items() if entry is _DELETED]
+                if saves:
+                    self.store.save_entries(saves)
+                if deletes:
+                    self.store.delete_entries(deletes)
+                with self._lock:
+                    for key, entry in batch.items():
+                        if self._pending.get(key) is entry:
+                            del self._pending[key]
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+            return False
+        latency = time.perf_counter() - first
+        committed_at = time.time()
+        for on_commit in (cb for cbs in callbacks.values() for cb in cbs):
+            try:
+                on_commit(committed_at)
+            except Exception:
+                pass
+        self.commits += 1
+        self.committed += len(batch)
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self._latency_sum += latency
+        return True
+
+    #--------------------------------------------------------------------------------------------------------------#
+    # Profondeur de queue et latence de commit ({"queued", "pending", "commits", "records", "last_ms", ...}).      #
+    #--------------------------------------------------------------------------------------------------------------#
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "queued": self._queue.qsize(),
+            "pending": pending,
+            "commits": self.commits,
+            "records": self.committed,
+            "errors": self.errors,
+            "last_ms": self.last_latency * 1e3 if self.last_latency is not None else None,
+            "avg_ms": self._latency_sum / self.commits * 1e3 if self.commits else None,
+            "max_ms": self.max_latency * 1e3,
+        }
+
+
+#--------------------------------------------------------------------------------------------------------------#
+# Met en forme les statistiques de persistance pour la zone debug.                                             #
+#--------------------------------------------------------------------------------------------------------------#
+def format_write_behind_stats(stats: Optional[dict]) -> str:
+    if not stats:
+        return "synchrone"
+    text = (f"queue {stats['queued']}  en attente {stats['pending']}  "
+            f"commits {stats['commits']} ({stats['records']} records)")
+    if stats["last_ms"] is not None:
+        text += f"  latence {stats['last_ms']:.0f} ms (moy {stats['avg_ms']:.0f}, max {stats['max_ms']:.0f})"
+    if stats["errors"]:
+        text += f"  erreurs {stats['errors']}"
+    return text